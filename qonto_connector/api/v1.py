@@ -5,10 +5,22 @@
 
 import frappe
 from frappe import _
+from frappe.utils import cint
+from werkzeug.wrappers import Response
 
 from qonto_connector.qonto.client import QontoClient
+from qonto_connector.qonto.metrics import render_prometheus
 from qonto_connector.qonto.utils import log_sync
-from qonto_connector.qonto.constants import CACHE_KEY_SYNC_RUNNING
+from qonto_connector.qonto.constants import (
+    WEBHOOK_SIGNATURE_HEADER,
+    CACHE_KEY_SYNC_RUNNING,
+    CACHE_KEY_SYNC_METRICS,
+    CACHE_KEY_SYNC_METRICS_TOTALS,
+    POST_SYNC_QUEUE,
+    POST_SYNC_TIMEOUT,
+    RENORMALIZE_QUEUE,
+    RENORMALIZE_TIMEOUT,
+)
 
 
 @frappe.whitelist()
@@ -26,7 +38,10 @@ def test_connection():
         client = QontoClient(settings)
 
         # Test connection and get organization info
-        org_data = client.get_organization()
+        try:
+            org_data = client.get_organization()
+        finally:
+            client.close()
 
         # Update settings
         settings.organization_id = org_data.get("slug")
@@ -78,7 +93,10 @@ def fetch_accounts():
             }
 
         client = QontoClient(settings)
-        accounts = client.list_accounts()
+        try:
+            accounts = client.list_accounts()
+        finally:
+            client.close()
 
         # Format for frontend
         formatted_accounts = []
@@ -108,10 +126,13 @@ def fetch_accounts():
 
 
 @frappe.whitelist()
-def sync_now():
+def sync_now(profile=False):
     """
     Trigger immediate sync.
 
+    Args:
+        profile: Run the sync under the profiler and attach the report to its log
+
     Returns:
         dict: Success status and message
     """
@@ -129,7 +150,8 @@ def sync_now():
         "qonto_connector.qonto.sync.schedule_all_syncs",
         queue="long",
         timeout=900,
-        job_name="qonto_sync_manual"
+        job_name="qonto_sync_manual",
+        profile=bool(cint(profile))
     )
 
     log_sync("INFO", "Manual sync triggered")
@@ -146,10 +168,14 @@ def get_sync_status():
     Get current sync status.
 
     Returns:
-        dict: Current sync status and recent logs
+        dict: Current sync status, recent logs, balance mismatches and
+            unresolved dead letters
     """
     frappe.only_for("System Manager", "Qonto Manager")
 
+    from qonto_connector.qonto.dead_letter import DEAD_LETTER_DOCTYPE
+    from qonto_connector.qonto.ledger import get_balance_mismatches
+
     settings = frappe.get_single("Qonto Settings")
     is_running = bool(frappe.cache().get_value(CACHE_KEY_SYNC_RUNNING))
 
@@ -167,7 +193,9 @@ def get_sync_status():
         "last_sync": settings.last_sync_at,
         "last_error": settings.last_error,
         "recent_logs": logs,
-        "active_mappings": len([m for m in settings.account_mappings if m.active])
+        "active_mappings": len([m for m in settings.account_mappings if m.active]),
+        "balance_mismatches": get_balance_mismatches(),
+        "dead_letters": frappe.db.count(DEAD_LETTER_DOCTYPE, {"status": ("!=", "Resolved")})
     }
 
 
@@ -210,3 +238,312 @@ def get_account_sync_summary():
         "summaries": summaries
     }
 
+
+@frappe.whitelist()
+def metrics():
+    """
+    Expose sync phase timings and counters in Prometheus text format.
+
+    Returns:
+        Response: text/plain Prometheus exposition payload
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    payload = render_prometheus(
+        frappe.cache().get_value(CACHE_KEY_SYNC_METRICS),
+        frappe.cache().get_value(CACHE_KEY_SYNC_METRICS_TOTALS)
+    )
+
+    return Response(payload, mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+@frappe.whitelist()
+def start_backfill(qonto_bank_account_id, from_date, to_date, window_hours=None):
+    """
+    Start a windowed historical backfill for one account.
+
+    Args:
+        qonto_bank_account_id: Qonto bank account ID
+        from_date: Start of the range
+        to_date: End of the range
+        window_hours: Size of each window (7 days by default)
+
+    Returns:
+        dict: Success status and backfill name
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    from qonto_connector.qonto.backfill import create_backfill
+
+    kwargs = {}
+    if window_hours:
+        kwargs["window_hours"] = cint(window_hours)
+
+    backfill = create_backfill(qonto_bank_account_id, from_date, to_date, **kwargs)
+
+    return {
+        "success": True,
+        "backfill": backfill,
+        "message": _("Backfill {0} has been queued").format(backfill)
+    }
+
+
+@frappe.whitelist()
+def get_backfill_status(backfill):
+    """
+    Get progress of a backfill and of each of its windows.
+
+    Args:
+        backfill: Name of the Qonto Backfill
+
+    Returns:
+        dict: Backfill status with its windows
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    from qonto_connector.qonto.backfill import get_backfill_status as _get_backfill_status
+
+    return _get_backfill_status(backfill)
+
+
+@frappe.whitelist()
+def resume_backfill(backfill):
+    """
+    Re-enqueue the pending and failed windows of a backfill.
+
+    Failed windows resume from their last committed page.
+
+    Args:
+        backfill: Name of the Qonto Backfill
+
+    Returns:
+        dict: Success status and number of windows enqueued
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    from qonto_connector.qonto.backfill import enqueue_backfill
+
+    frappe.db.set_value(
+        "Qonto Backfill",
+        backfill,
+        {"status": "Running", "finished_at": None},
+        update_modified=False
+    )
+    count = enqueue_backfill(backfill)
+
+    return {"success": True, "windows": count}
+
+
+@frappe.whitelist(allow_guest=True, methods=["POST"])
+def webhook():
+    """
+    Receive a signed Qonto transaction event.
+
+    The event is only verified and queued here; it is ingested in batches
+    by a background job.
+
+    Returns:
+        dict: Success status and queued event
+    """
+    from qonto_connector.qonto.webhooks import receive_event
+
+    result = receive_event(
+        frappe.request.get_data(),
+        frappe.get_request_header(WEBHOOK_SIGNATURE_HEADER)
+    )
+
+    return {"success": True, **result}
+
+
+@frappe.whitelist()
+def search_transactions(filters=None, limit=None, cursor=None):
+    """
+    Search synced transactions by counterparty, card, label, amount and date.
+
+    Args:
+        filters: JSON object of filters (see qonto.search.search_transactions)
+        limit: Rows per page
+        cursor: next_cursor returned with the previous page
+
+    Returns:
+        dict: Matching transactions and the cursor of the next page
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    from qonto_connector.qonto.search import search_transactions as _search_transactions
+
+    if isinstance(filters, str):
+        filters = frappe.parse_json(filters)
+
+    return _search_transactions(filters or {}, limit=limit, cursor=cursor)
+
+
+@frappe.whitelist()
+def renormalize_transactions():
+    """
+    Rebuild Bank Transaction and staged fields from stored Qonto payloads.
+
+    Draft Bank Transactions and staged rows are re-derived with the current
+    normalization, in parallel chunks, without calling the Qonto API.
+
+    Returns:
+        dict: Success status and message
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    frappe.enqueue(
+        "qonto_connector.qonto.renormalize.start_renormalization",
+        queue=RENORMALIZE_QUEUE,
+        timeout=RENORMALIZE_TIMEOUT,
+        job_id="qonto_renormalize_plan",
+        deduplicate=True
+    )
+
+    return {
+        "success": True,
+        "message": _("Re-normalization has been queued")
+    }
+
+
+@frappe.whitelist()
+def verify_transactions(qonto_bank_account_id=None, from_date=None, to_date=None):
+    """
+    Compare Bank Transactions with Qonto and report the differences.
+
+    Drafts of declined or canceled transactions are retracted and Bank
+    Transactions unknown to Qonto are flagged; the diff of each account is
+    written to the Qonto Sync Log.
+
+    Args:
+        qonto_bank_account_id: Account to verify, all active accounts by default
+        from_date: First posting date, the sync lookback window by default
+        to_date: Last posting date, today by default
+
+    Returns:
+        dict: Success status and message
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    from qonto_connector.qonto.verify import enqueue_verification
+
+    enqueue_verification(
+        account_ids=[qonto_bank_account_id] if qonto_bank_account_id else None,
+        from_date=from_date,
+        to_date=to_date
+    )
+
+    return {
+        "success": True,
+        "message": _("Verification has been queued")
+    }
+
+
+@frappe.whitelist()
+def get_cash_flow(bank_account=None, from_date=None, to_date=None, operation_type=None, group_by="day"):
+    """
+    Get inflow and outflow totals of Qonto Bank Transactions.
+
+    Read from the daily cash flow table, which is kept up to date on every
+    Bank Transaction change, so the cost does not grow with history.
+
+    Args:
+        bank_account: ERPNext Bank Account, all accounts by default
+        from_date: First date, inclusive
+        to_date: Last date, inclusive
+        operation_type: Qonto operation type, e.g. card or transfer
+        group_by: "day" or "month"
+
+    Returns:
+        dict: Totals per period, account and operation type
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    from qonto_connector.qonto.ledger import get_cash_flow as _get_cash_flow
+
+    return {
+        "success": True,
+        "rows": _get_cash_flow(
+            bank_account=bank_account,
+            from_date=from_date,
+            to_date=to_date,
+            operation_type=operation_type,
+            group_by=group_by
+        )
+    }
+
+
+@frappe.whitelist()
+def reset_opening_balance(bank_account=None):
+    """
+    Clear opening balances, so the next balance check takes them again.
+
+    Args:
+        bank_account: ERPNext Bank Account, all accounts by default
+
+    Returns:
+        dict: Success status
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    from qonto_connector.qonto.ledger import reset_opening_balance as _reset_opening_balance
+
+    _reset_opening_balance(bank_account)
+    frappe.db.commit()
+
+    return {
+        "success": True,
+        "message": _("Opening balances will be taken again on the next check")
+    }
+
+
+@frappe.whitelist()
+def match_transactions(rematch=0):
+    """
+    Match unreconciled Qonto Bank Transactions with open vouchers now.
+
+    Runs after every sync anyway; use rematch to retry the transactions
+    that had no match, e.g. after creating missing invoices.
+
+    Args:
+        rematch: Also retry the transactions marked No Match
+
+    Returns:
+        dict: Success status and message
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    frappe.enqueue(
+        "qonto_connector.qonto.matching.match_new_transactions",
+        queue=POST_SYNC_QUEUE,
+        timeout=POST_SYNC_TIMEOUT,
+        rematch=bool(cint(rematch))
+    )
+
+    return {
+        "success": True,
+        "message": _("Matching has been queued")
+    }
+
+
+@frappe.whitelist()
+def replay_dead_letters():
+    """
+    Replay the due dead letters now instead of waiting for the scheduler.
+
+    Returns:
+        dict: Success status and message
+    """
+    frappe.only_for("System Manager", "Qonto Manager")
+
+    frappe.enqueue(
+        "qonto_connector.qonto.dead_letter.replay_dead_letters",
+        queue=POST_SYNC_QUEUE,
+        timeout=POST_SYNC_TIMEOUT,
+        job_id="qonto_dead_letter_replay",
+        deduplicate=True
+    )
+
+    return {
+        "success": True,
+        "message": _("Dead letter replay has been queued")
+    }
@@ -0,0 +1,323 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Local stand-in for the Qonto API, serving synthetic accounts and transactions."""
+
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+OPERATION_TYPES = ["card", "transfer", "income", "direct_debit", "qonto_fee"]
+COUNTERPARTIES = ["Acme SAS", "Globex SARL", "Initech", "Umbrella Corp", "Hooli", "Stark Industries"]
+
+
+class FakeQontoData:
+    """Deterministic generator of N accounts x M transactions."""
+
+    def __init__(
+        self,
+        accounts: int = 1,
+        transactions_per_account: int = 100,
+        seed: int = 42,
+        start: Optional[datetime] = None,
+        pending_ratio: float = 0.0
+    ):
+        """
+        Initialize generator.
+
+        Args:
+            accounts: Number of bank accounts
+            transactions_per_account: Number of transactions per account
+            seed: Random seed, the same seed always yields the same data
+            start: Date of the oldest transaction (defaults to one year ago)
+            pending_ratio: Share of transactions left in pending status
+        """
+        self.accounts = accounts
+        self.transactions_per_account = transactions_per_account
+        self.seed = seed
+        self.start = start or (datetime.now(timezone.utc) - timedelta(days=365))
+        self.pending_ratio = pending_ratio
+        self._transactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._queries: Dict[tuple, List[Dict[str, Any]]] = {}
+
+    def bank_accounts(self) -> List[Dict[str, Any]]:
+        """Bank accounts as returned in the organization payload."""
+        return [
+            {
+                "slug": f"fake-account-{i}",
+                "name": f"Fake Account {i}",
+                "iban": f"FR76300040000{i:014d}",
+                "bic": "QNTOFRP1XXX",
+                "currency": "EUR",
+                "balance": 0.0,
+                "balance_cents": 0,
+                "status": "active",
+            }
+            for i in range(self.accounts)
+        ]
+
+    def transactions(self, bank_account_id: str) -> List[Dict[str, Any]]:
+        """
+        All transactions of an account, oldest update first.
+
+        Args:
+            bank_account_id: Account slug
+
+        Returns:
+            List of raw Qonto transaction dictionaries
+        """
+        if bank_account_id not in self._transactions:
+            self._transactions[bank_account_id] = self._generate(bank_account_id)
+        return self._transactions[bank_account_id]
+
+    def _generate(self, bank_account_id: str) -> List[Dict[str, Any]]:
+        rng = random.Random(f"{self.seed}:{bank_account_id}")
+        count = self.transactions_per_account
+        span_seconds = max(
+            int((datetime.now(timezone.utc) - self.start).total_seconds()), count
+        )
+        step = span_seconds / max(count, 1)
+
+        transactions = []
+        for i in range(count):
+            emitted_at = self.start + timedelta(seconds=int(i * step))
+            pending = rng.random() < self.pending_ratio
+            side = "credit" if rng.random() < 0.3 else "debit"
+            amount_cents = rng.randint(100, 500_000)
+            operation_type = rng.choice(OPERATION_TYPES)
+
+            transactions.append({
+                "transaction_id": f"{bank_account_id}-tx-{i:08d}",
+                "amount": amount_cents / 100,
+                "amount_cents": amount_cents,
+                "currency": "EUR",
+                "side": side,
+                "status": "pending" if pending else "settled",
+                "operation_type": operation_type,
+                "emitted_at": _iso(emitted_at),
+                "settled_at": None if pending else _iso(emitted_at + timedelta(hours=1)),
+                "updated_at": _iso(emitted_at + timedelta(hours=1)),
+                "label": f"{operation_type.upper()} {rng.randint(1000, 9999)}",
+                "reference": f"REF-{rng.randint(100000, 999999)}" if side == "credit" else None,
+                "counterparty_name": rng.choice(COUNTERPARTIES),
+                "card_last_digits": f"{rng.randint(0, 9999):04d}" if operation_type == "card" else None,
+                "attachment_ids": [],
+            })
+
+        return transactions
+
+    def query(
+        self,
+        bank_account_id: str,
+        updated_at_from: Optional[str] = None,
+        updated_at_to: Optional[str] = None,
+        status: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter an account's transactions like the transactions endpoint.
+
+        Returns:
+            Matching transactions, oldest update first
+        """
+        key = (bank_account_id, updated_at_from, updated_at_to, tuple(status or ()))
+        if key not in self._queries:
+            low = _parse(updated_at_from)
+            high = _parse(updated_at_to)
+
+            self._queries[key] = [
+                tx for tx in self.transactions(bank_account_id)
+                if (low is None or _parse(tx["updated_at"]) >= low)
+                and (high is None or _parse(tx["updated_at"]) <= high)
+                and (not status or tx["status"] in status)
+            ]
+
+        return self._queries[key]
+
+
+class FakeQontoServer:
+    """Threaded HTTP server answering the organization and transactions endpoints."""
+
+    def __init__(
+        self,
+        data: Optional[FakeQontoData] = None,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        rate_limit_rate: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 42,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Initialize server.
+
+        Args:
+            data: Synthetic data to serve
+            latency_ms: Fixed latency added to each response
+            jitter_ms: Random extra latency, uniform in [0, jitter_ms]
+            rate_limit_rate: Share of requests answered with 429
+            error_rate: Share of requests answered with 503
+            retry_after: Retry-After header sent with 429 and 503 answers
+            seed: Seed for latency and fault injection
+            host: Interface to bind
+            port: Port to bind, 0 picks a free one
+        """
+        self.data = data or FakeQontoData()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.status_counts: Dict[int, int] = {}
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to give to QontoClient."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v2/"
+
+    def start(self) -> "FakeQontoServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeQontoServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _draw(self):
+        """Pick latency and injected fault for one request."""
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+            roll = self._rng.random()
+
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+    def _count(self, status: int):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                delay, fault = server._draw()
+                if delay:
+                    time.sleep(delay / 1000)
+
+                if not self.headers.get("Authorization"):
+                    return self._send(401, {"errors": [{"code": "unauthorized"}]})
+
+                if fault:
+                    return self._send(
+                        fault,
+                        {"errors": [{"code": "injected_fault"}]},
+                        {"Retry-After": str(server.retry_after)}
+                    )
+
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+
+                if endpoint == "organization":
+                    return self._send(200, {
+                        "organization": {
+                            "slug": "fake-org",
+                            "legal_name": "Fake Organization",
+                            "bank_accounts": server.data.bank_accounts(),
+                        }
+                    })
+
+                if endpoint == "transactions":
+                    return self._send(200, self._transactions(query))
+
+                return self._send(404, {"errors": [{"code": "not_found"}]})
+
+            def _transactions(self, query):
+                def first(key, default=None):
+                    return query.get(key, [default])[0]
+
+                per_page = min(int(first("per_page", 100)), 100)
+                page = max(int(first("page", 1)), 1)
+
+                matching = server.data.query(
+                    first("bank_account_id"),
+                    updated_at_from=first("updated_at_from"),
+                    updated_at_to=first("updated_at_to"),
+                    status=query.get("status[]")
+                )
+
+                total_count = len(matching)
+                total_pages = max((total_count + per_page - 1) // per_page, 1)
+                offset = (page - 1) * per_page
+
+                return {
+                    "transactions": matching[offset:offset + per_page],
+                    "meta": {
+                        "current_page": page,
+                        "next_page": page + 1 if page < total_pages else None,
+                        "prev_page": page - 1 if page > 1 else None,
+                        "total_pages": total_pages,
+                        "total_count": total_count,
+                        "per_page": per_page,
+                    },
+                }
+
+            def _send(self, status, payload, headers=None):
+                server._count(status)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-Qonto-Request-Id", f"fake-{server.request_count}")
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def _iso(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
@@ -0,0 +1,218 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""End-to-end DB ingestion benchmark of sync_account over an in-memory feed."""
+
+import resource
+import time
+from typing import Dict, Any, Iterator, List, Optional
+
+import frappe
+
+from qonto_connector.qonto.client import normalize_transaction
+from qonto_connector.qonto.constants import CUSTOM_FIELD_QONTO_ID
+from qonto_connector.qonto.ledger import rebuild_cash_flow, rebuild_running_totals
+from qonto_connector.qonto.metrics import start_run, finish_run
+from qonto_connector.qonto.profiling import get_query_count
+from qonto_connector.qonto.staging import STAGING_DOCTYPE
+from .fake_server import FakeQontoData
+
+BENCH_COMPANY = "Qonto Bench Company"
+BENCH_COMPANY_ABBR = "QBC"
+BENCH_BANK = "Qonto Bench Bank"
+BENCH_ACCOUNT_PREFIX = "bench-account"
+
+MIXES = ("create", "update", "skip")
+
+
+class FeedClient:
+    """Client stand-in serving normalized transactions from memory."""
+
+    def __init__(self, data: FakeQontoData, revision: int = 0):
+        """
+        Initialize feed.
+
+        Args:
+            data: Synthetic transactions
+            revision: Bumped to serve changed labels and amounts for the same IDs
+        """
+        self.data = data
+        self.revision = revision
+
+    def iter_transactions(self, bank_account_id: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        for tx in self.data.transactions(bank_account_id):
+            if self.revision:
+                tx = dict(
+                    tx,
+                    label=f"{tx['label']} r{self.revision}",
+                    amount=round(tx["amount"] + self.revision / 100, 2),
+                )
+            yield normalize_transaction(tx)
+
+
+def seed(accounts: int) -> List[frappe._dict]:
+    """
+    Create the company, bank and bank accounts used by the benchmark.
+
+    Args:
+        accounts: Number of synthetic mappings
+
+    Returns:
+        Synthetic account mappings
+    """
+    if not frappe.db.exists("Company", BENCH_COMPANY):
+        frappe.get_doc({
+            "doctype": "Company",
+            "company_name": BENCH_COMPANY,
+            "abbr": BENCH_COMPANY_ABBR,
+            "default_currency": "EUR",
+            "country": "France",
+        }).insert(ignore_permissions=True)
+
+    if not frappe.db.exists("Bank", BENCH_BANK):
+        frappe.get_doc({"doctype": "Bank", "bank_name": BENCH_BANK}).insert(
+            ignore_permissions=True
+        )
+
+    mappings = []
+    for i in range(accounts):
+        account_name = f"Qonto Bench {i}"
+        bank_account = frappe.db.get_value(
+            "Bank Account", {"account_name": account_name, "bank": BENCH_BANK}
+        )
+        if not bank_account:
+            bank_account = frappe.get_doc({
+                "doctype": "Bank Account",
+                "account_name": account_name,
+                "bank": BENCH_BANK,
+                "company": BENCH_COMPANY,
+            }).insert(ignore_permissions=True).name
+
+        mappings.append(frappe._dict({
+            "qonto_bank_account_id": f"{BENCH_ACCOUNT_PREFIX}-{i}",
+            "erpnext_bank_account": bank_account,
+            "company": BENCH_COMPANY,
+            "last_synced_at": None,
+            "active": 1,
+        }))
+
+    frappe.db.commit()
+    return mappings
+
+
+def cleanup():
+    """
+    Delete every Bank Transaction and staged row created by the benchmark.
+
+    Rows are deleted in bulk, which skips their on_trash hooks, so the
+    running totals and cash flow table are rebuilt afterwards.
+    """
+    pattern = f"{BENCH_ACCOUNT_PREFIX}-%"
+    frappe.db.delete("Bank Transaction", {CUSTOM_FIELD_QONTO_ID: ("like", pattern)})
+    frappe.db.delete(STAGING_DOCTYPE, {"name": ("like", pattern)})
+    rebuild_running_totals()
+    rebuild_cash_flow()
+    frappe.db.commit()
+
+
+def run_mix(mix: str, mappings: List[frappe._dict], client: FeedClient) -> Dict[str, Any]:
+    """
+    Run sync_account over every mapping and measure it.
+
+    Args:
+        mix: Name of the mix (create, update or skip)
+        mappings: Synthetic mappings
+        client: Feed to ingest
+
+    Returns:
+        Benchmark report for the mix
+    """
+    from qonto_connector.qonto.sync import sync_account
+
+    metrics = start_run()
+    queries_before = get_query_count()
+    start = time.perf_counter()
+
+    rows = 0
+    for mapping in mappings:
+        with metrics.account(mapping.qonto_bank_account_id):
+            # Measures Bank Transaction upserts, not the staging table
+            rows += sync_account(client, mapping, 0, staged=False)
+
+    elapsed = time.perf_counter() - start
+    queries_after = get_query_count()
+    summary = finish_run(metrics, publish=False)
+
+    queries = None
+    if queries_before is not None and queries_after is not None:
+        queries = queries_after - queries_before - 1
+
+    expected = sum(len(client.data.transactions(m.qonto_bank_account_id)) for m in mappings)
+
+    return {
+        "mix": mix,
+        "rows": rows,
+        "expected_rows": expected,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else 0,
+        "queries_per_transaction": round(queries / expected, 2) if queries and expected else None,
+        "commits": summary["run"]["counters"].get("commits", 0),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "phases": summary["run"]["phases"],
+    }
+
+
+def run(
+    accounts: int = 2,
+    transactions: int = 500,
+    mixes: Optional[List[str]] = None,
+    keep: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Seed the site and benchmark the create, update and skip mixes in order.
+
+    Args:
+        accounts: Number of synthetic mappings
+        transactions: Transactions per mapping
+        mixes: Mixes to report, all by default
+        keep: Keep the generated Bank Transactions afterwards
+
+    Returns:
+        One report per mix
+    """
+    mixes = mixes or list(MIXES)
+    mappings = seed(accounts)
+    data = FakeQontoData(accounts=0, transactions_per_account=transactions)
+    reports = []
+
+    cleanup()
+    try:
+        # Each mix needs the state left by the previous one, so all of them
+        # run; only the requested ones are reported.
+        report = run_mix("create", mappings, FeedClient(data))
+        if "create" in mixes:
+            reports.append(report)
+
+        report = run_mix("update", mappings, FeedClient(data, revision=1))
+        if "update" in mixes:
+            reports.append(report)
+
+        if "skip" in mixes:
+            # Submitted transactions are skipped by upsert_bank_transaction.
+            # Flip docstatus directly: submitting through the ORM would
+            # dominate the benchmark and is not what is being measured.
+            # Submitted rows count in the totals like drafts, so the
+            # skipped hooks leave nothing to correct.
+            frappe.db.sql(
+                f"""update `tabBank Transaction` set docstatus = 1
+                where `{CUSTOM_FIELD_QONTO_ID}` like %s""",
+                (f"{BENCH_ACCOUNT_PREFIX}-%",)
+            )
+            frappe.db.commit()
+            reports.append(run_mix("skip", mappings, FeedClient(data, revision=2)))
+    finally:
+        if not keep:
+            cleanup()
+
+    return reports
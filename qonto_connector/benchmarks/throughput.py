@@ -0,0 +1,211 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""
+Throughput benchmarks of the Qonto client and sync engine against the fake API.
+
+Run from a bench directory:
+
+    bench --site test_site execute qonto_connector.benchmarks.throughput.run \\
+        --kwargs "{'accounts': 3, 'transactions': 2000, 'latency_ms': 20}"
+
+Pass ``bank_account`` and ``company`` to also benchmark ``sync_account``; it
+writes real Bank Transactions, so only do that on a test site.
+"""
+
+import math
+import time
+from typing import Dict, Any, List, Optional
+
+import frappe
+
+from qonto_connector.qonto.client import QontoClient
+from qonto_connector.qonto.tracing import TraceExporter, span
+from .fake_server import FakeQontoData, FakeQontoServer
+
+
+class BenchmarkSettings:
+    """Stand-in for Qonto Settings pointing at the fake API."""
+
+    environment = "Sandbox"
+    api_login = "fake-org"
+    default_sync_lookback_days = 3650
+
+    def get_password(self, fieldname):
+        return "fake-secret"
+
+    def get(self, fieldname, default=None):
+        return getattr(self, fieldname, default)
+
+
+class PageCollector(TraceExporter):
+    """Trace exporter keeping page span durations in memory."""
+
+    def __init__(self):
+        super().__init__(path=None)
+        self.page_ms: List[float] = []
+
+    def export(self, finished_span):
+        if finished_span.kind == "page":
+            self.page_ms.append(finished_span.duration_ms)
+
+    def flush(self):
+        pass
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values: Samples
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Percentile value, 0 when there are no samples
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(math.ceil(pct / 100 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+def _report(name: str, items: int, elapsed: float, pages: PageCollector) -> Dict[str, Any]:
+    return {
+        "benchmark": name,
+        "transactions": items,
+        "seconds": round(elapsed, 3),
+        "transactions_per_second": round(items / elapsed, 1) if elapsed else 0,
+        "pages": len(pages.page_ms),
+        "p50_page_ms": round(percentile(pages.page_ms, 50), 2),
+        "p95_page_ms": round(percentile(pages.page_ms, 95), 2),
+        "max_page_ms": round(max(pages.page_ms, default=0), 2),
+    }
+
+
+def bench_iter_transactions(
+    server: FakeQontoServer,
+    page_size: int = 100
+) -> Dict[str, Any]:
+    """
+    Stream every transaction of every fake account through the client.
+
+    Args:
+        server: Running fake server
+        page_size: Transactions per page
+
+    Returns:
+        Benchmark report
+    """
+    client = QontoClient(BenchmarkSettings(), base_url=server.base_url)
+    pages = PageCollector()
+    count = 0
+
+    start = time.perf_counter()
+    with span("run", exporter=pages):
+        for account in client.list_accounts():
+            for _ in client.iter_transactions(account["slug"], page_size=page_size):
+                count += 1
+    elapsed = time.perf_counter() - start
+
+    return _report("iter_transactions", count, elapsed, pages)
+
+
+def bench_sync_account(
+    server: FakeQontoServer,
+    bank_account: str,
+    company: str
+) -> Dict[str, Any]:
+    """
+    Run sync_account for every fake account into a real ERPNext Bank Account.
+
+    Args:
+        server: Running fake server
+        bank_account: ERPNext Bank Account receiving the transactions
+        company: Company of the bank account
+
+    Returns:
+        Benchmark report
+    """
+    from qonto_connector.qonto.sync import sync_account
+
+    settings = BenchmarkSettings()
+    client = QontoClient(settings, base_url=server.base_url)
+    pages = PageCollector()
+    count = 0
+
+    start = time.perf_counter()
+    with span("run", exporter=pages):
+        for account in client.list_accounts():
+            mapping = frappe._dict({
+                "qonto_bank_account_id": account["slug"],
+                "erpnext_bank_account": bank_account,
+                "company": company,
+                "last_synced_at": None,
+                "active": 1,
+            })
+            count += sync_account(client, mapping, settings.default_sync_lookback_days)
+    elapsed = time.perf_counter() - start
+
+    return _report("sync_account", count, elapsed, pages)
+
+
+def run(
+    accounts: int = 3,
+    transactions: int = 1000,
+    page_size: int = 100,
+    latency_ms: float = 20,
+    jitter_ms: float = 10,
+    rate_limit_rate: float = 0.0,
+    error_rate: float = 0.0,
+    retry_after: int = 1,
+    bank_account: Optional[str] = None,
+    company: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run the benchmark suite and print one line per benchmark.
+
+    Args:
+        accounts: Number of fake accounts
+        transactions: Transactions per account
+        page_size: Transactions per page
+        latency_ms: Fixed server latency
+        jitter_ms: Random extra server latency
+        rate_limit_rate: Share of requests answered with 429
+        error_rate: Share of requests answered with 503
+        retry_after: Retry-After sent with injected faults
+        bank_account: ERPNext Bank Account for the sync_account benchmark
+        company: Company of the bank account
+
+    Returns:
+        List of benchmark reports
+    """
+    data = FakeQontoData(accounts=accounts, transactions_per_account=transactions)
+    reports = []
+
+    with FakeQontoServer(
+        data,
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        rate_limit_rate=rate_limit_rate,
+        error_rate=error_rate,
+        retry_after=retry_after
+    ) as server:
+        reports.append(bench_iter_transactions(server, page_size=page_size))
+
+        if bank_account and company:
+            reports.append(bench_sync_account(server, bank_account, company))
+
+        for report in reports:
+            report["server_status_counts"] = dict(server.status_counts)
+
+    for report in reports:
+        print(
+            f"{report['benchmark']:<20} {report['transactions']:>8} tx "
+            f"{report['transactions_per_second']:>10} tx/s "
+            f"p95 page {report['p95_page_ms']:>8} ms "
+            f"({report['pages']} pages)"
+        )
+
+    return reports
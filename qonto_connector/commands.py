@@ -0,0 +1,60 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Bench commands for Qonto Connector."""
+
+import json
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("qonto-ingest-benchmark")
+@click.option("--accounts", default=2, show_default=True, help="Synthetic account mappings")
+@click.option("--transactions", default=500, show_default=True, help="Transactions per mapping")
+@click.option(
+    "--mix",
+    "mixes",
+    multiple=True,
+    type=click.Choice(["create", "update", "skip"]),
+    help="Mix to report (repeatable, all by default)"
+)
+@click.option("--keep", is_flag=True, help="Keep the generated Bank Transactions")
+@click.option("--as-json", is_flag=True, help="Print the full reports as JSON")
+@pass_context
+def ingest_benchmark(context, accounts, transactions, mixes, keep, as_json):
+    """Benchmark sync_account ingestion into the database of a test site."""
+    from qonto_connector.benchmarks.ingestion import run
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+
+    try:
+        reports = run(
+            accounts=accounts,
+            transactions=transactions,
+            mixes=list(mixes) or None,
+            keep=keep
+        )
+    finally:
+        frappe.destroy()
+
+    if as_json:
+        click.echo(json.dumps(reports, indent=2))
+        return
+
+    click.echo(
+        f"{'mix':<8} {'rows':>8} {'rows/s':>10} {'queries/tx':>11} "
+        f"{'commits':>8} {'peak RSS MB':>12}"
+    )
+    for report in reports:
+        click.echo(
+            f"{report['mix']:<8} {report['rows']:>8} {report['rows_per_second']:>10} "
+            f"{str(report['queries_per_transaction']):>11} {report['commits']:>8} "
+            f"{report['peak_rss_mb']:>12}"
+        )
+
+
+commands = [ingest_benchmark]
@@ -79,7 +79,20 @@ app_version = "1.0.0"
 
 doc_events = {
     "Bank Transaction": {
-        "before_insert": "qonto_connector.qonto.utils.prevent_duplicate_qonto_transaction"
+        "before_insert": "qonto_connector.qonto.utils.prevent_duplicate_qonto_transaction",
+        # Keep the per-account running totals in step with every change
+        "on_update": "qonto_connector.qonto.ledger.on_bank_transaction_update",
+        "on_cancel": "qonto_connector.qonto.ledger.on_bank_transaction_cancel",
+        "on_trash": "qonto_connector.qonto.ledger.on_bank_transaction_trash"
+    },
+    # Keep the counterparty to Party index in step with the records it reads
+    **{
+        doctype: {
+            "on_update": "qonto_connector.qonto.parties.update_party_index",
+            "on_trash": "qonto_connector.qonto.parties.update_party_index",
+            "after_rename": "qonto_connector.qonto.parties.invalidate_party_index"
+        }
+        for doctype in ("Customer", "Supplier", "Employee", "Bank Account", "Qonto Party Alias")
     }
 }
 
@@ -87,12 +100,36 @@ doc_events = {
 # ---------------
 
 scheduler_events = {
-    # Run every 15 minutes
     "cron": {
+        "* * * * *": [
+            # Enqueue the accounts whose adaptive poll interval has elapsed
+            "qonto_connector.qonto.scheduling.scheduled_sync",
+            # Pick up webhook events left queued and purge old ones
+            "qonto_connector.qonto.webhooks.schedule_webhook_processing",
+            # Materialize staged transactions left pending
+            "qonto_connector.qonto.staging.schedule_materializer"
+        ],
+        "*/10 * * * *": [
+            # Settle or retract provisional Bank Transactions of pending transactions
+            "qonto_connector.qonto.pending.repoll_pending"
+        ],
+        "*/5 * * * *": [
+            # Replay failed transactions whose backoff has elapsed
+            "qonto_connector.qonto.dead_letter.replay_dead_letters"
+        ],
         "*/15 * * * *": [
-            "qonto_connector.qonto.sync.schedule_all_syncs"
+            # Download the receipts of new Qonto transactions
+            "qonto_connector.qonto.attachments.schedule_attachment_sync"
         ]
-    }
+    },
+    "hourly": [
+        # Compare Qonto balances with the running totals
+        "qonto_connector.qonto.ledger.check_balances"
+    ],
+    "daily_long": [
+        # Diff each account against Qonto over the lookback window
+        "qonto_connector.qonto.verify.verify_all_accounts"
+    ]
 }
 
 # Testing
@@ -124,7 +161,9 @@ scheduler_events = {
 
 after_migrate = [
     "qonto_connector.qonto.utils.ensure_custom_fields",
-    "qonto_connector.qonto.utils.ensure_qonto_manager_role"
+    "qonto_connector.qonto.utils.ensure_qonto_manager_role",
+    "qonto_connector.qonto.search.ensure_search_indexes",
+    "qonto_connector.qonto.ledger.ensure_ledger"
 ]
 
 # User Data Protection
@@ -0,0 +1,50 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Copy the Qonto Bank Transactions ingested without staging into the search table."""
+
+import json
+
+import frappe
+
+from qonto_connector.qonto.client import normalize_transaction
+from qonto_connector.qonto.constants import (
+    CUSTOM_FIELD_QONTO_DATA,
+    CUSTOM_FIELD_QONTO_ID,
+    STAGING_CHUNK_SIZE,
+)
+from qonto_connector.qonto.staging import stage_transactions
+
+
+def execute():
+    settings = frappe.get_single("Qonto Settings")
+    accounts = {m.erpnext_bank_account: m.qonto_bank_account_id for m in settings.account_mappings}
+
+    last_name = ""
+    while True:
+        rows = frappe.db.sql(
+            f"""select name, bank_account, `{CUSTOM_FIELD_QONTO_ID}`, `{CUSTOM_FIELD_QONTO_DATA}`
+            from `tabBank Transaction`
+            where `{CUSTOM_FIELD_QONTO_ID}` is not null and docstatus < 2 and name > %s
+            order by name
+            limit %s""",
+            (last_name, STAGING_CHUNK_SIZE),
+            as_dict=True
+        )
+        if not rows:
+            break
+
+        by_account = {}
+        for row in rows:
+            raw = json.loads(row.get(CUSTOM_FIELD_QONTO_DATA) or "{}")
+            raw.setdefault("transaction_id", row.get(CUSTOM_FIELD_QONTO_ID))
+            account_id = raw.get("bank_account_id") or accounts.get(row.bank_account)
+            if account_id:
+                by_account.setdefault(account_id, []).append(normalize_transaction(raw))
+
+        # Synced rows never overwrite a newer version already staged
+        for account_id, transactions in by_account.items():
+            stage_transactions(account_id, transactions, sync_status="Synced")
+
+        frappe.db.commit()
+        last_name = rows[-1].name
@@ -0,0 +1,399 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Download of transaction attachments into Frappe Files."""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Tuple
+
+import requests
+import frappe
+from frappe.utils import cint, flt
+
+from .client import QontoClient
+from .constants import (
+    ATTACHMENT_BATCH_SIZE,
+    ATTACHMENT_CHUNK_SIZE,
+    ATTACHMENT_CONCURRENCY,
+    ATTACHMENT_DISCOVER_LIMIT,
+    ATTACHMENT_DOWNLOAD_TIMEOUT,
+    ATTACHMENT_JOB_ID,
+    ATTACHMENT_MAX_ATTEMPTS,
+    ATTACHMENT_QUEUE,
+    ATTACHMENT_REQUESTS_PER_SECOND,
+    ATTACHMENT_TIMEOUT,
+    CACHE_KEY_ATTACHMENT_CURSOR,
+    CUSTOM_FIELD_QONTO_DATA,
+    CUSTOM_FIELD_QONTO_ID,
+)
+from .exceptions import QontoAPIError
+from .utils import log_sync
+
+ATTACHMENT_DOCTYPE = "Qonto Attachment"
+
+
+class RateBudget:
+    """
+    Token bucket shared by the calls of one job.
+
+    Attachment calls get their own budget, so downloading receipts does not
+    eat into the rate limit headroom of the transaction sync.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = burst or max(int(rate), 1)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, waiting for one if the budget is spent."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens < 1:
+                self.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1.0
+                self.updated = self.clock()
+
+            self.tokens -= 1
+
+
+def download_file(
+    session: requests.Session,
+    url: str,
+    part_path: str,
+    expected_size: Optional[int] = None,
+    chunk_size: int = ATTACHMENT_CHUNK_SIZE
+) -> Tuple[str, int]:
+    """
+    Stream a file to disk, resuming a partial download.
+
+    The body is written chunk by chunk to a ``.part`` file and hashed on
+    the way, so a file is never held in memory. When a ``.part`` file is
+    left from an earlier attempt, only the missing bytes are requested
+    with a Range header.
+
+    Args:
+        session: Session without Qonto credentials (URLs are pre-signed)
+        url: Download URL
+        part_path: Partial file path, kept on failure for the next attempt
+        expected_size: Size announced by Qonto, if any
+        chunk_size: Bytes read at a time
+
+    Returns:
+        (sha256 hex digest, size in bytes)
+
+    Raises:
+        QontoAPIError: If the file is incomplete
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if expected_size and offset > expected_size:
+        offset = 0
+
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    with session.get(url, headers=headers, stream=True, timeout=ATTACHMENT_DOWNLOAD_TIMEOUT) as response:
+        if offset and response.status_code == 416:
+            # Nothing left to fetch: the previous attempt got every byte
+            chunks, append = [], True
+        else:
+            response.raise_for_status()
+            # A server ignoring Range sends the whole file again
+            append = bool(offset) and response.status_code == 206
+            chunks = response.iter_content(chunk_size)
+
+        digest = _hash_file(part_path, chunk_size) if append else hashlib.sha256()
+        with open(part_path, "ab" if append else "wb") as f:
+            for chunk in chunks:
+                if chunk:
+                    f.write(chunk)
+                    digest.update(chunk)
+
+    size = os.path.getsize(part_path)
+    if expected_size and size != expected_size:
+        raise QontoAPIError(f"Incomplete download: {size} of {expected_size} bytes")
+
+    return digest.hexdigest(), size
+
+
+def _hash_file(path: str, chunk_size: int):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest
+
+
+def safe_file_name(file_name: Optional[str], attachment_id: str) -> str:
+    """
+    Get a file name safe to store on disk.
+
+    Args:
+        file_name: Name given by Qonto
+        attachment_id: Fallback when there is no name
+
+    Returns:
+        File name without path separators or unusual characters
+    """
+    name = re.sub(r"[^\w.\-]+", "_", os.path.basename(file_name or "")).strip("._")
+    return name or attachment_id
+
+
+def discover_attachments(limit: int = ATTACHMENT_DISCOVER_LIMIT) -> int:
+    """
+    Queue the attachments of Bank Transactions changed since the last call.
+
+    A (modified, name) cursor kept in cache walks through the Qonto Bank
+    Transactions; without it the walk starts over, which is harmless as
+    known attachments are skipped.
+
+    Args:
+        limit: Bank Transactions read per call
+
+    Returns:
+        Number of attachments queued
+    """
+    cursor = frappe.cache().get_value(CACHE_KEY_ATTACHMENT_CURSOR) or {}
+    rows = frappe.db.sql(
+        f"""select name, modified, `{CUSTOM_FIELD_QONTO_DATA}`
+        from `tabBank Transaction`
+        where `{CUSTOM_FIELD_QONTO_ID}` is not null and docstatus < 2
+            and (modified > %(modified)s or (modified = %(modified)s and name > %(name)s))
+        order by modified, name
+        limit %(limit)s""",
+        {
+            "modified": cursor.get("modified") or "1900-01-01",
+            "name": cursor.get("name") or "",
+            "limit": limit,
+        },
+        as_dict=True
+    )
+    if not rows:
+        return 0
+
+    found = {}
+    for row in rows:
+        raw = json.loads(row.get(CUSTOM_FIELD_QONTO_DATA) or "{}")
+        for attachment_id in raw.get("attachment_ids") or []:
+            found[attachment_id] = row.name
+
+    known = set(frappe.get_all(
+        ATTACHMENT_DOCTYPE, filters={"name": ("in", list(found) or [""])}, pluck="name"
+    ))
+    for attachment_id, bank_transaction in found.items():
+        if attachment_id not in known:
+            frappe.get_doc({
+                "doctype": ATTACHMENT_DOCTYPE,
+                "attachment_id": attachment_id,
+                "bank_transaction": bank_transaction,
+                "status": "Pending",
+            }).insert(ignore_permissions=True)
+
+    frappe.db.commit()
+    frappe.cache().set_value(
+        CACHE_KEY_ATTACHMENT_CURSOR, {"modified": str(rows[-1].modified), "name": rows[-1].name}
+    )
+    return len(set(found) - known)
+
+
+def get_due_attachments(limit: int = ATTACHMENT_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """
+    Get the attachments to download: new ones, then failed ones to retry.
+
+    Args:
+        limit: Rows returned
+
+    Returns:
+        List of Qonto Attachment rows
+    """
+    return frappe.get_all(
+        ATTACHMENT_DOCTYPE,
+        filters=[
+            ["status", "in", ["Pending", "Failed"]],
+            ["attempts", "<", ATTACHMENT_MAX_ATTEMPTS],
+        ],
+        fields=["name", "bank_transaction", "attempts"],
+        order_by="attempts asc, creation asc",
+        limit=limit
+    )
+
+
+def get_part_dir() -> str:
+    """Directory of partial downloads, outside the public and private files."""
+    path = frappe.get_site_path("private", "qonto_attachments")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def sync_attachments(limit: int = ATTACHMENT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Download the queued attachments and attach them to their Bank Transactions.
+
+    Metadata calls go through the attachment rate budget; each file is then
+    downloaded by a pool of threads while the next metadata is fetched.
+    Database writes stay on the job thread.
+
+    Args:
+        limit: Attachments handled per run
+
+    Returns:
+        Dictionary with queued, downloaded, deduplicated and failed counts
+    """
+    result = {"queued": 0, "downloaded": 0, "deduplicated": 0, "failed": 0}
+
+    settings = frappe.get_single("Qonto Settings")
+    if not settings.connected or not settings.get("sync_attachments"):
+        return result
+
+    result["queued"] = discover_attachments()
+    rows = get_due_attachments(limit)
+    if not rows:
+        return result
+
+    budget = RateBudget(
+        flt(settings.get("attachment_requests_per_second")) or ATTACHMENT_REQUESTS_PER_SECOND
+    )
+    workers = cint(settings.get("attachment_concurrency")) or ATTACHMENT_CONCURRENCY
+    part_dir = get_part_dir()
+    client = QontoClient(settings)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool, requests.Session() as session:
+            downloads = {}
+            for row in rows:
+                try:
+                    budget.acquire()
+                    meta = client.get_attachment(row.name)
+                except Exception as e:
+                    _fail(row, e)
+                    result["failed"] += 1
+                    continue
+
+                part_path = os.path.join(part_dir, f"{row.name}.part")
+                future = pool.submit(
+                    download_file, session, meta["url"], part_path, cint(meta.get("file_size")) or None
+                )
+                downloads[future] = (row, meta, part_path)
+
+            for future in as_completed(downloads):
+                row, meta, part_path = downloads[future]
+                try:
+                    sha256, size = future.result()
+                    if attach_file(row, meta, part_path, sha256, size):
+                        result["deduplicated"] += 1
+                    else:
+                        result["downloaded"] += 1
+                except Exception as e:
+                    frappe.db.rollback()
+                    _fail(row, e)
+                    result["failed"] += 1
+                frappe.db.commit()
+    finally:
+        client.close()
+
+    log_sync(
+        "INFO",
+        f"Attachments synced. {result['downloaded']} downloaded, "
+        f"{result['deduplicated']} deduplicated, {result['failed']} failed.",
+        result,
+        items_processed=result["downloaded"] + result["deduplicated"]
+    )
+    return result
+
+
+def attach_file(row, meta: Dict[str, Any], part_path: str, sha256: str, size: int) -> bool:
+    """
+    Attach a downloaded file to its Bank Transaction.
+
+    Content already stored for another attachment is not stored twice: the
+    new File points at the existing one on disk, as long as it is still
+    there.
+
+    Args:
+        row: Qonto Attachment row
+        meta: Attachment metadata
+        part_path: Complete download
+        sha256: Content hash
+        size: Size in bytes
+
+    Returns:
+        True if the content was already stored
+    """
+    file_name = safe_file_name(meta.get("file_name"), row.name)
+    file_url = frappe.db.get_value(
+        ATTACHMENT_DOCTYPE, {"sha256": sha256, "status": "Downloaded"}, "file_url"
+    )
+    # A stored copy removed from disk since is stored again
+    duplicate = bool(file_url) and os.path.exists(
+        frappe.get_site_path(*file_url.strip("/").split("/"))
+    )
+
+    if duplicate:
+        os.remove(part_path)
+    else:
+        stored_name = f"{sha256[:12]}-{file_name}"
+        os.replace(part_path, frappe.get_site_path("private", "files", stored_name))
+        file_url = f"/private/files/{stored_name}"
+
+    attached = {
+        "file_url": file_url,
+        "attached_to_doctype": "Bank Transaction",
+        "attached_to_name": row.bank_transaction,
+    }
+    if not frappe.db.exists("File", attached):
+        frappe.get_doc({
+            "doctype": "File",
+            "file_name": file_name,
+            "is_private": 1,
+            **attached,
+        }).insert(ignore_permissions=True)
+
+    frappe.db.set_value(ATTACHMENT_DOCTYPE, row.name, {
+        "status": "Downloaded",
+        "file_name": file_name,
+        "file_size": size,
+        "sha256": sha256,
+        "file_url": file_url,
+        "error": None,
+    }, update_modified=False)
+    return duplicate
+
+
+def _fail(row, error: Exception):
+    attempts = (row.attempts or 0) + 1
+    frappe.db.set_value(ATTACHMENT_DOCTYPE, row.name, {
+        "status": "Failed",
+        "attempts": attempts,
+        "error": str(error)[:1000],
+    }, update_modified=False)
+
+    if attempts >= ATTACHMENT_MAX_ATTEMPTS:
+        # Never retried: its partial download would only take up space
+        part_path = os.path.join(get_part_dir(), f"{row.name}.part")
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+
+def schedule_attachment_sync():
+    """Scheduled: enqueue the attachment job when attachment sync is on."""
+    if not frappe.db.get_single_value("Qonto Settings", "sync_attachments"):
+        return
+
+    frappe.enqueue(
+        "qonto_connector.qonto.attachments.sync_attachments",
+        queue=ATTACHMENT_QUEUE,
+        timeout=ATTACHMENT_TIMEOUT,
+        job_id=ATTACHMENT_JOB_ID,
+        deduplicate=True
+    )
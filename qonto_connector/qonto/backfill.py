@@ -0,0 +1,328 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Windowed parallel historical backfill."""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+from .client import QontoClient
+from .constants import (
+    BACKFILL_DEFAULT_WINDOW_HOURS,
+    BACKFILL_QUEUE,
+    BACKFILL_WINDOW_TIMEOUT,
+)
+from .staging import enqueue_materializer, is_staging_enabled, stage_transactions
+from .sync import get_account_mapping, ingest_transaction, timed_commit
+from .tracing import span
+from .utils import get_ingested_statuses, log_sync
+
+
+def split_windows(
+    from_date: datetime,
+    to_date: datetime,
+    window_hours: int
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Split a date range into consecutive windows.
+
+    Args:
+        from_date: Start of the range
+        to_date: End of the range
+        window_hours: Size of each window
+
+    Returns:
+        List of (start, end) tuples covering the range, the last one possibly shorter
+    """
+    step = timedelta(hours=window_hours)
+    windows = []
+    start = from_date
+    while start < to_date:
+        end = min(start + step, to_date)
+        windows.append((start, end))
+        start = end
+    return windows
+
+
+def create_backfill(
+    qonto_bank_account_id: str,
+    from_date,
+    to_date,
+    window_hours: int = BACKFILL_DEFAULT_WINDOW_HOURS,
+    catch_up: bool = False
+) -> str:
+    """
+    Create a backfill for a date range and enqueue its windows.
+
+    Args:
+        qonto_bank_account_id: Qonto bank account ID
+        from_date: Start of the range (transactions updated from)
+        to_date: End of the range (transactions updated up to)
+        window_hours: Size of each window
+        catch_up: Gap left by a recent-first sync, run newest window first
+
+    Returns:
+        Name of the Qonto Backfill
+    """
+    settings = frappe.get_single("Qonto Settings")
+    get_account_mapping(settings, qonto_bank_account_id)
+
+    from_date = get_datetime(from_date)
+    to_date = get_datetime(to_date)
+
+    doc = frappe.get_doc({
+        "doctype": "Qonto Backfill",
+        "qonto_bank_account_id": qonto_bank_account_id,
+        "from_date": from_date,
+        "to_date": to_date,
+        "window_hours": window_hours,
+        "catch_up": int(catch_up),
+        "status": "Queued",
+        "windows": [
+            {"window_start": start, "window_end": end}
+            for start, end in split_windows(from_date, to_date, window_hours)
+        ],
+    })
+    doc.insert(ignore_permissions=True)
+    frappe.db.commit()
+
+    enqueue_backfill(doc.name)
+
+    log_sync(
+        "INFO",
+        f"{'Catch-up' if catch_up else 'Backfill'} {doc.name} queued for "
+        f"{qonto_bank_account_id}: {len(doc.windows)} windows",
+        {"backfill": doc.name, "from": str(from_date), "to": str(to_date)}
+    )
+    return doc.name
+
+
+def get_open_catch_up(qonto_bank_account_id: str, from_date):
+    """
+    Get the unfinished catch-up of an account that starts by a given date.
+
+    Args:
+        qonto_bank_account_id: Qonto bank account ID
+        from_date: Start of the gap to cover
+
+    Returns:
+        Row with name, status and to_date, or None
+    """
+    rows = frappe.get_all(
+        "Qonto Backfill",
+        filters={
+            "qonto_bank_account_id": qonto_bank_account_id,
+            "catch_up": 1,
+            "status": ("!=", "Completed"),
+            "from_date": ("<=", from_date),
+            "to_date": (">=", from_date),
+        },
+        fields=["name", "status", "to_date"],
+        order_by="to_date desc",
+        limit=1
+    )
+    return rows[0] if rows else None
+
+
+def enqueue_backfill(backfill: str) -> int:
+    """
+    Enqueue every pending or failed window of a backfill.
+
+    Windows run as separate jobs, so they are fetched and ingested in
+    parallel by as many workers as the queue has. Catch-up windows are
+    enqueued newest first, so the most recent part of the gap fills first.
+
+    Args:
+        backfill: Name of the Qonto Backfill
+
+    Returns:
+        Number of windows enqueued
+    """
+    windows = frappe.get_all(
+        "Qonto Backfill Window",
+        filters={
+            "parent": backfill,
+            "parenttype": "Qonto Backfill",
+            "status": ("in", ["Pending", "Failed"]),
+        },
+        pluck="name",
+        order_by="idx desc" if frappe.db.get_value("Qonto Backfill", backfill, "catch_up") else "idx asc"
+    )
+
+    for window in windows:
+        frappe.enqueue(
+            "qonto_connector.qonto.backfill.run_backfill_window",
+            queue=BACKFILL_QUEUE,
+            timeout=BACKFILL_WINDOW_TIMEOUT,
+            job_id=f"qonto_backfill_{window}",
+            deduplicate=True,
+            backfill=backfill,
+            window=window
+        )
+
+    return len(windows)
+
+
+def run_backfill_window(backfill: str, window: str):
+    """
+    Fetch and ingest one window, checkpointing after every page.
+
+    Does not take the incremental sync lock: incremental syncs keep running
+    while backfill windows are processed.
+
+    Args:
+        backfill: Name of the Qonto Backfill
+        window: Name of the Qonto Backfill Window row
+    """
+    row = frappe.db.get_value(
+        "Qonto Backfill Window",
+        window,
+        ["window_start", "window_end", "status", "last_page", "items_processed"],
+        as_dict=True
+    )
+    if not row or row.status == "Completed":
+        return
+
+    parent = frappe.db.get_value(
+        "Qonto Backfill", backfill, ["qonto_bank_account_id", "status"], as_dict=True
+    )
+    settings = frappe.get_single("Qonto Settings")
+    mapping = get_account_mapping(settings, parent.qonto_bank_account_id)
+
+    _set_window(window, status="Running", error=None)
+    if parent.status == "Queued":
+        frappe.db.set_value(
+            "Qonto Backfill",
+            backfill,
+            {"status": "Running", "started_at": now_datetime()},
+            update_modified=False
+        )
+    frappe.db.commit()
+
+    client = QontoClient(settings)
+    items = row.items_processed or 0
+    staged = is_staging_enabled()
+
+    try:
+        with span(
+            "backfill_window",
+            export=bool(settings.get("enable_tracing")),
+            backfill=backfill,
+            window=window,
+            account_id=mapping.qonto_bank_account_id
+        ):
+            for page, transactions in client.iter_pages(
+                mapping.qonto_bank_account_id,
+                updated_at_from=get_datetime(row.window_start).isoformat(),
+                updated_at_to=get_datetime(row.window_end).isoformat(),
+                # Same statuses as the incremental sync, so a catch-up misses none
+                status=get_ingested_statuses(),
+                start_page=(row.last_page or 0) + 1
+            ):
+                if staged:
+                    items += stage_transactions(mapping.qonto_bank_account_id, transactions)
+                else:
+                    for tx_data in transactions:
+                        if ingest_transaction(mapping, tx_data):
+                            items += 1
+
+                # Checkpoint: the page's rows and its page number commit together
+                _set_window(window, last_page=page, items_processed=items)
+                timed_commit()
+
+        _set_window(window, status="Completed")
+        if staged and items:
+            enqueue_materializer()
+
+    except Exception as e:
+        frappe.db.rollback()
+        _set_window(window, status="Failed", error=str(e)[:1000])
+        frappe.log_error(f"Backfill window {window} of {backfill} failed: {str(e)}", "Qonto Backfill")
+
+    finally:
+        client.close()
+        frappe.db.commit()
+        update_backfill_progress(backfill)
+
+
+def update_backfill_progress(backfill: str) -> Dict[str, Any]:
+    """
+    Recompute the status and progress of a backfill from its windows.
+
+    Args:
+        backfill: Name of the Qonto Backfill
+
+    Returns:
+        Updated status values
+    """
+    windows = frappe.get_all(
+        "Qonto Backfill Window",
+        filters={"parent": backfill, "parenttype": "Qonto Backfill"},
+        fields=["status", "items_processed"]
+    )
+
+    total = len(windows)
+    completed = sum(1 for w in windows if w.status == "Completed")
+    failed = sum(1 for w in windows if w.status == "Failed")
+    active = total - completed - failed
+
+    if total and completed == total:
+        status = "Completed"
+    elif failed and not active:
+        status = "Failed"
+    else:
+        status = "Running"
+
+    values = {
+        "status": status,
+        "progress": round(completed * 100 / total, 2) if total else 100,
+        "items_processed": sum(w.items_processed or 0 for w in windows),
+    }
+    if status in ("Completed", "Failed"):
+        values["finished_at"] = now_datetime()
+
+    frappe.db.set_value("Qonto Backfill", backfill, values, update_modified=False)
+    frappe.db.commit()
+    return values
+
+
+def get_backfill_status(backfill: str) -> Dict[str, Any]:
+    """
+    Get progress of a backfill and of each of its windows.
+
+    Args:
+        backfill: Name of the Qonto Backfill
+
+    Returns:
+        Backfill status with its windows
+    """
+    doc = frappe.get_doc("Qonto Backfill", backfill)
+
+    return {
+        "name": doc.name,
+        "qonto_bank_account_id": doc.qonto_bank_account_id,
+        "status": doc.status,
+        "progress": doc.progress,
+        "items_processed": doc.items_processed,
+        "started_at": doc.started_at,
+        "finished_at": doc.finished_at,
+        "windows": [
+            {
+                "name": w.name,
+                "window_start": w.window_start,
+                "window_end": w.window_end,
+                "status": w.status,
+                "last_page": w.last_page,
+                "items_processed": w.items_processed,
+                "error": w.error,
+            }
+            for w in doc.windows
+        ],
+    }
+
+
+def _set_window(window: str, **values):
+    frappe.db.set_value("Qonto Backfill Window", window, values, update_modified=False)
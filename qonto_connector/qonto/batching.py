@@ -0,0 +1,126 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Adaptive commit batching for ingestion."""
+
+from typing import Optional
+
+import frappe
+
+from .constants import (
+    COMMIT_BATCH_INITIAL,
+    COMMIT_BATCH_MAX,
+    COMMIT_BATCH_MIN,
+    COMMIT_BATCH_STEP,
+    COMMIT_TARGET_MS,
+)
+from .metrics import get_current_metrics
+
+
+def get_row_lock_time() -> Optional[int]:
+    """
+    Get the cumulative time spent waiting for InnoDB row locks.
+
+    The counter is server wide, so its delta over a batch measures the
+    contention the batch ran under rather than its own waits only.
+
+    Returns:
+        Milliseconds, or None when the database does not expose it
+    """
+    if frappe.db.db_type != "mariadb":
+        return None
+
+    result = frappe.db.sql("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_time'")
+    return int(result[0][1]) if result else None
+
+
+class AdaptiveCommitBatcher:
+    """
+    Decide when to commit, growing the batch while commits stay fast.
+
+    Additive increase, multiplicative decrease: the batch grows by a fixed
+    step while commits finish well under the target latency, and is halved
+    when a commit is slow, rows waited on locks for longer than the target,
+    or a row hit a lock wait timeout.
+    """
+
+    def __init__(
+        self,
+        initial: int = COMMIT_BATCH_INITIAL,
+        minimum: int = COMMIT_BATCH_MIN,
+        maximum: int = COMMIT_BATCH_MAX,
+        target_ms: float = COMMIT_TARGET_MS
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            initial: Rows per commit to start with
+            minimum: Smallest batch size
+            maximum: Largest batch size
+            target_ms: Commit latency and lock wait budget per batch
+        """
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_ms = target_ms
+        self.pending = 0
+        self.lock_timeouts = 0
+        self._lock_time_start = get_row_lock_time()
+
+    def add(self) -> bool:
+        """
+        Count one row written in the open transaction.
+
+        Returns:
+            True when the batch is full and should be committed
+        """
+        self.pending += 1
+        return self.pending >= self.size
+
+    def record_lock_timeout(self):
+        """Record a row rolled back after a lock wait timeout."""
+        self.lock_timeouts += 1
+        get_current_metrics().incr("lock_wait_timeouts")
+
+    def commit(self) -> int:
+        """
+        Commit the open transaction and resize the next batch.
+
+        Returns:
+            Number of rows committed
+        """
+        from .sync import timed_commit
+
+        rows = self.pending
+        commit_ms = timed_commit()
+
+        lock_time = get_row_lock_time()
+        lock_wait_ms = 0
+        if lock_time is not None and self._lock_time_start is not None:
+            lock_wait_ms = lock_time - self._lock_time_start
+        self._lock_time_start = lock_time
+
+        if rows:
+            self.adapt(commit_ms, lock_wait_ms)
+
+        self.pending = 0
+        self.lock_timeouts = 0
+        return rows
+
+    def adapt(self, commit_ms: float, lock_wait_ms: float):
+        """
+        Resize the batch from the measurements of the last one.
+
+        Args:
+            commit_ms: Latency of the last commit
+            lock_wait_ms: Row lock wait time during the last batch
+        """
+        if (
+            self.lock_timeouts
+            or commit_ms > self.target_ms
+            or lock_wait_ms > self.target_ms
+        ):
+            self.size = max(self.minimum, self.size // 2)
+        elif commit_ms < self.target_ms / 2:
+            self.size = min(self.maximum, self.size + COMMIT_BATCH_STEP)
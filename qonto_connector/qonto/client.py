@@ -4,7 +4,8 @@
 """Qonto API Client with retry logic and error handling."""
 
 import time
-from typing import Dict, Any, Optional, Iterator, List
+from collections.abc import Mapping
+from typing import Dict, Any, Optional, Iterator, List, Tuple
 from urllib.parse import urljoin
 import requests
 from requests.adapters import HTTPAdapter
@@ -12,6 +13,9 @@ from urllib3.util.retry import Retry
 import frappe
 
 from .exceptions import QontoAPIError, QontoAuthError, QontoRateLimitError
+from .metrics import get_current_metrics
+from .tracing import span, start_span, with_correlation
+from .transport import get_transport
 from .constants import (
     QONTO_PRODUCTION_URL,
     QONTO_SANDBOX_URL,
@@ -25,16 +29,20 @@ from .constants import (
 class QontoClient:
     """Thread-safe Qonto API client with automatic retry and rate limiting."""
 
-    def __init__(self, settings):
+    def __init__(self, settings, base_url: Optional[str] = None, transport=None):
         """
         Initialize Qonto API client.
 
         Args:
             settings: QontoSettings document
+            base_url: Override the API base URL (e.g. a local fake server)
+            transport: Transport sending the requests, defaults to the one
+                configured in site_config (passthrough, record or replay)
         """
         self.settings = settings
-        self.base_url = self._get_base_url()
+        self.base_url = base_url or self._get_base_url()
         self.session = self._create_session()
+        self.transport = transport or get_transport(self.session)
 
     def _get_base_url(self) -> str:
         """Get API base URL based on environment."""
@@ -87,9 +95,24 @@ class QontoClient:
             QontoAPIError: For other API errors
         """
         url = urljoin(self.base_url, endpoint)
+        metrics = get_current_metrics()
+        metrics.incr("http_requests")
+        http_span = start_span(
+            "http",
+            method=method,
+            endpoint=endpoint,
+            page=(kwargs.get("params") or {}).get("page")
+        )
 
         try:
-            response = self.session.request(method, url, **kwargs)
+            with metrics.phase("http"):
+                response = self.transport.send(method, url, **kwargs)
+
+            http_span.set(
+                http_status=response.status_code,
+                retries=_retry_count(response),
+                qonto_request_id=_request_id(response)
+            )
 
             if response.status_code == 401:
                 raise QontoAuthError("Invalid API credentials")
@@ -104,9 +127,25 @@ class QontoClient:
             return response.json()
 
         except requests.exceptions.RequestException as e:
-            frappe.log_error(f"Qonto API Error: {str(e)}", "Qonto API")
+            metrics.incr("http_errors")
+            http_span.finish(error=e)
+            frappe.log_error(
+                f"Qonto API Error: {str(e)} [correlation_id={http_span.correlation_id}]",
+                "Qonto API"
+            )
             raise QontoAPIError(f"API request failed: {str(e)}") from e
 
+        except Exception as e:
+            http_span.finish(error=e)
+            raise
+
+        finally:
+            http_span.finish()
+
+    def close(self):
+        """Release the transport (flushes and closes a recording cassette)."""
+        self.transport.close()
+
     def test_connection(self) -> Dict[str, Any]:
         """
         Test API connection and get organization info.
@@ -136,12 +175,41 @@ class QontoClient:
         org = self.get_organization()
         return org.get("bank_accounts", [])
 
+    def get_transaction(self, transaction_id: str) -> Dict[str, Any]:
+        """
+        Get a single transaction.
+
+        Args:
+            transaction_id: Qonto transaction ID
+
+        Returns:
+            Normalized transaction dictionary
+        """
+        data = self._request("GET", f"{ENDPOINTS['transactions']}/{transaction_id}")
+        return self._normalize_transaction(data.get("transaction", data))
+
+    def get_attachment(self, attachment_id: str) -> Dict[str, Any]:
+        """
+        Get attachment metadata, with a temporary download URL.
+
+        Args:
+            attachment_id: Qonto attachment ID
+
+        Returns:
+            Attachment dictionary with file_name, file_size and url
+        """
+        data = self._request("GET", f"{ENDPOINTS['attachments']}/{attachment_id}")
+        return data.get("attachment", data)
+
     def iter_transactions(
         self,
         bank_account_id: str,
         updated_at_from: Optional[str] = None,
         status: Optional[List[str]] = None,
-        page_size: int = DEFAULT_PAGE_SIZE
+        page_size: int = DEFAULT_PAGE_SIZE,
+        updated_at_to: Optional[str] = None,
+        emitted_at_from: Optional[str] = None,
+        emitted_at_to: Optional[str] = None
     ) -> Iterator[Dict[str, Any]]:
         """
         Iterate through transactions with automatic pagination.
@@ -151,32 +219,91 @@ class QontoClient:
             updated_at_from: ISO datetime to fetch transactions updated after
             status: List of transaction statuses to filter
             page_size: Number of transactions per page
+            updated_at_to: ISO datetime to fetch transactions updated before
+            emitted_at_from: ISO datetime to fetch transactions emitted after
+            emitted_at_to: ISO datetime to fetch transactions emitted before
 
         Yields:
             Normalized transaction dictionaries
         """
+        for _, transactions in self.iter_pages(
+            bank_account_id,
+            updated_at_from=updated_at_from,
+            updated_at_to=updated_at_to,
+            status=status,
+            page_size=page_size,
+            emitted_at_from=emitted_at_from,
+            emitted_at_to=emitted_at_to
+        ):
+            yield from transactions
+
+    def iter_pages(
+        self,
+        bank_account_id: str,
+        updated_at_from: Optional[str] = None,
+        updated_at_to: Optional[str] = None,
+        status: Optional[List[str]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        start_page: int = 1,
+        emitted_at_from: Optional[str] = None,
+        emitted_at_to: Optional[str] = None
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Iterate through transaction pages, for callers that checkpoint per page.
+
+        Args:
+            bank_account_id: Qonto bank account ID
+            updated_at_from: ISO datetime to fetch transactions updated after
+            updated_at_to: ISO datetime to fetch transactions updated before
+            status: List of transaction statuses to filter
+            page_size: Number of transactions per page
+            start_page: Page to start from, to resume after a checkpoint
+            emitted_at_from: ISO datetime to fetch transactions emitted after
+            emitted_at_to: ISO datetime to fetch transactions emitted before
+
+        Yields:
+            Tuples of (page number, normalized transactions of the page)
+        """
         params = {
             "bank_account_id": bank_account_id,
             "per_page": page_size,
-            "page": 1
+            "page": start_page
         }
 
         if updated_at_from:
             params["updated_at_from"] = updated_at_from
 
+        if updated_at_to:
+            params["updated_at_to"] = updated_at_to
+
+        if emitted_at_from:
+            params["emitted_at_from"] = emitted_at_from
+
+        if emitted_at_to:
+            params["emitted_at_to"] = emitted_at_to
+
         if status:
             params["status[]"] = status
 
         while True:
             try:
-                data = self._request("GET", ENDPOINTS["transactions"], params=params)
-                transactions = data.get("transactions", [])
+                with span("page", account_id=bank_account_id, page=params["page"]) as page_span:
+                    data = self._request("GET", ENDPOINTS["transactions"], params=params)
+                    transactions = data.get("transactions", [])
+
+                    metrics = get_current_metrics()
+                    metrics.incr("pages")
+                    normalized = []
+                    for transaction in transactions:
+                        with metrics.phase("normalize"):
+                            normalized.append(self._normalize_transaction(transaction))
+
+                    page_span.set(transactions=len(normalized))
 
-                if not transactions:
+                if not normalized:
                     break
 
-                for transaction in transactions:
-                    yield self._normalize_transaction(transaction)
+                yield params["page"], normalized
 
                 # Check for next page
                 meta = data.get("meta", {})
@@ -186,7 +313,8 @@ class QontoClient:
                 params["page"] += 1
 
             except QontoRateLimitError as e:
-                frappe.log_error(f"Rate limit hit: {str(e)}", "Qonto Sync")
+                get_current_metrics().incr("rate_limited")
+                frappe.log_error(with_correlation(f"Rate limit hit: {str(e)}"), "Qonto Sync")
                 time.sleep(e.retry_after)
                 continue
 
@@ -200,35 +328,60 @@ class QontoClient:
         Returns:
             Normalized transaction dictionary
         """
-        # Determine posting date
-        posting_date = tx.get("settled_at") or tx.get("emitted_at")
-
-        # Calculate signed amount
-        amount = float(tx.get("amount", 0))
-        if tx.get("side") == "debit":
-            amount = -amount
-
-        # Build description
-        parts = []
-        if tx.get("label"):
-            parts.append(tx["label"])
-        if tx.get("reference"):
-            parts.append(tx["reference"])
-        if tx.get("counterparty_name"):
-            parts.append(tx["counterparty_name"])
-
-        description = " — ".join(parts) or "Qonto Transaction"
-
-        return {
-            "qonto_id": tx["transaction_id"],
-            "posting_date": posting_date,
-            "amount": amount,
-            "currency": tx.get("currency", "EUR"),
-            "description": description,
-            "status": tx.get("status"),
-            "side": tx.get("side"),
-            "operation_type": tx.get("operation_type"),
-            "attachment_ids": tx.get("attachment_ids", []),
-            "raw_data": tx  # Keep original for reference
-        }
-
+        return normalize_transaction(tx)
+
+
+def normalize_transaction(tx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize transaction data for ERPNext.
+
+    Args:
+        tx: Raw transaction data from Qonto API
+
+    Returns:
+        Normalized transaction dictionary
+    """
+    # Determine posting date
+    posting_date = tx.get("settled_at") or tx.get("emitted_at")
+
+    # Calculate signed amount
+    amount = float(tx.get("amount", 0))
+    if tx.get("side") == "debit":
+        amount = -amount
+
+    # Build description
+    parts = []
+    if tx.get("label"):
+        parts.append(tx["label"])
+    if tx.get("reference"):
+        parts.append(tx["reference"])
+    if tx.get("counterparty_name"):
+        parts.append(tx["counterparty_name"])
+
+    description = " — ".join(parts) or "Qonto Transaction"
+
+    return {
+        "qonto_id": tx["transaction_id"],
+        "posting_date": posting_date,
+        "amount": amount,
+        "currency": tx.get("currency", "EUR"),
+        "description": description,
+        "status": tx.get("status"),
+        "side": tx.get("side"),
+        "operation_type": tx.get("operation_type"),
+        "attachment_ids": tx.get("attachment_ids", []),
+        "raw_data": tx  # Keep original for reference
+    }
+
+
+def _retry_count(response) -> int:
+    """Number of transparent retries urllib3 made for a response."""
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    history = getattr(retries, "history", None)
+    return len(history) if isinstance(history, tuple) else 0
+
+
+def _request_id(response) -> Optional[str]:
+    """Qonto request ID of a response, for support tickets and trace lookups."""
+    headers = response.headers if isinstance(response.headers, Mapping) else {}
+    return headers.get("X-Qonto-Request-Id") or headers.get("X-Request-Id")
@@ -12,6 +12,7 @@ QONTO_SANDBOX_URL = "https://thirdparty-sandbox.qonto.com/v2/"
 ENDPOINTS = {
     "organization": "organization",
     "transactions": "transactions",
+    "attachments": "attachments",
 }
 
 # Transaction Statuses
@@ -19,6 +20,15 @@ TRANSACTION_STATUS_PENDING = "pending"
 TRANSACTION_STATUS_SETTLED = "settled"
 TRANSACTION_STATUS_DECLINED = "declined"
 TRANSACTION_STATUS_CANCELED = "canceled"
+# Set locally on Bank Transactions Qonto no longer returns
+TRANSACTION_STATUS_ORPHANED = "orphaned"
+# Statuses of Bank Transactions that do not move the account balance
+UNCOUNTED_STATUSES = (
+    TRANSACTION_STATUS_PENDING,
+    TRANSACTION_STATUS_DECLINED,
+    TRANSACTION_STATUS_CANCELED,
+    TRANSACTION_STATUS_ORPHANED,
+)
 
 # Transaction Sides
 TRANSACTION_SIDE_DEBIT = "debit"
@@ -26,10 +36,94 @@ TRANSACTION_SIDE_CREDIT = "credit"
 
 # Sync Configuration
 DEFAULT_SYNC_INTERVAL_MINUTES = 15
+DEFAULT_MIN_POLL_INTERVAL_MINUTES = 5
+DEFAULT_MAX_POLL_INTERVAL_MINUTES = 240
+SCHEDULED_SYNC_JOB_ID = "qonto_sync_scheduled"
 DEFAULT_LOOKBACK_DAYS = 90
 DEFAULT_PAGE_SIZE = 100
 MAX_PAGE_SIZE = 100
 
+# Commit Batching
+COMMIT_BATCH_INITIAL = 50
+COMMIT_BATCH_MIN = 10
+COMMIT_BATCH_MAX = 500
+COMMIT_BATCH_STEP = 25
+COMMIT_TARGET_MS = 250
+TRANSACTION_SAVEPOINT = "qonto_transaction"
+
+# Staging
+STAGING_CHUNK_SIZE = 500
+MATERIALIZE_BATCH_SIZE = 500
+MATERIALIZE_QUEUE = "long"
+MATERIALIZE_TIMEOUT = 3600  # seconds
+MATERIALIZE_JOB_ID = "qonto_materialize"
+
+# Search
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 500
+
+# Re-normalization
+RENORMALIZE_CHUNK_SIZE = 2000
+RENORMALIZE_QUEUE = "long"
+RENORMALIZE_TIMEOUT = 1800  # seconds
+
+# Pending Transactions
+PENDING_REPOLL_LIMIT = 200
+CACHE_KEY_PENDING_REPOLL_CURSOR = "qonto_pending_repoll_cursor"
+
+# Verification
+VERIFY_QUEUE = "long"
+VERIFY_TIMEOUT = 3600  # seconds
+VERIFY_EMITTED_MARGIN_DAYS = 15  # Card payments settle days after emission
+VERIFY_REPORT_SAMPLE = 20
+
+# Auto-reconciliation Matching
+MATCH_BATCH_SIZE = 5000
+MATCH_PROPOSE_SCORE = 45
+MATCH_APPLY_SCORE = 80
+MATCH_DATE_WINDOW_DAYS = 10
+POST_SYNC_JOB_ID = "qonto_post_sync"
+POST_SYNC_QUEUE = "long"
+POST_SYNC_TIMEOUT = 1800  # seconds
+
+# Dead Letters
+DEAD_LETTER_BATCH_SIZE = 200
+DEAD_LETTER_MAX_ATTEMPTS = 10
+DEAD_LETTER_BACKOFF_MINUTES = 5
+DEAD_LETTER_MAX_BACKOFF_MINUTES = 24 * 60
+
+# Attachments
+ATTACHMENT_JOB_ID = "qonto_attachment_sync"
+ATTACHMENT_QUEUE = "long"
+ATTACHMENT_TIMEOUT = 3600  # seconds
+ATTACHMENT_BATCH_SIZE = 100
+ATTACHMENT_DISCOVER_LIMIT = 1000
+ATTACHMENT_MAX_ATTEMPTS = 5
+ATTACHMENT_CONCURRENCY = 4
+ATTACHMENT_REQUESTS_PER_SECOND = 2.0  # Metadata calls, apart from the sync
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024  # bytes
+ATTACHMENT_DOWNLOAD_TIMEOUT = 60  # seconds
+CACHE_KEY_ATTACHMENT_CURSOR = "qonto_attachment_cursor"
+
+# Internal Transfers
+TRANSFER_DATE_WINDOW_DAYS = 3
+TRANSFER_LOOKBACK_DAYS = 30
+
+# Backfill
+BACKFILL_DEFAULT_WINDOW_HOURS = 168  # 7 days
+BACKFILL_QUEUE = "long"
+BACKFILL_WINDOW_TIMEOUT = 3600  # seconds
+DEFAULT_RECENT_FIRST_HOURS = 24
+
+# Webhooks
+WEBHOOK_SIGNATURE_HEADER = "X-Qonto-Signature"
+WEBHOOK_TOLERANCE_SECONDS = 300
+WEBHOOK_BATCH_SIZE = 200
+WEBHOOK_MAX_ATTEMPTS = 5
+WEBHOOK_RETENTION_DAYS = 7
+WEBHOOK_QUEUE = "short"
+WEBHOOK_SAFETY_POLL_MINUTES = 360
+
 # Rate Limiting
 DEFAULT_RETRY_AFTER = 60  # seconds
 MAX_RETRIES = 3
@@ -37,14 +131,54 @@ BACKOFF_FACTOR = 1
 
 # Cache Keys
 CACHE_KEY_SYNC_RUNNING = "qonto_sync_running"
+CACHE_KEY_PARTY_INDEX = "qonto_party_index"
+CACHE_KEY_PARTY_INDEX_BUILT = "qonto_party_index_built"
+CACHE_KEY_RULES_VERSION = "qonto_rules_version"
 CACHE_KEY_SETTINGS = "qonto_settings"
+CACHE_KEY_SYNC_METRICS = "qonto_sync_metrics"
+CACHE_KEY_SYNC_METRICS_TOTALS = "qonto_sync_metrics_totals"
 
 # Sync Lock Timeout (seconds)
 SYNC_LOCK_TIMEOUT = 900  # 15 minutes
 
+# Profiling
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_TOP_ALLOCATIONS = 25
+
+# Tracing
+TRACE_FILE_NAME = "qonto_traces.jsonl"
+TRACE_FLUSH_SIZE = 200
+TRACE_MAX_FILE_BYTES = 50 * 1024 * 1024  # Rotated beyond 50 MB
+
+# Transports
+TRANSPORT_PASSTHROUGH = "passthrough"
+TRANSPORT_RECORD = "record"
+TRANSPORT_REPLAY = "replay"
+CASSETTE_VERSION = 1
+DEFAULT_CASSETTE_NAME = "qonto_cassette.jsonl.gz"
+SCRUBBED_HEADERS = ("authorization", "set-cookie", "cookie")
+# Time window params differ between the recording and the replay run
+REPLAY_IGNORED_PARAMS = (
+    "updated_at_from",
+    "updated_at_to",
+    "settled_at_from",
+    "settled_at_to",
+    "emitted_at_from",
+    "emitted_at_to",
+)
+
 # Custom Field Names
 CUSTOM_FIELD_QONTO_ID = "qonto_id"
 CUSTOM_FIELD_QONTO_DATA = "qonto_data"
+CUSTOM_FIELD_QONTO_STATUS = "qonto_status"
+CUSTOM_FIELD_MATCH_STATUS = "qonto_match_status"
+CUSTOM_FIELD_MATCH_DOCTYPE = "qonto_match_doctype"
+CUSTOM_FIELD_MATCH_NAME = "qonto_match_name"
+CUSTOM_FIELD_MATCH_SCORE = "qonto_match_score"
+CUSTOM_FIELD_CATEGORY = "qonto_category"
+CUSTOM_FIELD_COST_CENTER = "qonto_cost_center"
+CUSTOM_FIELD_NOTE = "qonto_note"
+CUSTOM_FIELD_TRANSFER_PAIR = "qonto_transfer_pair"
 
 # Role Names
 ROLE_QONTO_MANAGER = "Qonto Manager"
@@ -0,0 +1,192 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Dead letters of failed transactions, replayed from their stored payload."""
+
+import json
+from datetime import timedelta
+from typing import Dict, Any, Optional
+
+import frappe
+from frappe.utils import now_datetime
+
+from .constants import (
+    DEAD_LETTER_BACKOFF_MINUTES,
+    DEAD_LETTER_BATCH_SIZE,
+    DEAD_LETTER_MAX_ATTEMPTS,
+    DEAD_LETTER_MAX_BACKOFF_MINUTES,
+)
+from .utils import log_sync
+
+DEAD_LETTER_DOCTYPE = "Qonto Dead Letter"
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Get the wait before the next replay of a dead letter.
+
+    Args:
+        attempts: Failures so far, at least 1
+
+    Returns:
+        Exponential backoff, capped at a day
+    """
+    minutes = DEAD_LETTER_BACKOFF_MINUTES * 2 ** max(attempts - 1, 0)
+    return timedelta(minutes=min(minutes, DEAD_LETTER_MAX_BACKOFF_MINUTES))
+
+
+def get_open_dead_letters() -> set:
+    """
+    Get the Qonto IDs of open dead letters, loaded once per request or job.
+
+    Returns:
+        Set of Qonto transaction IDs
+    """
+    if getattr(frappe.local, "qonto_dead_letters", None) is None:
+        frappe.local.qonto_dead_letters = set(frappe.get_all(
+            DEAD_LETTER_DOCTYPE, filters={"status": ("!=", "Resolved")}, pluck="qonto_id"
+        ))
+    return frappe.local.qonto_dead_letters
+
+
+def record_dead_letter(qonto_bank_account_id: str, tx_data: Dict[str, Any], error: Exception):
+    """
+    Persist a transaction that failed to upsert, or count another failure.
+
+    Written in the current transaction, so it is committed with the batch.
+
+    Args:
+        qonto_bank_account_id: Qonto account of the transaction
+        tx_data: Normalized transaction data
+        error: Exception raised by the upsert
+    """
+    qonto_id = tx_data.get("qonto_id")
+    if not qonto_id:
+        return
+
+    now = now_datetime()
+    values = {
+        "qonto_bank_account_id": qonto_bank_account_id,
+        "error_class": type(error).__name__,
+        "error": str(error)[:1000],
+        "payload": json.dumps(tx_data, indent=2, default=str),
+        "last_failed_at": now,
+    }
+
+    existing = frappe.db.get_value(DEAD_LETTER_DOCTYPE, qonto_id, ["status", "attempts"], as_dict=True)
+    attempts = 1 if not existing or existing.status == "Resolved" else (existing.attempts or 0) + 1
+
+    if attempts >= DEAD_LETTER_MAX_ATTEMPTS:
+        values.update(status="Abandoned", next_retry_at=None)
+    else:
+        values.update(status="Open", next_retry_at=now + retry_delay(attempts))
+    values.update(attempts=attempts, resolved_at=None)
+
+    if existing:
+        frappe.db.set_value(DEAD_LETTER_DOCTYPE, qonto_id, values, update_modified=False)
+    else:
+        frappe.get_doc({"doctype": DEAD_LETTER_DOCTYPE, "qonto_id": qonto_id, **values}).insert(
+            ignore_permissions=True
+        )
+
+    get_open_dead_letters().add(qonto_id)
+
+
+def resolve_dead_letter(qonto_id: Optional[str]) -> bool:
+    """
+    Resolve the dead letter of a transaction that was upserted.
+
+    Only looks at the database for IDs with an open letter, so calling it
+    for every ingested row is cheap.
+
+    Args:
+        qonto_id: Qonto transaction ID
+
+    Returns:
+        True if a dead letter was resolved
+    """
+    open_letters = get_open_dead_letters()
+    if qonto_id not in open_letters:
+        return False
+
+    frappe.db.set_value(
+        DEAD_LETTER_DOCTYPE,
+        qonto_id,
+        {"status": "Resolved", "resolved_at": now_datetime(), "next_retry_at": None},
+        update_modified=False
+    )
+    open_letters.discard(qonto_id)
+    return True
+
+
+def replay_dead_letters(batch_size: int = DEAD_LETTER_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Upsert the due dead letters again from their stored payload.
+
+    Runs in batches until no letter is due. No API call is made; a letter
+    that fails again is pushed back with a longer backoff, and one that
+    succeeds is resolved by the ingestion itself.
+
+    Args:
+        batch_size: Letters fetched per query
+
+    Returns:
+        Dictionary with resolved, failed and skipped counts
+    """
+    from .batching import AdaptiveCommitBatcher
+    from .post_sync import enqueue_post_sync
+    from .sync import ingest_transaction
+
+    result = {"resolved": 0, "failed": 0, "skipped": 0}
+
+    settings = frappe.get_single("Qonto Settings")
+    mappings = {m.qonto_bank_account_id: m for m in settings.account_mappings if m.active}
+    batcher = AdaptiveCommitBatcher()
+    seen = set()
+
+    try:
+        while True:
+            letters = frappe.get_all(
+                DEAD_LETTER_DOCTYPE,
+                filters={
+                    "status": "Open",
+                    "next_retry_at": ("<=", now_datetime()),
+                    "name": ("not in", list(seen) or [""]),
+                },
+                fields=["name", "qonto_bank_account_id", "payload"],
+                order_by="next_retry_at asc",
+                limit=batch_size
+            )
+            if not letters:
+                break
+
+            for letter in letters:
+                seen.add(letter.name)
+                mapping = mappings.get(letter.qonto_bank_account_id)
+                if not mapping:
+                    # Mapping disabled: kept until it is active again
+                    result["skipped"] += 1
+                    continue
+
+                if ingest_transaction(mapping, json.loads(letter.payload or "{}"), batcher):
+                    result["resolved"] += 1
+                else:
+                    result["failed"] += 1
+
+                if batcher.add():
+                    batcher.commit()
+    finally:
+        batcher.commit()
+
+    if result["resolved"]:
+        enqueue_post_sync()
+
+    if result["resolved"] or result["failed"]:
+        log_sync(
+            "INFO",
+            f"Dead letters replayed. {result['resolved']} resolved, {result['failed']} failed again.",
+            result,
+            items_processed=result["resolved"]
+        )
+
+    return result
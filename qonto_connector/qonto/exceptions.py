@@ -27,6 +27,11 @@ class QontoRateLimitError(QontoAPIError):
         self.retry_after = retry_after
 
 
+class QontoWebhookSignatureError(QontoError):
+    """Raised when a webhook call is not signed with the configured secret"""
+    pass
+
+
 class QontoSyncError(QontoError):
     """Raised when sync operation fails"""
     pass
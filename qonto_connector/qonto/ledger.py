@@ -0,0 +1,563 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Incrementally maintained totals of Qonto Bank Transactions."""
+
+import hashlib
+import json
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple
+
+import frappe
+from frappe.utils import cint, flt, get_datetime, getdate, now_datetime
+
+from .client import QontoClient
+from .constants import (
+    CUSTOM_FIELD_QONTO_DATA,
+    CUSTOM_FIELD_QONTO_ID,
+    CUSTOM_FIELD_QONTO_STATUS,
+    UNCOUNTED_STATUSES,
+)
+from .utils import log_sync
+
+BALANCE_DOCTYPE = "Qonto Account Balance"
+CASH_FLOW_DOCTYPE = "Qonto Cash Flow"
+CASH_FLOW_COLUMNS = ("inflow", "outflow", "inflow_count", "outflow_count")
+
+# Bump to rebuild the totals on the next migration
+LEDGER_VERSION = 3
+LEDGER_VERSION_KEY = "qonto_ledger_version"
+
+# Same rows as balance_contribution counts, for the rebuild queries
+_COUNTED_CONDITION = f"""docstatus < 2 and `{CUSTOM_FIELD_QONTO_ID}` is not null
+    and bank_account is not null
+    and (`{CUSTOM_FIELD_QONTO_STATUS}` is null or `{CUSTOM_FIELD_QONTO_STATUS}` not in %s)"""
+
+# (bank account, date, operation type)
+CashFlowKey = Tuple[str, date, str]
+# (inflow, outflow, inflow count, outflow count)
+CashFlowValues = Tuple[float, float, int, int]
+
+
+def balance_contribution(doc) -> Optional[Tuple[str, float]]:
+    """
+    Get what a Bank Transaction adds to the balance of its account.
+
+    Only Qonto transactions that are settled in Qonto count, like in the
+    Qonto balance: pending, declined, canceled or orphaned entries and
+    cancelled documents do not.
+
+    Args:
+        doc: Bank Transaction document, or its values
+
+    Returns:
+        Tuple of (bank account, amount), or None if it does not count
+    """
+    if not doc or not doc.get(CUSTOM_FIELD_QONTO_ID) or not doc.get("bank_account"):
+        return None
+    if (doc.get("docstatus") or 0) > 1:
+        return None
+    if doc.get(CUSTOM_FIELD_QONTO_STATUS) in UNCOUNTED_STATUSES:
+        return None
+
+    return doc.bank_account, flt(doc.get("deposit")) - flt(doc.get("withdrawal"))
+
+
+def balance_deltas(
+    before: Optional[Tuple[str, float]],
+    after: Optional[Tuple[str, float]]
+) -> Dict[str, float]:
+    """
+    Get the running total changes from one contribution to another.
+
+    Args:
+        before: Contribution before the change
+        after: Contribution after the change
+
+    Returns:
+        Non-zero amount to add per bank account
+    """
+    deltas: Dict[str, float] = {}
+    if before:
+        deltas[before[0]] = deltas.get(before[0], 0) - before[1]
+    if after:
+        deltas[after[0]] = deltas.get(after[0], 0) + after[1]
+    return {account: delta for account, delta in deltas.items() if flt(delta, 2)}
+
+
+def cash_flow_contribution(doc) -> Optional[Tuple[CashFlowKey, CashFlowValues]]:
+    """
+    Get what a Bank Transaction adds to the daily cash flow table.
+
+    The same transactions count as for the balance.
+
+    Args:
+        doc: Bank Transaction document, or its values
+
+    Returns:
+        Tuple of ((bank account, date, operation type), (inflow, outflow,
+        inflow count, outflow count)), or None if it does not count
+    """
+    if not balance_contribution(doc) or not doc.get("date"):
+        return None
+
+    deposit, withdrawal = flt(doc.get("deposit")), flt(doc.get("withdrawal"))
+    key = (doc.bank_account, getdate(doc.date), get_operation_type(doc))
+    return key, (deposit, withdrawal, 1 if deposit else 0, 1 if withdrawal else 0)
+
+
+def get_operation_type(doc) -> str:
+    """Qonto operation type from the stored payload, empty if unknown."""
+    try:
+        raw = json.loads(doc.get(CUSTOM_FIELD_QONTO_DATA) or "{}")
+    except ValueError:
+        return ""
+    return (raw.get("operation_type") or "")[:140]
+
+
+def cash_flow_deltas(before, after) -> Dict[CashFlowKey, CashFlowValues]:
+    """
+    Get the cash flow changes from one contribution to another.
+
+    Args:
+        before: Contribution before the change
+        after: Contribution after the change
+
+    Returns:
+        Values to add per (bank account, date, operation type), without
+        the keys that do not change
+    """
+    deltas: Dict[CashFlowKey, List[float]] = {}
+    for contribution, sign in ((before, -1), (after, 1)):
+        if contribution:
+            key, values = contribution
+            current = deltas.setdefault(key, [0, 0, 0, 0])
+            for i, value in enumerate(values):
+                current[i] += sign * value
+
+    return {
+        key: tuple(values) for key, values in deltas.items()
+        if any(flt(value, 2) for value in values)
+    }
+
+
+def on_bank_transaction_update(doc, method=None):
+    """Bank Transaction on_update hook: apply the change to the totals."""
+    _apply(doc.get_doc_before_save(), doc)
+
+
+def on_bank_transaction_cancel(doc, method=None):
+    """Bank Transaction on_cancel hook: remove it from the totals."""
+    _apply(doc.get_doc_before_save(), None)
+
+
+def on_bank_transaction_trash(doc, method=None):
+    """Bank Transaction on_trash hook: remove it from the totals."""
+    _apply(doc, None)
+
+
+def set_qonto_status(name: str, status: str):
+    """
+    Set the Qonto status of a Bank Transaction and apply it to the totals.
+
+    The status is written without saving the document, which skips the
+    on_update hook, so the change to the totals is applied here instead,
+    in the same transaction.
+
+    Args:
+        name: Bank Transaction name
+        status: New Qonto status
+    """
+    before = frappe.db.get_value(
+        "Bank Transaction",
+        name,
+        [
+            "name", "docstatus", "bank_account", "date", "deposit", "withdrawal",
+            CUSTOM_FIELD_QONTO_ID, CUSTOM_FIELD_QONTO_STATUS, CUSTOM_FIELD_QONTO_DATA,
+        ],
+        as_dict=True
+    )
+    if not before or before.get(CUSTOM_FIELD_QONTO_STATUS) == status:
+        return
+
+    frappe.db.set_value("Bank Transaction", name, CUSTOM_FIELD_QONTO_STATUS, status)
+    _apply(before, frappe._dict(before, **{CUSTOM_FIELD_QONTO_STATUS: status}))
+
+
+def _apply(before, after):
+    for bank_account, delta in balance_deltas(
+        balance_contribution(before), balance_contribution(after)
+    ).items():
+        increment_running_total(bank_account, delta)
+
+    for key, values in cash_flow_deltas(
+        cash_flow_contribution(before), cash_flow_contribution(after)
+    ).items():
+        increment_cash_flow(key, values)
+
+
+def increment_running_total(bank_account: str, delta: float):
+    """
+    Add an amount to the running total of an account in one atomic statement.
+
+    The increment runs in the transaction of the document change, so a
+    rolled back save rolls it back too, and concurrent workers never
+    overwrite each other's totals.
+
+    Args:
+        bank_account: ERPNext Bank Account name
+        delta: Amount to add
+    """
+    _upsert_increment(
+        BALANCE_DOCTYPE,
+        bank_account,
+        {"bank_account": bank_account, "status": "Unchecked"},
+        {"running_total": delta}
+    )
+
+
+def increment_cash_flow(key: CashFlowKey, values: CashFlowValues):
+    """
+    Add inflow, outflow and counts to a cash flow row in one atomic statement.
+
+    Args:
+        key: (bank account, date, operation type)
+        values: (inflow, outflow, inflow count, outflow count) to add
+    """
+    bank_account, day, operation_type = key
+    _upsert_increment(
+        CASH_FLOW_DOCTYPE,
+        cash_flow_name(*key),
+        {"bank_account": bank_account, "date": day, "operation_type": operation_type},
+        dict(zip(CASH_FLOW_COLUMNS, values))
+    )
+
+
+def cash_flow_name(bank_account: str, day, operation_type: str) -> str:
+    """Deterministic name of a cash flow row, so upserts can key on it."""
+    key = f"{bank_account}|{getdate(day)}|{operation_type}"
+    return hashlib.md5(key.encode("utf-8")).hexdigest()[:20]
+
+
+def _upsert_increment(
+    doctype: str,
+    name: str,
+    fields: Dict[str, Any],
+    increments: Dict[str, float]
+):
+    now = now_datetime()
+    user = frappe.session.user if getattr(frappe.local, "session", None) else "Administrator"
+    columns = (
+        ("name", "creation", "modified", "modified_by", "owner") + tuple(fields) + tuple(increments)
+    )
+    values = (name, now, now, user, user) + tuple(fields.values()) + tuple(increments.values())
+    placeholders = ", ".join(["%s"] * len(columns))
+
+    if frappe.db.db_type == "postgres":
+        table = f'"tab{doctype}"'
+        sql = f"""insert into {table} ({", ".join(f'"{c}"' for c in columns)})
+            values ({placeholders})
+            on conflict ("name") do update set {", ".join(
+                f'"{c}" = coalesce({table}."{c}", 0) + excluded."{c}"' for c in increments
+            )}"""
+    else:
+        sql = f"""insert into `tab{doctype}` ({", ".join(f"`{c}`" for c in columns)})
+            values ({placeholders})
+            on duplicate key update {", ".join(
+                f"`{c}` = ifnull(`{c}`, 0) + values(`{c}`)" for c in increments
+            )}"""
+
+    frappe.db.sql(sql, values)
+
+
+def rebuild_running_totals():
+    """
+    Recompute running totals from the Bank Transactions in one grouped query.
+
+    Used once when the totals are introduced and to repair them; the
+    regular updates are incremental.
+    """
+    rows = frappe.db.sql(
+        f"""select bank_account, sum(deposit) - sum(withdrawal)
+        from `tabBank Transaction`
+        where {_COUNTED_CONDITION}
+        group by bank_account""",
+        (UNCOUNTED_STATUSES,)
+    )
+    totals = {bank_account: flt(total) for bank_account, total in rows}
+
+    for bank_account in frappe.get_all(BALANCE_DOCTYPE, pluck="name"):
+        frappe.db.set_value(
+            BALANCE_DOCTYPE,
+            bank_account,
+            "running_total",
+            totals.pop(bank_account, 0),
+            update_modified=False
+        )
+    for bank_account, total in totals.items():
+        increment_running_total(bank_account, total)
+
+
+def rebuild_cash_flow():
+    """Recompute the daily cash flow table from the Bank Transactions in one grouped query."""
+    if frappe.db.db_type == "postgres":
+        operation_type = f"coalesce(`{CUSTOM_FIELD_QONTO_DATA}`::json ->> 'operation_type', '')"
+    else:
+        operation_type = (
+            f"coalesce(json_unquote(json_extract(`{CUSTOM_FIELD_QONTO_DATA}`, '$.operation_type')), '')"
+        )
+
+    rows = frappe.db.sql(
+        f"""select bank_account, date, {operation_type},
+            sum(deposit), sum(withdrawal),
+            sum(case when deposit != 0 then 1 else 0 end),
+            sum(case when withdrawal != 0 then 1 else 0 end)
+        from `tabBank Transaction`
+        where {_COUNTED_CONDITION} and date is not null
+        group by bank_account, date, {operation_type}""",
+        (UNCOUNTED_STATUSES,)
+    )
+
+    frappe.db.delete(CASH_FLOW_DOCTYPE)
+    for bank_account, day, operation_type, inflow, outflow, inflow_count, outflow_count in rows:
+        increment_cash_flow(
+            (bank_account, getdate(day), (operation_type or "")[:140]),
+            (flt(inflow), flt(outflow), cint(inflow_count), cint(outflow_count))
+        )
+
+
+def ensure_ledger():
+    """
+    Build the running totals and cash flow table from scratch once per
+    LEDGER_VERSION, covering transactions synced before they existed.
+    Called after migration.
+    """
+    frappe.db.add_index(CASH_FLOW_DOCTYPE, ["bank_account", "date"], "qonto_cash_flow_account_date")
+    frappe.db.add_index(CASH_FLOW_DOCTYPE, ["date"], "qonto_cash_flow_date")
+
+    if cint(frappe.db.get_default(LEDGER_VERSION_KEY)) >= LEDGER_VERSION:
+        return
+
+    rebuild_running_totals()
+    rebuild_cash_flow()
+    # Opening balances were taken against the old totals
+    reset_opening_balance()
+    frappe.db.set_default(LEDGER_VERSION_KEY, LEDGER_VERSION)
+    frappe.db.commit()
+
+
+def baseline_ready(mapping) -> bool:
+    """
+    Whether an account is synced enough to take its opening balance.
+
+    Args:
+        mapping: QontoAccountMapping row
+
+    Returns:
+        True once the account has synced and has no unfinished backfill
+    """
+    return bool(mapping.last_synced_at) and not frappe.db.exists(
+        "Qonto Backfill",
+        {"qonto_bank_account_id": mapping.qonto_bank_account_id, "status": ("!=", "Completed")}
+    )
+
+
+def balance_status(difference: float, previous, synced_since: bool) -> str:
+    """
+    Get the status of a balance check.
+
+    Transactions arriving between two polls make the balances differ for
+    a while, so a difference is only a Mismatch once it is still the same
+    after a completed sync.
+
+    Args:
+        difference: Qonto balance minus the ERPNext balance
+        previous: Status and difference of the previous check
+        synced_since: Whether the account completed a sync since then
+
+    Returns:
+        "Matched", "Unconfirmed" or "Mismatch"
+    """
+    if not difference:
+        return "Matched"
+
+    same = (
+        previous.status in ("Unconfirmed", "Mismatch")
+        and flt(previous.difference, 2) == difference
+    )
+    if same and (previous.status == "Mismatch" or synced_since):
+        return "Mismatch"
+    return "Unconfirmed"
+
+
+def check_balances():
+    """
+    Compare the Qonto balance of each mapped account with ERPNext.
+
+    One organization call gives every balance; the ERPNext side is the
+    running total, so no transaction is summed. The first check after the
+    account is fully synced sets its opening balance.
+    """
+    settings = frappe.get_single("Qonto Settings")
+    if not settings.connected:
+        return
+
+    client = QontoClient(settings)
+    try:
+        accounts = client.list_accounts()
+    finally:
+        client.close()
+
+    balances = {}
+    for account in accounts:
+        cents = account.get("balance_cents")
+        balance = flt(cents) / 100 if cents is not None else flt(account.get("balance"))
+        for key in ("slug", "id"):
+            if account.get(key):
+                balances[account[key]] = balance
+
+    mismatches = []
+    for mapping in settings.account_mappings:
+        if not mapping.active or mapping.qonto_bank_account_id not in balances:
+            continue
+
+        if not frappe.db.exists(BALANCE_DOCTYPE, mapping.erpnext_bank_account):
+            increment_running_total(mapping.erpnext_bank_account, 0)
+
+        row = frappe.db.get_value(
+            BALANCE_DOCTYPE,
+            mapping.erpnext_bank_account,
+            ["running_total", "opening_balance", "status", "difference", "checked_at"],
+            as_dict=True
+        )
+        qonto_balance = balances[mapping.qonto_bank_account_id]
+        values = {
+            "qonto_bank_account_id": mapping.qonto_bank_account_id,
+            "qonto_balance": qonto_balance,
+            "checked_at": now_datetime(),
+        }
+
+        opening = row.opening_balance
+        if opening is None:
+            if not baseline_ready(mapping):
+                # Taken now, the opening balance would hide what is still to sync
+                values.update(status="Unchecked", difference=None)
+                frappe.db.set_value(BALANCE_DOCTYPE, mapping.erpnext_bank_account, values)
+                continue
+            opening = flt(qonto_balance - flt(row.running_total), 2)
+
+        difference = flt(qonto_balance - opening - flt(row.running_total), 2)
+        synced_since = bool(
+            mapping.last_synced_at and row.checked_at
+            and get_datetime(mapping.last_synced_at) > get_datetime(row.checked_at)
+        )
+        status = balance_status(difference, row, synced_since)
+        if status == "Mismatch":
+            mismatches.append(mapping.qonto_bank_account_id)
+
+        # running_total is left out: only the atomic increments write it
+        values.update(opening_balance=opening, difference=difference, status=status)
+        frappe.db.set_value(BALANCE_DOCTYPE, mapping.erpnext_bank_account, values)
+
+    frappe.db.commit()
+
+    if mismatches:
+        log_sync(
+            "WARN",
+            f"Balance mismatch on {len(mismatches)} accounts",
+            {"accounts": mismatches}
+        )
+
+
+def reset_opening_balance(bank_account: Optional[str] = None):
+    """
+    Clear opening balances so the next check takes them again.
+
+    Args:
+        bank_account: ERPNext Bank Account, all accounts by default
+    """
+    filters = {"name": bank_account} if bank_account else {}
+    for name in frappe.get_all(BALANCE_DOCTYPE, filters=filters, pluck="name"):
+        frappe.db.set_value(BALANCE_DOCTYPE, name, {
+            "opening_balance": None,
+            "difference": None,
+            "status": "Unchecked",
+        })
+
+
+def get_balance_mismatches():
+    """Accounts whose last balance check did not match."""
+    return frappe.get_all(
+        BALANCE_DOCTYPE,
+        filters={"status": "Mismatch"},
+        fields=["bank_account", "qonto_bank_account_id", "qonto_balance", "difference", "checked_at"],
+        order_by="bank_account asc"
+    )
+
+
+def get_cash_flow(
+    bank_account: Optional[str] = None,
+    from_date=None,
+    to_date=None,
+    operation_type: Optional[str] = None,
+    group_by: str = "day"
+) -> List[Dict[str, Any]]:
+    """
+    Read inflow and outflow totals from the daily cash flow table.
+
+    Only the aggregate table is read, never the Bank Transactions, so the
+    cost depends on the number of days reported, not on the history kept.
+
+    Args:
+        bank_account: ERPNext Bank Account, all accounts by default
+        from_date: First date, inclusive
+        to_date: Last date, inclusive
+        operation_type: Qonto operation type, e.g. card or transfer
+        group_by: "day" or "month"; totals are also split by account and
+            operation type
+
+    Returns:
+        Rows with period, bank_account, operation_type, inflow, outflow,
+        net, inflow_count and outflow_count
+    """
+    conditions, values = ["1 = 1"], {}
+    if bank_account:
+        conditions.append("bank_account = %(bank_account)s")
+        values["bank_account"] = bank_account
+    if from_date:
+        conditions.append("date >= %(from_date)s")
+        values["from_date"] = getdate(from_date)
+    if to_date:
+        conditions.append("date <= %(to_date)s")
+        values["to_date"] = getdate(to_date)
+    if operation_type:
+        conditions.append("operation_type = %(operation_type)s")
+        values["operation_type"] = operation_type
+
+    if group_by == "month":
+        if frappe.db.db_type == "postgres":
+            period = "cast(date_trunc('month', date) as date)"
+        else:
+            period = "date_sub(date, interval dayofmonth(date) - 1 day)"
+    else:
+        period = "date"
+
+    rows = frappe.db.sql(
+        f"""select {period} as period, bank_account, operation_type,
+            sum(inflow) as inflow, sum(outflow) as outflow,
+            sum(inflow_count) as inflow_count, sum(outflow_count) as outflow_count
+        from `tab{CASH_FLOW_DOCTYPE}`
+        where {" and ".join(conditions)}
+        group by {period}, bank_account, operation_type
+        order by period, bank_account, operation_type""",
+        values,
+        as_dict=True
+    )
+
+    for row in rows:
+        row["inflow"], row["outflow"] = flt(row["inflow"]), flt(row["outflow"])
+        row["inflow_count"] = cint(row["inflow_count"])
+        row["outflow_count"] = cint(row["outflow_count"])
+        row["net"] = row["inflow"] - row["outflow"]
+
+    return rows
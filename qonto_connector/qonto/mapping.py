@@ -8,7 +8,9 @@ import frappe
 from frappe.utils import flt
 from typing import Dict, Any
 
-from .constants import CUSTOM_FIELD_QONTO_ID, CUSTOM_FIELD_QONTO_DATA
+from .constants import CUSTOM_FIELD_QONTO_ID, CUSTOM_FIELD_QONTO_DATA, CUSTOM_FIELD_QONTO_STATUS
+from .parties import resolve_party
+from .rules import apply_rules
 
 
 def upsert_bank_transaction(mapping, tx_data: Dict[str, Any]):
@@ -53,8 +55,18 @@ def upsert_bank_transaction(mapping, tx_data: Dict[str, Any]):
         "currency": bank_account.account_currency or tx_data["currency"],
     })
 
+    if not doc.get("party"):
+        # One lookup in the cached index, never a search per row
+        party = resolve_party(tx_data["raw_data"])
+        if party:
+            doc.party_type, doc.party = party
+
+    apply_rules(doc, tx_data["raw_data"])
+
     # Set Qonto data
     setattr(doc, CUSTOM_FIELD_QONTO_DATA, json.dumps(tx_data["raw_data"], indent=2))
+    # Pending rows are provisional until the re-poll job settles or retracts them
+    setattr(doc, CUSTOM_FIELD_QONTO_STATUS, tx_data.get("status"))
 
     # Set debit or credit based on amount
     amount = abs(flt(tx_data["amount"]))
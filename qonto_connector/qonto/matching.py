@@ -0,0 +1,410 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Indexed matching of Bank Transactions with open vouchers."""
+
+import json
+import re
+from collections import defaultdict
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+import frappe
+from frappe.utils import date_diff, flt, getdate
+
+from .constants import (
+    CUSTOM_FIELD_MATCH_DOCTYPE,
+    CUSTOM_FIELD_MATCH_NAME,
+    CUSTOM_FIELD_MATCH_SCORE,
+    CUSTOM_FIELD_MATCH_STATUS,
+    CUSTOM_FIELD_QONTO_DATA,
+    CUSTOM_FIELD_QONTO_ID,
+    CUSTOM_FIELD_QONTO_STATUS,
+    CUSTOM_FIELD_TRANSFER_PAIR,
+    MATCH_APPLY_SCORE,
+    MATCH_BATCH_SIZE,
+    MATCH_DATE_WINDOW_DAYS,
+    MATCH_PROPOSE_SCORE,
+    TRANSACTION_STATUS_PENDING,
+)
+from .utils import log_sync, normalize_name
+
+# Score weights, out of 100
+SCORE_REFERENCE = 45
+SCORE_AMOUNT = 30
+SCORE_COUNTERPARTY = 15
+SCORE_DATE = 10
+
+MIN_REFERENCE_LENGTH = 4
+
+
+def normalize_reference(value: Optional[str]) -> str:
+    """Upper case letters and digits only, e.g. ACC-SINV-2025-00012 -> ACCSINV202500012."""
+    return re.sub(r"[^0-9A-Z]", "", (value or "").upper())
+
+
+def reference_keys(*values: Optional[str]) -> Set[str]:
+    """
+    Get the normalized references found in free text.
+
+    Each value counts as a whole and word by word, so an invoice number
+    is found inside a longer transfer reference.
+
+    Args:
+        values: References, labels or voucher numbers
+
+    Returns:
+        Set of normalized references
+    """
+    keys = set()
+    for value in values:
+        for part in [value] + re.split(r"[\s,;:/|]+", value or ""):
+            key = normalize_reference(part)
+            if len(key) >= MIN_REFERENCE_LENGTH:
+                keys.add(key)
+    return keys
+
+
+class VoucherIndex:
+    """Hash indexes of open vouchers by amount and by reference, built once per run."""
+
+    def __init__(self, vouchers: Iterable[Dict[str, Any]]):
+        self.by_amount = defaultdict(list)
+        self.by_reference = defaultdict(list)
+
+        for voucher in vouchers:
+            self.by_amount[
+                (voucher["direction"], voucher["amount_cents"], voucher["currency"])
+            ].append(voucher)
+            for key in voucher["references"]:
+                self.by_reference[key].append(voucher)
+
+    def candidates(self, tx: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Get the vouchers sharing the amount or a reference of a transaction.
+
+        Args:
+            tx: Transaction facts (see transaction_facts)
+
+        Returns:
+            Vouchers of the same direction, without duplicates
+        """
+        found = {}
+        amount_key = (tx["direction"], tx["amount_cents"], tx["currency"])
+        for voucher in self.by_amount.get(amount_key, ()):
+            found[(voucher["doctype"], voucher["name"])] = voucher
+        for key in tx["references"]:
+            for voucher in self.by_reference.get(key, ()):
+                if voucher["direction"] == tx["direction"]:
+                    found[(voucher["doctype"], voucher["name"])] = voucher
+        return list(found.values())
+
+
+def score_candidate(tx: Dict[str, Any], voucher: Dict[str, Any]) -> int:
+    """
+    Score how likely a voucher is the counterpart of a transaction.
+
+    Args:
+        tx: Transaction facts
+        voucher: Voucher facts
+
+    Returns:
+        Score from 0 to 100
+    """
+    if voucher["company"] != tx["company"] or voucher["currency"] != tx["currency"]:
+        return 0
+    if voucher.get("account") and voucher["account"] != tx["account"]:
+        # Payment Entries must go through the bank account of the transaction
+        return 0
+
+    score = 0
+    if tx["references"] & voucher["references"]:
+        score += SCORE_REFERENCE
+    if tx["amount_cents"] == voucher["amount_cents"]:
+        score += SCORE_AMOUNT
+
+    counterparty, party = tx["counterparty"], voucher["party_name"]
+    if counterparty and party:
+        if counterparty == party:
+            score += SCORE_COUNTERPARTY
+        elif min(len(counterparty), len(party)) >= MIN_REFERENCE_LENGTH and (
+            counterparty in party or party in counterparty
+        ):
+            score += SCORE_COUNTERPARTY * 2 // 3
+
+    days = min(
+        (abs(date_diff(tx["date"], day)) for day in voucher["dates"] if day),
+        default=None
+    )
+    if days is not None and days < MATCH_DATE_WINDOW_DAYS:
+        score += SCORE_DATE * (MATCH_DATE_WINDOW_DAYS - days) // MATCH_DATE_WINDOW_DAYS
+
+    return score
+
+
+def match_transactions(
+    transactions: List[Dict[str, Any]],
+    index: VoucherIndex,
+    threshold: int = MATCH_PROPOSE_SCORE
+) -> Dict[str, Tuple[int, Dict[str, Any]]]:
+    """
+    Pick the best voucher of every transaction in one pass.
+
+    Pairs are taken best score first, and each voucher goes to one
+    transaction only.
+
+    Args:
+        transactions: Transaction facts
+        index: Open vouchers
+        threshold: Minimum score of a match
+
+    Returns:
+        (score, voucher) per Bank Transaction name
+    """
+    pairs = []
+    for tx in transactions:
+        for voucher in index.candidates(tx):
+            score = score_candidate(tx, voucher)
+            if score >= threshold:
+                pairs.append((score, tx["name"], voucher["doctype"], voucher["name"], voucher))
+
+    matches, used = {}, set()
+    for score, name, doctype, voucher_name, voucher in sorted(
+        pairs, key=lambda pair: (-pair[0], pair[1], pair[2], pair[3])
+    ):
+        if name in matches or (doctype, voucher_name) in used:
+            continue
+        matches[name] = (score, voucher)
+        used.add((doctype, voucher_name))
+
+    return matches
+
+
+def transaction_facts(row, accounts: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Extract what the matcher compares from a Bank Transaction row.
+
+    Args:
+        row: Bank Transaction values with its stored payload
+        accounts: GL account per Bank Account
+
+    Returns:
+        Transaction facts
+    """
+    raw = json.loads(row.get(CUSTOM_FIELD_QONTO_DATA) or "{}")
+    amount = flt(row.unallocated_amount) or flt(row.deposit) or flt(row.withdrawal)
+
+    return {
+        "name": row.name,
+        "docstatus": row.docstatus,
+        "company": row.company,
+        "account": accounts.get(row.bank_account),
+        "direction": "in" if flt(row.deposit) else "out",
+        "amount_cents": round(amount * 100),
+        "currency": row.currency,
+        "date": getdate(row.date),
+        "references": reference_keys(raw.get("reference"), raw.get("label")),
+        "counterparty": normalize_name(raw.get("counterparty_name")),
+    }
+
+
+def load_open_vouchers(companies: List[str]) -> List[Dict[str, Any]]:
+    """
+    Load the open invoices and uncleared Payment Entries of companies.
+
+    Three queries per run, whatever the number of transactions.
+
+    Args:
+        companies: Company names
+
+    Returns:
+        Voucher facts
+    """
+    vouchers = []
+
+    for doctype, party_field, direction in (
+        ("Sales Invoice", "customer_name", "in"),
+        ("Purchase Invoice", "supplier_name", "out"),
+    ):
+        fields = [
+            "name", "company", "currency", "outstanding_amount", "posting_date", "due_date",
+            f"{party_field} as party_name"
+        ]
+        if doctype == "Purchase Invoice":
+            # Supplier invoice number, often quoted in the transfer reference
+            fields.append("bill_no")
+
+        for row in frappe.get_all(
+            doctype,
+            filters={"docstatus": 1, "outstanding_amount": (">", 0), "company": ("in", companies)},
+            fields=fields
+        ):
+            vouchers.append({
+                "doctype": doctype,
+                "name": row.name,
+                "company": row.company,
+                "direction": direction,
+                "amount_cents": round(flt(row.outstanding_amount) * 100),
+                "currency": row.currency,
+                "account": None,
+                "dates": (getdate(row.posting_date), getdate(row.due_date) if row.due_date else None),
+                "references": reference_keys(row.name, row.get("bill_no")),
+                "party_name": normalize_name(row.party_name),
+            })
+
+    for row in frappe.get_all(
+        "Payment Entry",
+        filters={
+            "docstatus": 1,
+            "clearance_date": ("is", "not set"),
+            "payment_type": ("in", ["Receive", "Pay"]),
+            "company": ("in", companies),
+        },
+        fields=[
+            "name", "company", "payment_type", "posting_date", "reference_no", "party_name",
+            "paid_amount", "received_amount", "paid_from", "paid_to",
+            "paid_from_account_currency", "paid_to_account_currency"
+        ]
+    ):
+        receive = row.payment_type == "Receive"
+        vouchers.append({
+            "doctype": "Payment Entry",
+            "name": row.name,
+            "company": row.company,
+            "direction": "in" if receive else "out",
+            "amount_cents": round(flt(row.received_amount if receive else row.paid_amount) * 100),
+            "currency": row.paid_to_account_currency if receive else row.paid_from_account_currency,
+            "account": row.paid_to if receive else row.paid_from,
+            "dates": (getdate(row.posting_date),),
+            "references": reference_keys(row.name, row.reference_no),
+            "party_name": normalize_name(row.party_name),
+        })
+
+    return vouchers
+
+
+def get_unmatched_transactions(rematch: bool = False, limit: int = MATCH_BATCH_SIZE):
+    """
+    Get the Qonto Bank Transactions the matcher has not handled yet.
+
+    Args:
+        rematch: Also retry the ones that had no match
+        limit: Rows returned
+
+    Returns:
+        List of Bank Transaction rows
+    """
+    statuses = ("", "No Match") if rematch else ("",)
+    return frappe.db.sql(
+        f"""select name, docstatus, company, bank_account, currency, date,
+            deposit, withdrawal, unallocated_amount, `{CUSTOM_FIELD_QONTO_DATA}`
+        from `tabBank Transaction`
+        where docstatus < 2 and `{CUSTOM_FIELD_QONTO_ID}` is not null
+            and coalesce(`{CUSTOM_FIELD_MATCH_STATUS}`, '') in %(statuses)s
+            and coalesce(`{CUSTOM_FIELD_QONTO_STATUS}`, '') != %(pending)s
+            and coalesce(`{CUSTOM_FIELD_TRANSFER_PAIR}`, '') = ''
+            and (unallocated_amount > 0 or docstatus = 0)
+        order by name
+        limit %(limit)s""",
+        {"statuses": statuses, "pending": TRANSACTION_STATUS_PENDING, "limit": limit},
+        as_dict=True
+    )
+
+
+def match_new_transactions(rematch: bool = False) -> Dict[str, int]:
+    """
+    Match the Bank Transactions of the last sync runs with open vouchers.
+
+    Vouchers are loaded and indexed once, then every transaction is
+    looked up in the indexes instead of scanning vouchers.
+
+    Args:
+        rematch: Also retry the transactions that had no match
+
+    Returns:
+        Dictionary with proposed, applied and unmatched counts
+    """
+    result = {"proposed": 0, "applied": 0, "unmatched": 0}
+
+    mode = frappe.db.get_single_value("Qonto Settings", "transaction_matching") or "Off"
+    if mode == "Off":
+        return result
+
+    rows = get_unmatched_transactions(rematch)
+    if not rows:
+        return result
+
+    accounts = dict(frappe.get_all(
+        "Bank Account",
+        filters={"name": ("in", list({row.bank_account for row in rows}))},
+        fields=["name", "account"],
+        as_list=True
+    ))
+    transactions = [transaction_facts(row, accounts) for row in rows]
+    index = VoucherIndex(load_open_vouchers(list({tx["company"] for tx in transactions})))
+    matches = match_transactions(transactions, index)
+
+    for tx in transactions:
+        score, voucher = matches.get(tx["name"], (0, None))
+        status = "Proposed" if voucher else "No Match"
+
+        if voucher and mode == "Apply" and _can_apply(tx, voucher, score):
+            status = "Applied" if apply_match(tx, voucher) else "Proposed"
+
+        frappe.db.set_value("Bank Transaction", tx["name"], {
+            CUSTOM_FIELD_MATCH_STATUS: status,
+            CUSTOM_FIELD_MATCH_DOCTYPE: voucher["doctype"] if voucher else None,
+            CUSTOM_FIELD_MATCH_NAME: voucher["name"] if voucher else None,
+            CUSTOM_FIELD_MATCH_SCORE: score,
+        }, update_modified=False)
+        result[{"Proposed": "proposed", "Applied": "applied"}.get(status, "unmatched")] += 1
+
+    frappe.db.commit()
+
+    log_sync(
+        "INFO",
+        f"Matching done. {result['proposed']} proposed, {result['applied']} applied.",
+        result,
+        items_processed=result["proposed"] + result["applied"]
+    )
+    return result
+
+
+def _can_apply(tx: Dict[str, Any], voucher: Dict[str, Any], score: int) -> bool:
+    # Invoices need a payment created by a user; drafts cannot be reconciled
+    return (
+        score >= MATCH_APPLY_SCORE
+        and voucher["doctype"] == "Payment Entry"
+        and tx["docstatus"] == 1
+    )
+
+
+def apply_match(tx: Dict[str, Any], voucher: Dict[str, Any]) -> bool:
+    """
+    Reconcile a submitted Bank Transaction with a Payment Entry.
+
+    Args:
+        tx: Transaction facts
+        voucher: Payment Entry facts
+
+    Returns:
+        True if reconciled
+    """
+    from erpnext.accounts.doctype.bank_reconciliation_tool.bank_reconciliation_tool import (
+        reconcile_vouchers,
+    )
+
+    try:
+        frappe.db.savepoint("qonto_match")
+        reconcile_vouchers(tx["name"], json.dumps([{
+            "payment_doctype": voucher["doctype"],
+            "payment_name": voucher["name"],
+            "amount": voucher["amount_cents"] / 100,
+        }]))
+        return True
+    except Exception as e:
+        frappe.db.rollback(save_point="qonto_match")
+        frappe.log_error(
+            f"Failed to reconcile {tx['name']} with {voucher['name']}: {str(e)}",
+            "Qonto Matching"
+        )
+        return False
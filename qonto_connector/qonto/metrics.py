@@ -0,0 +1,283 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Phase timing metrics for sync runs."""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List
+
+import frappe
+
+from .constants import CACHE_KEY_SYNC_METRICS, CACHE_KEY_SYNC_METRICS_TOTALS
+
+# Module level handle on the run currently being measured in this worker
+_current: Optional["SyncMetrics"] = None
+
+
+class SyncMetrics:
+    """Phase timers and counters for a single sync run, kept per account."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.account_id: Optional[str] = None
+        self._lock = threading.Lock()
+        # scope -> phase -> {"count", "total_ms", "max_ms"}
+        self._phases: Dict[str, Dict[str, Dict[str, float]]] = {}
+        # scope -> counter -> value
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @contextmanager
+    def account(self, account_id: str):
+        """Attribute everything measured inside the block to an account."""
+        previous = self.account_id
+        self.account_id = account_id
+        try:
+            yield
+        finally:
+            self.account_id = previous
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as one occurrence of a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def observe(self, name: str, elapsed_ms: float):
+        """
+        Record one occurrence of a phase.
+
+        Args:
+            name: Phase name (http, normalize, upsert, commit)
+            elapsed_ms: Time spent in milliseconds
+        """
+        with self._lock:
+            for scope in self._scopes():
+                stats = self._phases.setdefault(scope, {}).setdefault(
+                    name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+                )
+                stats["count"] += 1
+                stats["total_ms"] += elapsed_ms
+                stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def incr(self, name: str, value: int = 1):
+        """
+        Increment a counter.
+
+        Args:
+            name: Counter name
+            value: Amount to add
+        """
+        with self._lock:
+            for scope in self._scopes():
+                counters = self._counters.setdefault(scope, {})
+                counters[name] = counters.get(name, 0) + value
+
+    def _scopes(self) -> List[str]:
+        if self.account_id:
+            return ["run", self.account_id]
+        return ["run"]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Build a JSON serializable summary of the run.
+
+        Returns:
+            Dictionary with run level and per account phases and counters
+        """
+        with self._lock:
+            def scope_summary(scope):
+                return {
+                    "phases": {
+                        name: {
+                            "count": int(stats["count"]),
+                            "total_ms": round(stats["total_ms"], 3),
+                            "avg_ms": round(stats["total_ms"] / stats["count"], 3)
+                            if stats["count"] else 0,
+                            "max_ms": round(stats["max_ms"], 3),
+                        }
+                        for name, stats in self._phases.get(scope, {}).items()
+                    },
+                    "counters": dict(self._counters.get(scope, {})),
+                }
+
+            scopes = set(self._phases) | set(self._counters)
+            scopes.discard("run")
+
+            return {
+                "started_at": self.started_at,
+                "duration_ms": int((time.time() - self.started_at) * 1000),
+                "run": scope_summary("run"),
+                "accounts": {scope: scope_summary(scope) for scope in sorted(scopes)},
+            }
+
+
+class NullMetrics(SyncMetrics):
+    """Metrics sink used outside of a sync run; records nothing."""
+
+    def observe(self, name: str, elapsed_ms: float):
+        pass
+
+    def incr(self, name: str, value: int = 1):
+        pass
+
+
+_null = NullMetrics()
+
+
+def start_run() -> SyncMetrics:
+    """
+    Start measuring a new sync run in this worker.
+
+    Returns:
+        SyncMetrics for the run
+    """
+    global _current
+    _current = SyncMetrics()
+    return _current
+
+
+def get_current_metrics() -> SyncMetrics:
+    """
+    Get the metrics of the run in progress.
+
+    Returns:
+        Current SyncMetrics, or a no-op sink when no run is being measured
+    """
+    return _current or _null
+
+
+def finish_run(metrics: SyncMetrics, publish: bool = True) -> Dict[str, Any]:
+    """
+    Stop measuring a run and publish it for the metrics endpoint.
+
+    Args:
+        metrics: SyncMetrics returned by start_run
+        publish: Publish the run to the metrics endpoint (off for benchmarks)
+
+    Returns:
+        Run summary
+    """
+    global _current
+    if _current is metrics:
+        _current = None
+
+    summary = metrics.summary()
+    if not publish:
+        return summary
+
+    try:
+        frappe.cache().set_value(CACHE_KEY_SYNC_METRICS, summary)
+
+        totals = frappe.cache().get_value(CACHE_KEY_SYNC_METRICS_TOTALS) or {
+            "runs": 0,
+            "phases": {},
+            "counters": {},
+        }
+        totals["runs"] += 1
+        for name, stats in summary["run"]["phases"].items():
+            total = totals["phases"].setdefault(name, {"count": 0, "total_ms": 0.0})
+            total["count"] += stats["count"]
+            total["total_ms"] += stats["total_ms"]
+        for name, value in summary["run"]["counters"].items():
+            totals["counters"][name] = totals["counters"].get(name, 0) + value
+        frappe.cache().set_value(CACHE_KEY_SYNC_METRICS_TOTALS, totals)
+    except Exception as e:
+        frappe.log_error(f"Failed to publish sync metrics: {str(e)}", "Qonto Metrics")
+
+    return summary
+
+
+def render_prometheus(
+    last_run: Optional[Dict[str, Any]],
+    totals: Optional[Dict[str, Any]]
+) -> str:
+    """
+    Render metrics in the Prometheus text exposition format.
+
+    Args:
+        last_run: Summary of the last finished run
+        totals: Cumulative totals across runs
+
+    Returns:
+        Prometheus text payload
+    """
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(
+                f'{key}="{_escape_label(val)}"' for key, val in labels.items()
+            )
+            lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+    totals = totals or {"runs": 0, "phases": {}, "counters": {}}
+
+    metric(
+        "qonto_sync_runs_total", "counter",
+        "Number of finished sync runs.",
+        [({}, totals["runs"])]
+    )
+    metric(
+        "qonto_sync_phase_seconds_total", "counter",
+        "Cumulative time spent per sync phase.",
+        [({"phase": name}, round(stats["total_ms"] / 1000, 6))
+         for name, stats in sorted(totals["phases"].items())]
+    )
+    metric(
+        "qonto_sync_phase_calls_total", "counter",
+        "Cumulative number of timed calls per sync phase.",
+        [({"phase": name}, stats["count"]) for name, stats in sorted(totals["phases"].items())]
+    )
+    metric(
+        "qonto_sync_events_total", "counter",
+        "Cumulative sync counters.",
+        [({"name": name}, value) for name, value in sorted(totals["counters"].items())]
+    )
+
+    if last_run:
+        metric(
+            "qonto_sync_last_run_duration_seconds", "gauge",
+            "Wall clock duration of the last sync run.",
+            [({}, round(last_run["duration_ms"] / 1000, 3))]
+        )
+
+        phase_samples = []
+        max_samples = []
+        counter_samples = []
+        scopes = [("", last_run["run"])] + sorted(last_run["accounts"].items())
+        for account, scope in scopes:
+            for name, stats in sorted(scope["phases"].items()):
+                labels = {"phase": name, "account": account}
+                phase_samples.append((labels, round(stats["total_ms"] / 1000, 6)))
+                max_samples.append((labels, round(stats["max_ms"] / 1000, 6)))
+            for name, value in sorted(scope["counters"].items()):
+                counter_samples.append(({"name": name, "account": account}, value))
+
+        metric(
+            "qonto_sync_last_run_phase_seconds", "gauge",
+            "Time spent per phase in the last run (empty account is the run total).",
+            phase_samples
+        )
+        metric(
+            "qonto_sync_last_run_phase_max_seconds", "gauge",
+            "Slowest single call per phase in the last run.",
+            max_samples
+        )
+        metric(
+            "qonto_sync_last_run_events", "gauge",
+            "Sync counters of the last run (empty account is the run total).",
+            counter_samples
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,216 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Counterparty to Party resolution index."""
+
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import frappe
+
+from .constants import CACHE_KEY_PARTY_INDEX, CACHE_KEY_PARTY_INDEX_BUILT
+from .staging import get_counterparty_iban, normalize_iban
+from .utils import normalize_name
+
+# Value of keys shared by several parties: never resolved
+AMBIGUOUS = ("", "")
+
+# Name field of each party doctype, and whether it can be disabled
+PARTY_DOCTYPES = {
+    "Customer": ("customer_name", "disabled"),
+    "Supplier": ("supplier_name", "disabled"),
+    "Employee": ("employee_name", None),
+}
+
+Party = Tuple[str, str]
+
+
+def iban_key(iban: Optional[str]) -> Optional[str]:
+    """Index key of an IBAN."""
+    iban = normalize_iban(iban)
+    return f"iban:{iban}" if iban else None
+
+
+def name_key(name: Optional[str]) -> Optional[str]:
+    """Index key of a party name."""
+    name = normalize_name(name)
+    return f"name:{name}" if name else None
+
+
+def alias_key(alias: Optional[str]) -> Optional[str]:
+    """Index key of a counterparty alias."""
+    alias = normalize_name(alias)
+    return f"alias:{alias}" if alias else None
+
+
+def party_keys(doc) -> List[Tuple[str, Party]]:
+    """
+    Get the index keys a record contributes.
+
+    Args:
+        doc: Customer, Supplier, Employee, Bank Account or Qonto Party Alias
+
+    Returns:
+        List of (key, (party_type, party))
+    """
+    if not doc:
+        return []
+
+    if doc.doctype in PARTY_DOCTYPES:
+        name_field, disabled_field = PARTY_DOCTYPES[doc.doctype]
+        if disabled_field and doc.get(disabled_field):
+            return []
+        if doc.doctype == "Employee" and doc.get("status") not in (None, "Active"):
+            return []
+
+        party = (doc.doctype, doc.name)
+        keys = [name_key(doc.get(name_field)), name_key(doc.name)]
+        if doc.doctype == "Employee":
+            keys.append(iban_key(doc.get("iban")))
+        return [(key, party) for key in dict.fromkeys(keys) if key]
+
+    if doc.doctype == "Bank Account":
+        if doc.get("is_company_account") or doc.get("party_type") not in PARTY_DOCTYPES:
+            return []
+        key = iban_key(doc.get("iban"))
+        return [(key, (doc.party_type, doc.party))] if key and doc.get("party") else []
+
+    if doc.doctype == "Qonto Party Alias":
+        key = alias_key(doc.get("alias"))
+        return [(key, (doc.party_type, doc.party))] if key and doc.get("party") else []
+
+    return []
+
+
+def build_party_index() -> Dict[str, Party]:
+    """
+    Build the whole index from the database.
+
+    Returns:
+        (party_type, party) per key, AMBIGUOUS for keys of several parties
+    """
+    index: Dict[str, Party] = {}
+
+    def add(pairs: Iterable[Tuple[str, Party]]):
+        for key, party in pairs:
+            index[key] = party if index.get(key, party) == party else AMBIGUOUS
+
+    for doctype, (name_field, disabled_field) in PARTY_DOCTYPES.items():
+        fields = ["name", name_field]
+        filters = {}
+        if disabled_field:
+            filters[disabled_field] = 0
+        if doctype == "Employee":
+            fields.append("iban")
+            filters["status"] = "Active"
+
+        for row in frappe.get_all(doctype, filters=filters, fields=fields):
+            row.doctype = doctype
+            add(party_keys(row))
+
+    for doctype, fields in (
+        ("Bank Account", ["iban", "party_type", "party", "is_company_account"]),
+        ("Qonto Party Alias", ["alias", "party_type", "party"]),
+    ):
+        for row in frappe.get_all(doctype, fields=fields):
+            row.doctype = doctype
+            add(party_keys(row))
+
+    return index
+
+
+def get_party_index() -> Dict[str, Party]:
+    """
+    Get the index, loaded from the cache once per request or job.
+
+    The cache is rebuilt from the database when missing, e.g. after a
+    cache flush; record changes update it key by key.
+
+    Returns:
+        (party_type, party) per key
+    """
+    if getattr(frappe.local, "qonto_party_index", None) is not None:
+        return frappe.local.qonto_party_index
+
+    cache = frappe.cache()
+    if cache.get_value(CACHE_KEY_PARTY_INDEX_BUILT):
+        index = cache.hgetall(CACHE_KEY_PARTY_INDEX) or {}
+        index = {_key(k): tuple(v) for k, v in index.items()}
+    else:
+        index = build_party_index()
+        cache.delete_value(CACHE_KEY_PARTY_INDEX)
+        for key, party in index.items():
+            cache.hset(CACHE_KEY_PARTY_INDEX, key, party)
+        cache.set_value(CACHE_KEY_PARTY_INDEX_BUILT, True)
+
+    frappe.local.qonto_party_index = index
+    return index
+
+
+def resolve_party(raw: Dict[str, Any], index: Optional[Dict[str, Party]] = None) -> Optional[Party]:
+    """
+    Find the Party of a Qonto counterparty.
+
+    IBAN first, then aliases, then names.
+
+    Args:
+        raw: Raw Qonto transaction
+        index: Party index, the cached one by default
+
+    Returns:
+        (party_type, party), or None if unknown or ambiguous
+    """
+    index = get_party_index() if index is None else index
+
+    for key in (
+        iban_key(get_counterparty_iban(raw)),
+        alias_key(raw.get("counterparty_name")),
+        name_key(raw.get("counterparty_name")),
+    ):
+        party = index.get(key) if key else None
+        if party:
+            return party if party != AMBIGUOUS else None
+
+    return None
+
+
+def update_party_index(doc, method=None):
+    """
+    doc_events hook of party, Bank Account and alias records: move their
+    keys in the cached index.
+    """
+    if not frappe.cache().get_value(CACHE_KEY_PARTY_INDEX_BUILT):
+        # Built in full on next use
+        return
+
+    before = party_keys(doc.get_doc_before_save()) if method != "on_trash" else party_keys(doc)
+    after = party_keys(doc) if method != "on_trash" else []
+    _move_keys(before, after)
+
+
+def invalidate_party_index(doc=None, method=None, *args, **kwargs):
+    """after_rename hook: names change everywhere, rebuild on next use."""
+    frappe.cache().delete_value(CACHE_KEY_PARTY_INDEX_BUILT)
+    frappe.local.qonto_party_index = None
+
+
+def _move_keys(before: List[Tuple[str, Party]], after: List[Tuple[str, Party]]):
+    cache = frappe.cache()
+    frappe.local.qonto_party_index = None
+    removed = dict(before)
+    added = dict(after)
+
+    for key, party in removed.items():
+        current = cache.hget(CACHE_KEY_PARTY_INDEX, key)
+        if added.get(key) != party and current and tuple(current) == party:
+            cache.hdel(CACHE_KEY_PARTY_INDEX, key)
+
+    for key, party in added.items():
+        current = cache.hget(CACHE_KEY_PARTY_INDEX, key)
+        if current is None or removed.get(key) == tuple(current):
+            cache.hset(CACHE_KEY_PARTY_INDEX, key, party)
+        elif tuple(current) != party:
+            cache.hset(CACHE_KEY_PARTY_INDEX, key, AMBIGUOUS)
+
+
+def _key(key) -> str:
+    return key.decode("utf-8") if isinstance(key, bytes) else key
@@ -0,0 +1,197 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Provisional Bank Transactions for pending Qonto transactions."""
+
+import json
+from typing import Dict, Any, Optional
+
+import frappe
+
+from .client import QontoClient
+from .constants import (
+    CACHE_KEY_PENDING_REPOLL_CURSOR,
+    CUSTOM_FIELD_QONTO_DATA,
+    CUSTOM_FIELD_QONTO_ID,
+    CUSTOM_FIELD_QONTO_STATUS,
+    PENDING_REPOLL_LIMIT,
+    TRANSACTION_STATUS_CANCELED,
+    TRANSACTION_STATUS_DECLINED,
+    TRANSACTION_STATUS_PENDING,
+    TRANSACTION_STATUS_SETTLED,
+)
+from .ledger import set_qonto_status
+from .utils import log_sync
+
+# Statuses a pending transaction cannot come back from
+RETRACTED_STATUSES = (TRANSACTION_STATUS_DECLINED, TRANSACTION_STATUS_CANCELED)
+
+
+def repoll_action(status: Optional[str]) -> str:
+    """
+    Decide what to do with a provisional Bank Transaction.
+
+    Args:
+        status: Current Qonto status of the transaction
+
+    Returns:
+        "settle", "retract" or "keep"
+    """
+    if status == TRANSACTION_STATUS_SETTLED:
+        return "settle"
+    if status in RETRACTED_STATUSES:
+        return "retract"
+    return "keep"
+
+
+def get_pending_transactions(limit: int = PENDING_REPOLL_LIMIT):
+    """
+    Get the next provisional Bank Transactions to re-poll.
+
+    A name cursor kept in cache rotates through the pending rows, so every
+    row is re-polled in turn when there are more than one run handles.
+
+    Args:
+        limit: Rows returned
+
+    Returns:
+        List of rows with name, bank_account, qonto_id and qonto_data
+    """
+    cursor = frappe.cache().get_value(CACHE_KEY_PENDING_REPOLL_CURSOR) or ""
+
+    rows = _pending_after(cursor, limit)
+    if len(rows) < limit and cursor:
+        # Wrap around to the start of the set
+        rows += _pending_after("", limit - len(rows), until=cursor)
+
+    frappe.cache().set_value(
+        CACHE_KEY_PENDING_REPOLL_CURSOR, rows[-1].name if rows else ""
+    )
+    return rows
+
+
+def _pending_after(cursor: str, limit: int, until: Optional[str] = None):
+    filters = {CUSTOM_FIELD_QONTO_STATUS: TRANSACTION_STATUS_PENDING, "docstatus": 0}
+    filters["name"] = ("<=", until) if until else (">", cursor)
+    return frappe.get_all(
+        "Bank Transaction",
+        filters=filters,
+        fields=["name", "bank_account", CUSTOM_FIELD_QONTO_ID, CUSTOM_FIELD_QONTO_DATA],
+        order_by="name asc",
+        limit=limit
+    )
+
+
+def repoll_pending(limit: int = PENDING_REPOLL_LIMIT) -> Dict[str, int]:
+    """
+    Fetch the provisional transactions again and settle or retract them.
+
+    Only the pending IDs are requested, one call each, instead of
+    re-reading whole accounts; rows still pending are left untouched.
+
+    Args:
+        limit: Transactions re-polled per run
+
+    Returns:
+        Dictionary with settled, retracted, pending and failed counts
+    """
+    from .sync import ingest_transaction
+
+    result = {"settled": 0, "retracted": 0, "pending": 0, "failed": 0}
+
+    settings = frappe.get_single("Qonto Settings")
+    if not settings.connected:
+        return result
+
+    rows = get_pending_transactions(limit)
+    if not rows:
+        return result
+
+    mappings = {m.erpnext_bank_account: m for m in settings.account_mappings if m.active}
+    client = QontoClient(settings)
+
+    try:
+        for row in rows:
+            try:
+                raw = json.loads(row.get(CUSTOM_FIELD_QONTO_DATA) or "{}")
+                # The API is keyed by the UUID, qonto_id is the public transaction_id
+                tx_data = client.get_transaction(raw.get("id") or row.get(CUSTOM_FIELD_QONTO_ID))
+                action = repoll_action(tx_data.get("status"))
+
+                if action == "settle" and row.bank_account in mappings:
+                    if ingest_transaction(mappings[row.bank_account], tx_data):
+                        result["settled"] += 1
+                    else:
+                        result["failed"] += 1
+                elif action == "retract":
+                    retract_bank_transaction(row.name, tx_data["status"])
+                    result["retracted"] += 1
+                else:
+                    result["pending"] += 1
+
+            except Exception as e:
+                result["failed"] += 1
+                frappe.log_error(
+                    f"Failed to re-poll pending transaction {row.name}: {str(e)}",
+                    "Qonto Pending Transactions"
+                )
+
+            frappe.db.commit()
+    finally:
+        client.close()
+
+    if result["settled"] or result["retracted"]:
+        log_sync(
+            "INFO",
+            f"Pending transactions re-polled. {result['settled']} settled, "
+            f"{result['retracted']} retracted.",
+            result,
+            items_processed=result["settled"] + result["retracted"]
+        )
+
+    return result
+
+
+def retract_transaction(qonto_id: str, status: str) -> bool:
+    """
+    Retract the provisional Bank Transaction of a declined or canceled transaction.
+
+    Args:
+        qonto_id: Qonto transaction ID
+        status: Declined or canceled
+
+    Returns:
+        True if a Bank Transaction was found
+    """
+    name = frappe.db.get_value("Bank Transaction", {CUSTOM_FIELD_QONTO_ID: qonto_id})
+    if not name:
+        return False
+
+    retract_bank_transaction(name, status)
+    return True
+
+
+def retract_bank_transaction(name: str, status: str):
+    """
+    Delete a provisional Bank Transaction, or flag it if it is in use.
+
+    Drafts without allocations are deleted. Submitted or allocated ones
+    keep their entries and only get the new status, with a warning to
+    review them by hand.
+
+    Args:
+        name: Bank Transaction name
+        status: Declined or canceled
+    """
+    doc = frappe.get_doc("Bank Transaction", name)
+
+    if doc.docstatus == 0 and not doc.get("payment_entries"):
+        frappe.delete_doc("Bank Transaction", name, ignore_permissions=True, force=True)
+        return
+
+    set_qonto_status(name, status)
+    log_sync(
+        "WARN",
+        f"Bank Transaction {name} was {status} in Qonto but is already reconciled",
+        {"bank_transaction": name, "status": status}
+    )
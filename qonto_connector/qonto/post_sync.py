@@ -0,0 +1,35 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Processing of newly synced Bank Transactions, once per sync run."""
+
+import frappe
+
+from .constants import POST_SYNC_JOB_ID, POST_SYNC_QUEUE, POST_SYNC_TIMEOUT
+
+
+def enqueue_post_sync():
+    """
+    Enqueue the post-sync job unless it is already queued or running.
+
+    Called when a sync, the materializer or the webhook queue wrote Bank
+    Transactions; runs after the current transaction commits.
+    """
+    frappe.enqueue(
+        "qonto_connector.qonto.post_sync.run_post_sync",
+        queue=POST_SYNC_QUEUE,
+        timeout=POST_SYNC_TIMEOUT,
+        job_id=POST_SYNC_JOB_ID,
+        deduplicate=True,
+        enqueue_after_commit=True
+    )
+
+
+def run_post_sync():
+    """Run the whole-run passes over the new Bank Transactions."""
+    from .matching import match_new_transactions
+    from .transfers import detect_internal_transfers
+
+    # Paired transfer legs are left out of voucher matching
+    detect_internal_transfers()
+    match_new_transactions()
@@ -0,0 +1,129 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Opt-in profiling of sync runs."""
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from typing import Optional
+
+import frappe
+
+from .constants import PROFILE_TOP_FUNCTIONS, PROFILE_TOP_ALLOCATIONS
+
+
+def get_query_count() -> Optional[int]:
+    """
+    Get the number of statements sent by this database session.
+
+    Returns:
+        Statement count, or None when the database does not expose it
+    """
+    if frappe.db.db_type != "mariadb":
+        return None
+
+    result = frappe.db.sql("SHOW SESSION STATUS LIKE 'Questions'")
+    return int(result[0][1]) if result else None
+
+
+class SyncProfiler:
+    """Run a sync under cProfile and tracemalloc and report the hot spots."""
+
+    def __init__(self, label: str):
+        """
+        Initialize profiler.
+
+        Args:
+            label: Name of the profiled run, used in the report file name
+        """
+        self.label = label
+        self.profile = cProfile.Profile()
+        self.snapshot = None
+        self.queries = None
+        self.duration_ms = 0
+        self.peak_memory = 0
+        self._started_tracemalloc = False
+        self._start_queries = None
+        self._start_time = None
+
+    def start(self):
+        """Start collecting."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+
+        self._start_queries = get_query_count()
+        self._start_time = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self):
+        """Stop collecting and keep the results."""
+        self.profile.disable()
+        self.duration_ms = int((time.perf_counter() - self._start_time) * 1000)
+
+        end_queries = get_query_count()
+        if self._start_queries is not None and end_queries is not None:
+            # The SHOW STATUS statement itself is counted once
+            self.queries = end_queries - self._start_queries - 1
+
+        self.snapshot = tracemalloc.take_snapshot()
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    def report(self) -> str:
+        """
+        Build the text report.
+
+        Returns:
+            Report with top functions, allocation hot spots and query count
+        """
+        out = io.StringIO()
+        out.write(f"Qonto sync profile: {self.label}\n")
+        out.write(f"Duration: {self.duration_ms} ms\n")
+        out.write(
+            f"SQL queries: {self.queries if self.queries is not None else 'n/a'}\n"
+        )
+
+        out.write(f"Traced memory peak: {self.peak_memory / 1024:.1f} KiB\n")
+
+        out.write(f"\n== Top {PROFILE_TOP_FUNCTIONS} functions by cumulative time ==\n")
+        stats = pstats.Stats(self.profile, stream=out)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+
+        out.write(f"\n== Top {PROFILE_TOP_ALLOCATIONS} allocation sites ==\n")
+        if self.snapshot:
+            snapshot = self.snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            for stat in snapshot.statistics("lineno")[:PROFILE_TOP_ALLOCATIONS]:
+                out.write(f"{stat}\n")
+
+        return out.getvalue()
+
+    def attach_to(self, sync_log: Optional[str]):
+        """
+        Save the report as a private file attached to a Qonto Sync Log.
+
+        Args:
+            sync_log: Name of the Qonto Sync Log of the profiled run
+        """
+        if not sync_log:
+            return
+
+        try:
+            frappe.get_doc({
+                "doctype": "File",
+                "file_name": f"qonto-sync-profile-{sync_log}.txt",
+                "attached_to_doctype": "Qonto Sync Log",
+                "attached_to_name": sync_log,
+                "is_private": 1,
+                "content": self.report(),
+            }).insert(ignore_permissions=True)
+            frappe.db.commit()
+        except Exception as e:
+            frappe.log_error(f"Failed to attach sync profile: {str(e)}", "Qonto Profiling")
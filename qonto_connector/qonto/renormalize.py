@@ -0,0 +1,245 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Offline rebuild of derived fields from stored Qonto payloads."""
+
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+import frappe
+from frappe.utils import flt, getdate
+
+from .client import normalize_transaction
+from .constants import (
+    CUSTOM_FIELD_QONTO_DATA,
+    CUSTOM_FIELD_QONTO_ID,
+    RENORMALIZE_CHUNK_SIZE,
+    RENORMALIZE_QUEUE,
+    RENORMALIZE_TIMEOUT,
+)
+from .staging import STAGING_COLUMNS, STAGING_DOCTYPE, to_staging_row
+from .utils import log_sync
+
+BANK_TRANSACTION = "Bank Transaction"
+
+# Staged columns rebuilt in place; qonto_id is the key and data the source
+STAGING_REBUILT_COLUMNS = tuple(c for c in STAGING_COLUMNS if c not in ("qonto_id", "data"))
+
+
+def start_renormalization(chunk_size: int = RENORMALIZE_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Split stored rows into name ranges and enqueue one job per range.
+
+    Ranges are processed in parallel by the workers of the queue.
+
+    Args:
+        chunk_size: Rows per job
+
+    Returns:
+        Number of jobs enqueued per doctype
+    """
+    enqueued = {}
+    for doctype, condition in (
+        (BANK_TRANSACTION, f"docstatus = 0 and `{CUSTOM_FIELD_QONTO_ID}` is not null"),
+        (STAGING_DOCTYPE, "1 = 1"),
+    ):
+        ranges = plan_chunks(doctype, condition, chunk_size)
+        for start, end in ranges:
+            frappe.enqueue(
+                "qonto_connector.qonto.renormalize.renormalize_chunk",
+                queue=RENORMALIZE_QUEUE,
+                timeout=RENORMALIZE_TIMEOUT,
+                doctype=doctype,
+                start=start,
+                end=end
+            )
+        enqueued[doctype] = len(ranges)
+
+    log_sync("INFO", "Re-normalization queued", {"jobs": enqueued})
+    return enqueued
+
+
+def plan_chunks(
+    doctype: str,
+    condition: str,
+    chunk_size: int
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Find name boundaries splitting matching rows into chunks.
+
+    Each boundary is one primary key range scan of chunk_size rows, so
+    planning never loads the names of the whole table.
+
+    Args:
+        doctype: DocType to split
+        condition: SQL condition selecting the rows
+        chunk_size: Rows per chunk
+
+    Returns:
+        List of (start, end) name ranges: start exclusive, end inclusive,
+        None meaning unbounded
+    """
+    ranges = []
+    start = None
+
+    while True:
+        after = "and name > %(start)s" if start is not None else ""
+        boundary = frappe.db.sql(
+            f"""select name from `tab{doctype}`
+            where {condition} {after}
+            order by name limit 1 offset %(offset)s""",
+            {"start": start, "offset": chunk_size - 1}
+        )
+        if not boundary:
+            ranges.append((start, None))
+            return ranges
+
+        end = boundary[0][0]
+        ranges.append((start, end))
+        start = end
+
+
+def renormalize_chunk(doctype: str, start: Optional[str], end: Optional[str]) -> Dict[str, int]:
+    """
+    Rebuild the derived fields of one name range and write the changed rows.
+
+    Args:
+        doctype: Bank Transaction or the staging doctype
+        start: Exclusive lower name bound, None for the first chunk
+        end: Inclusive upper name bound, None for the last chunk
+
+    Returns:
+        Dictionary with scanned, changed and failed counts
+    """
+    conditions, values = [], {"start": start, "end": end}
+    if start is not None:
+        conditions.append("name > %(start)s")
+    if end is not None:
+        conditions.append("name <= %(end)s")
+
+    if doctype == BANK_TRANSACTION:
+        result = _renormalize_bank_transactions(conditions, values)
+    else:
+        result = _renormalize_staged(conditions, values)
+
+    frappe.db.commit()
+
+    log_sync(
+        "INFO",
+        f"Re-normalized {doctype} {start or ''}..{end or ''}: "
+        f"{result['changed']} of {result['scanned']} rows changed",
+        dict(result, doctype=doctype, start=start, end=end),
+        items_processed=result["changed"]
+    )
+    return result
+
+
+def _renormalize_bank_transactions(conditions: List[str], values: Dict[str, Any]) -> Dict[str, int]:
+    rows = frappe.db.sql(
+        f"""select name, date, description, deposit, withdrawal, `{CUSTOM_FIELD_QONTO_DATA}` as data
+        from `tabBank Transaction`
+        where docstatus = 0 and `{CUSTOM_FIELD_QONTO_ID}` is not null
+        {"".join(" and " + c for c in conditions)}""",
+        values,
+        as_dict=True
+    )
+
+    result = {"scanned": len(rows), "changed": 0, "failed": 0}
+    for row in rows:
+        try:
+            changes = bank_transaction_changes(row)
+            if not changes:
+                continue
+
+            if changes.keys() & {"date", "deposit", "withdrawal"}:
+                # Amounts drive unallocated_amount, and dates and amounts the
+                # ledger totals kept by the document hooks: go through the document
+                doc = frappe.get_doc(BANK_TRANSACTION, row.name)
+                doc.update(changes)
+                doc.save(ignore_permissions=True)
+            else:
+                frappe.db.set_value(BANK_TRANSACTION, row.name, changes)
+
+            result["changed"] += 1
+        except Exception as e:
+            result["failed"] += 1
+            frappe.log_error(
+                f"Failed to re-normalize Bank Transaction {row.name}: {str(e)}",
+                "Qonto Re-normalization"
+            )
+
+    return result
+
+
+def bank_transaction_changes(row) -> Dict[str, Any]:
+    """
+    Compare a stored Bank Transaction with its re-normalized payload.
+
+    Args:
+        row: Bank Transaction values with its stored payload as data
+
+    Returns:
+        Fields whose value differs, with their new value
+    """
+    if not row.data:
+        return {}
+
+    tx_data = normalize_transaction(json.loads(row.data))
+    amount = abs(flt(tx_data["amount"]))
+    expected = {
+        "date": getdate(tx_data["posting_date"]),
+        "description": tx_data["description"],
+        "deposit": amount if tx_data["amount"] >= 0 else 0,
+        "withdrawal": amount if tx_data["amount"] < 0 else 0,
+    }
+
+    changes = {}
+    for field, value in expected.items():
+        current = row.get(field)
+        if field in ("deposit", "withdrawal"):
+            differs = flt(current, 2) != flt(value, 2)
+        elif field == "date":
+            differs = current is None or getdate(current) != value
+        else:
+            differs = (current or "") != (value or "")
+        if differs:
+            changes[field] = value
+
+    return changes
+
+
+def _renormalize_staged(conditions: List[str], values: Dict[str, Any]) -> Dict[str, int]:
+    rows = frappe.db.sql(
+        f"""select {", ".join(("name",) + STAGING_REBUILT_COLUMNS + ("data",))}
+        from `tab{STAGING_DOCTYPE}`
+        where 1 = 1 {"".join(" and " + c for c in conditions)}""",
+        values,
+        as_dict=True
+    )
+
+    result = {"scanned": len(rows), "changed": 0, "failed": 0}
+    for row in rows:
+        try:
+            stored = json.loads(row.data)
+            rebuilt = to_staging_row(
+                row.qonto_bank_account_id, normalize_transaction(stored["raw_data"])
+            )
+            changes = {
+                column: rebuilt[column]
+                for column in STAGING_REBUILT_COLUMNS + ("data",)
+                if rebuilt[column] != row.get(column)
+            }
+            if not changes:
+                continue
+
+            # modified is left as is: it guards the materializer against races
+            frappe.db.set_value(STAGING_DOCTYPE, row.name, changes, update_modified=False)
+            result["changed"] += 1
+        except Exception as e:
+            result["failed"] += 1
+            frappe.log_error(
+                f"Failed to re-normalize staged transaction {row.name}: {str(e)}",
+                "Qonto Re-normalization"
+            )
+
+    return result
@@ -0,0 +1,279 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Compiled categorization rules for incoming transactions."""
+
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+import frappe
+
+from .constants import (
+    CACHE_KEY_RULES_VERSION,
+    CUSTOM_FIELD_CATEGORY,
+    CUSTOM_FIELD_COST_CENTER,
+    CUSTOM_FIELD_NOTE,
+)
+
+RULE_DOCTYPE = "Qonto Categorization Rule"
+
+# Matched field of a rule and its key in the raw Qonto transaction
+RULE_FIELDS = {
+    "Label": "label",
+    "Reference": "reference",
+    "Counterparty": "counterparty_name",
+    "Operation Type": "operation_type",
+}
+
+# Rule action field and the Bank Transaction field it sets
+RULE_ACTIONS = {
+    "category": CUSTOM_FIELD_CATEGORY,
+    "cost_center": CUSTOM_FIELD_COST_CENTER,
+    "note": CUSTOM_FIELD_NOTE,
+}
+
+# Field i of the subject sits between separators i and i + 1, with a line
+# break on each side so ^ and $ (multiline) anchor to the field
+_SEPARATORS = [chr(code) for code in range(1, len(RULE_FIELDS) + 2)]
+_SEPARATOR_RE = re.compile(r"[\n%s]" % "".join(_SEPARATORS))
+
+# Numbered group references, which shift once rules are combined
+_GROUP_REFERENCE_RE = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(\d")
+
+# Compiled rules of each site, kept for the life of the worker
+_compiled: Dict[str, "CompiledRules"] = {}
+
+
+class CompiledRules:
+    """
+    Rules compiled into one regular expression.
+
+    Each rule is a lookahead branch of a single alternation over all the
+    matched fields joined with separators. Branches are in priority order,
+    so the first one that matches is the rule that applies, and a row is
+    categorized with one regex call whatever the number of rules.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], version: Optional[str] = None):
+        self.rules = list(rules)
+        self.version = version
+        branches = [
+            "(?=%s)(?P<r%d>)" % (rule_pattern(rule), position)
+            for position, rule in enumerate(self.rules)
+        ]
+        self.regex = (
+            re.compile("|".join(branches), re.IGNORECASE | re.MULTILINE) if branches else None
+        )
+
+    def match(self, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Find the rule that applies to a transaction.
+
+        Args:
+            raw: Raw Qonto transaction
+
+        Returns:
+            First matching rule, or None
+        """
+        if not self.regex:
+            return None
+
+        found = self.regex.match(rule_subject(raw))
+        return self.rules[int(found.lastgroup[1:])] if found else None
+
+
+def rule_subject(raw: Dict[str, Any]) -> str:
+    """
+    Join the matched fields of a transaction between separators.
+
+    Args:
+        raw: Raw Qonto transaction
+
+    Returns:
+        Text the compiled rules run on
+    """
+    parts = [_SEPARATORS[0]]
+    for position, key in enumerate(RULE_FIELDS.values()):
+        parts.append("\n" + _SEPARATOR_RE.sub(" ", str(raw.get(key) or "")) + "\n")
+        parts.append(_SEPARATORS[position + 1])
+    return "".join(parts)
+
+
+def rule_pattern(rule: Dict[str, Any]) -> str:
+    """
+    Get the lookahead body of a rule, confined to its field.
+
+    Args:
+        rule: Rule with match_field, match_type and pattern
+
+    Returns:
+        Regular expression matched from the start of the subject
+    """
+    position = list(RULE_FIELDS).index(rule["match_field"])
+    start = re.escape(_SEPARATORS[position])
+    end = re.escape(_SEPARATORS[position + 1])
+    pattern = rule["pattern"]
+
+    if rule["match_type"] == "Regex":
+        body = f"[^{end}]*?(?:{pattern})"
+    elif rule["match_type"] == "Starts With":
+        body = re.escape(pattern)
+    elif rule["match_type"] == "Equals":
+        body = re.escape(pattern) + "\n" + end
+    else:
+        body = f"[^{end}]*?" + re.escape(pattern)
+
+    # The rest of the field up to its end separator keeps the match inside it
+    tail = "" if rule["match_type"] == "Equals" else f"[^{end}]*{end}"
+    return f"[^{start}]*{start}\n{body}{tail}"
+
+
+def validate_rule(rule: Dict[str, Any]):
+    """
+    Check a rule compiles on its own and into the combined expression.
+
+    Named groups and numbered group references are refused: the groups of
+    a rule are renumbered once it is combined with the rules before it.
+
+    Args:
+        rule: Rule with match_field, match_type and pattern
+
+    Raises:
+        re.error: If the pattern is invalid
+    """
+    if rule["match_type"] == "Regex":
+        if re.compile(rule["pattern"]).groupindex:
+            raise re.error("named groups are not supported")
+        if _GROUP_REFERENCE_RE.search(rule["pattern"]):
+            raise re.error("numbered group references are not supported")
+    CompiledRules([rule])
+
+
+def load_rules() -> List[Dict[str, Any]]:
+    """
+    Get the enabled rules in priority order.
+
+    Returns:
+        List of rule rows
+    """
+    return frappe.get_all(
+        RULE_DOCTYPE,
+        filters={"enabled": 1},
+        fields=["name", "match_field", "match_type", "pattern", *RULE_ACTIONS],
+        order_by="priority asc, name asc"
+    )
+
+
+def get_compiled_rules() -> CompiledRules:
+    """
+    Get the compiled rules, checked against the version stamp once per job.
+
+    The compiled expression is kept per worker and only rebuilt when a
+    rule change has bumped the version stamp in the cache.
+
+    Returns:
+        CompiledRules of the current site
+    """
+    if getattr(frappe.local, "qonto_rules", None) is not None:
+        return frappe.local.qonto_rules
+
+    version = frappe.cache().get_value(CACHE_KEY_RULES_VERSION)
+    if not version:
+        version = bump_rules_version()
+
+    compiled = _compiled.get(frappe.local.site)
+    if compiled is None or compiled.version != version:
+        compiled = CompiledRules(load_rules(), version)
+        _compiled[frappe.local.site] = compiled
+
+    frappe.local.qonto_rules = compiled
+    return compiled
+
+
+def bump_rules_version() -> str:
+    """
+    Stamp a new rules version so every worker recompiles on next use.
+
+    Returns:
+        New version stamp
+    """
+    version = frappe.generate_hash(length=10)
+    frappe.cache().set_value(CACHE_KEY_RULES_VERSION, version)
+    frappe.local.qonto_rules = None
+    return version
+
+
+def apply_rules(doc, raw: Dict[str, Any]) -> Optional[str]:
+    """
+    Categorize a Bank Transaction with the first matching rule.
+
+    Only empty fields are set, so manual edits are kept on re-sync, and
+    a hit is only counted when the rule set one of them.
+
+    Args:
+        doc: Bank Transaction document
+        raw: Raw Qonto transaction
+
+    Returns:
+        Name of the rule that matched, or None
+    """
+    rule = get_compiled_rules().match(raw)
+    if not rule:
+        return None
+
+    changed = False
+    for action, fieldname in RULE_ACTIONS.items():
+        if rule.get(action) and not doc.get(fieldname):
+            doc.set(fieldname, rule[action])
+            changed = True
+
+    if changed:
+        count_hit(rule["name"])
+    return rule["name"]
+
+
+def count_hit(rule_name: str):
+    """
+    Count a rule hit, written with the next commit.
+
+    Args:
+        rule_name: Qonto Categorization Rule name
+    """
+    hits = getattr(frappe.local, "qonto_rule_hits", None)
+    if not hits:
+        hits = frappe.local.qonto_rule_hits = Counter()
+        # Hits of a rolled back transaction are dropped with it
+        frappe.db.before_commit.add(flush_hits)
+        frappe.db.after_rollback.add(hits.clear)
+    hits[rule_name] += 1
+
+
+def get_hits_checkpoint() -> Counter:
+    """Copy of the hits counted so far, taken with a savepoint."""
+    return Counter(getattr(frappe.local, "qonto_rule_hits", None) or {})
+
+
+def rollback_hits(checkpoint: Counter):
+    """
+    Drop the hits counted since a checkpoint, as their rows were rolled back.
+
+    Args:
+        checkpoint: Hits returned by get_hits_checkpoint
+    """
+    hits = getattr(frappe.local, "qonto_rule_hits", None)
+    if hits:
+        # Cleared in place: the rollback callback holds this Counter
+        hits.clear()
+        hits.update(checkpoint)
+
+
+def flush_hits():
+    """Add the counted hits to the rules, one update per rule."""
+    hits = getattr(frappe.local, "qonto_rule_hits", None) or {}
+    for rule_name, count in hits.items():
+        frappe.db.sql(
+            f"update `tab{RULE_DOCTYPE}` set hits = coalesce(hits, 0) + %s where name = %s",
+            (count, rule_name)
+        )
+    frappe.local.qonto_rule_hits = None
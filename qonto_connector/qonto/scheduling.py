@@ -0,0 +1,140 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Adaptive per-account polling schedule."""
+
+from datetime import datetime
+from typing import List, Optional
+
+import frappe
+from frappe.utils import add_to_date, get_datetime, now_datetime
+
+from .constants import (
+    DEFAULT_MAX_POLL_INTERVAL_MINUTES,
+    DEFAULT_MIN_POLL_INTERVAL_MINUTES,
+    DEFAULT_SYNC_INTERVAL_MINUTES,
+    SCHEDULED_SYNC_JOB_ID,
+    SYNC_LOCK_TIMEOUT,
+    WEBHOOK_SAFETY_POLL_MINUTES,
+)
+
+
+def get_interval_bounds(settings):
+    """
+    Get the base, minimum and maximum poll intervals.
+
+    Args:
+        settings: QontoSettings document
+
+    Returns:
+        Tuple of (base, minimum, maximum) in minutes
+    """
+    minimum = settings.get("min_poll_interval_minutes") or DEFAULT_MIN_POLL_INTERVAL_MINUTES
+    maximum = settings.get("max_poll_interval_minutes") or DEFAULT_MAX_POLL_INTERVAL_MINUTES
+    base = settings.get("poll_interval_minutes") or DEFAULT_SYNC_INTERVAL_MINUTES
+    return min(max(base, minimum), maximum), minimum, maximum
+
+
+def next_poll_interval(
+    current: Optional[int],
+    items: int,
+    base: int,
+    minimum: int,
+    maximum: int
+) -> int:
+    """
+    Compute the interval until the next poll of an account.
+
+    Halved when the last poll brought transactions, lengthened by the base
+    interval when it brought none, so busy accounts converge to the minimum
+    and dormant ones to the maximum.
+
+    Args:
+        current: Interval used for the last poll, None for a new account
+        items: Transactions ingested by the last poll
+        base: Starting interval
+        minimum: Lower bound
+        maximum: Upper bound
+
+    Returns:
+        Interval in minutes
+    """
+    current = current or base
+
+    if items:
+        interval = current // 2
+    else:
+        interval = current + base
+
+    return max(minimum, min(maximum, interval))
+
+
+def reschedule(mapping, settings, items: Optional[int], now: Optional[datetime] = None):
+    """
+    Set the interval and next due time of a mapping after a poll.
+
+    Args:
+        mapping: QontoAccountMapping row
+        settings: QontoSettings document
+        items: Transactions ingested, None when the poll failed
+        now: Time of the poll
+    """
+    now = now or now_datetime()
+
+    if settings.get("enable_webhooks"):
+        # Webhooks bring new transactions, polling is only a safety net
+        interval = settings.get("webhook_safety_poll_minutes") or WEBHOOK_SAFETY_POLL_MINUTES
+    elif items is None:
+        # Failed poll: retry at the same pace
+        interval = mapping.get("poll_interval_minutes") or get_interval_bounds(settings)[0]
+    else:
+        interval = next_poll_interval(
+            mapping.get("poll_interval_minutes"), items, *get_interval_bounds(settings)
+        )
+
+    mapping.poll_interval_minutes = interval
+    mapping.next_sync_due = add_to_date(now, minutes=interval)
+
+
+def get_due_mappings(settings, now: Optional[datetime] = None) -> List:
+    """
+    Get the active mappings whose next poll is due.
+
+    Args:
+        settings: QontoSettings document
+        now: Reference time
+
+    Returns:
+        List of QontoAccountMapping rows
+    """
+    now = now or now_datetime()
+    return [
+        m for m in settings.account_mappings
+        if m.active and (not m.get("next_sync_due") or get_datetime(m.next_sync_due) <= now)
+    ]
+
+
+def scheduled_sync():
+    """
+    Cron entry point of the polling sync, run every minute.
+
+    Enqueues a sync of the accounts that are due only, so idle accounts
+    cost neither API calls nor worker time until their interval elapses.
+    """
+    settings = frappe.get_single("Qonto Settings")
+
+    if not settings.connected:
+        return
+
+    due = get_due_mappings(settings)
+    if not due:
+        return
+
+    frappe.enqueue(
+        "qonto_connector.qonto.sync.schedule_all_syncs",
+        queue="long",
+        timeout=SYNC_LOCK_TIMEOUT,
+        job_id=SCHEDULED_SYNC_JOB_ID,
+        deduplicate=True,
+        account_ids=[m.qonto_bank_account_id for m in due]
+    )
@@ -0,0 +1,179 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Indexed search over the staged copy of every Qonto transaction, with keyset pagination."""
+
+import base64
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+import frappe
+from frappe.utils import add_days, cint, flt, get_datetime, getdate
+
+from .constants import CUSTOM_FIELD_QONTO_ID, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
+from .staging import STAGING_DOCTYPE, normalize_iban
+
+# Every index ends with the sort key, so a filtered page is an index range scan
+SEARCH_INDEXES = {
+    "qonto_search_date": ["posting_date", "name"],
+    "qonto_search_account": ["qonto_bank_account_id", "posting_date", "name"],
+    "qonto_search_iban": ["counterparty_iban", "posting_date", "name"],
+    "qonto_search_card": ["card_last_digits", "posting_date", "name"],
+    "qonto_search_label": ["label", "posting_date", "name"],
+    "qonto_search_counterparty": ["counterparty", "posting_date", "name"],
+    "qonto_search_amount": ["amount_cents", "posting_date"],
+}
+
+RESULT_FIELDS = (
+    "name",
+    "qonto_bank_account_id",
+    "posting_date",
+    "status",
+    "side",
+    "amount_cents",
+    "currency",
+    "counterparty",
+    "counterparty_iban",
+    "card_last_digits",
+    "label",
+    "operation_type",
+)
+
+
+def ensure_search_indexes():
+    """
+    Create the composite indexes used by the search.
+    Called after migration.
+    """
+    for index_name, fields in SEARCH_INDEXES.items():
+        frappe.db.add_index(STAGING_DOCTYPE, fields, index_name)
+
+
+def encode_cursor(posting_date, name: str) -> str:
+    """Opaque cursor pointing after a result row."""
+    payload = json.dumps([str(posting_date), name])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor returned by a previous page.
+
+    Raises:
+        frappe.ValidationError: If the cursor is malformed
+    """
+    try:
+        posting_date, name = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(get_datetime(posting_date)), str(name)
+    except Exception:
+        frappe.throw(f"Invalid search cursor: {cursor}")
+
+
+def build_search_query(
+    filters: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[str, List[Any]]:
+    """
+    Build the SQL of one search page.
+
+    Exact and prefix filters only, so every condition can use an index;
+    rows are ordered by (posting_date, name) descending and the cursor
+    resumes strictly after the last row of the previous page.
+
+    Args:
+        filters: Search filters (see search_transactions)
+        limit: Rows per page
+        cursor: Cursor of the previous page
+
+    Returns:
+        Tuple of (SQL, values)
+    """
+    conditions = ["t.posting_date is not null"]
+    values: List[Any] = []
+
+    for field in ("qonto_bank_account_id", "side", "status", "operation_type", "card_last_digits"):
+        if filters.get(field):
+            conditions.append(f"t.{field} = %s")
+            values.append(filters[field])
+
+    if filters.get("counterparty_iban"):
+        conditions.append("t.counterparty_iban = %s")
+        values.append(normalize_iban(filters["counterparty_iban"]))
+
+    for field in ("label", "counterparty"):
+        if filters.get(field):
+            # Prefix match keeps the index usable, unlike a leading wildcard
+            conditions.append(f"t.{field} like %s")
+            values.append(_escape_like(filters[field]) + "%")
+
+    if filters.get("amount_min") not in (None, ""):
+        conditions.append("t.amount_cents >= %s")
+        values.append(round(flt(filters["amount_min"]) * 100))
+    if filters.get("amount_max") not in (None, ""):
+        conditions.append("t.amount_cents <= %s")
+        values.append(round(flt(filters["amount_max"]) * 100))
+
+    if filters.get("from_date"):
+        conditions.append("t.posting_date >= %s")
+        values.append(getdate(filters["from_date"]))
+    if filters.get("to_date"):
+        # Inclusive end date
+        conditions.append("t.posting_date < %s")
+        values.append(add_days(getdate(filters["to_date"]), 1))
+
+    if cursor:
+        posting_date, name = decode_cursor(cursor)
+        conditions.append("(t.posting_date < %s or (t.posting_date = %s and t.name < %s))")
+        values.extend([posting_date, posting_date, name])
+
+    sql = f"""
+        select {", ".join(f"t.{field}" for field in RESULT_FIELDS)},
+            bt.name as bank_transaction
+        from `tab{STAGING_DOCTYPE}` t
+        left join `tabBank Transaction` bt on bt.`{CUSTOM_FIELD_QONTO_ID}` = t.name
+        where {" and ".join(conditions)}
+        order by t.posting_date desc, t.name desc
+        limit %s
+    """
+    values.append(limit + 1)
+    return sql, values
+
+
+def search_transactions(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: int = SEARCH_DEFAULT_LIMIT,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Search staged transactions.
+
+    Args:
+        filters: Any of qonto_bank_account_id, side, status, operation_type,
+            card_last_digits, counterparty_iban (exact), label and
+            counterparty (prefix), amount_min and amount_max (absolute
+            amounts), from_date and to_date (posting date, inclusive)
+        limit: Rows per page, capped at SEARCH_MAX_LIMIT
+        cursor: next_cursor of the previous page
+
+    Returns:
+        Dictionary with results and next_cursor (None on the last page)
+    """
+    limit = max(1, min(cint(limit) or SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT))
+    sql, values = build_search_query(filters or {}, limit, cursor)
+    rows = frappe.db.sql(sql, values, as_dict=True)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].posting_date, rows[-1].name)
+
+    for row in rows:
+        row["qonto_id"] = row.pop("name")
+        row["amount"] = flt(row["amount_cents"]) / 100
+
+    return {"results": rows, "next_cursor": next_cursor}
+
+
+def _escape_like(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
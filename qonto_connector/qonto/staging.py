@@ -0,0 +1,325 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Two-stage ingestion: bulk staging of fetched transactions and materialization."""
+
+import json
+from itertools import islice
+from typing import Dict, Any, Iterable, List, Optional
+
+import frappe
+from frappe.utils import now_datetime
+
+from .batching import AdaptiveCommitBatcher
+from .constants import (
+    MATERIALIZE_BATCH_SIZE,
+    MATERIALIZE_JOB_ID,
+    MATERIALIZE_QUEUE,
+    MATERIALIZE_TIMEOUT,
+    STAGING_CHUNK_SIZE,
+)
+from .metrics import get_current_metrics
+from .post_sync import enqueue_post_sync
+from .utils import get_ingested_statuses, log_sync, parse_qonto_datetime
+
+STAGING_DOCTYPE = "Qonto Transaction"
+
+# Typed columns written by the fetch stage, after the standard ones
+STAGING_COLUMNS = (
+    "qonto_id",
+    "qonto_bank_account_id",
+    "updated_at",
+    "posting_date",
+    "status",
+    "side",
+    "amount_cents",
+    "currency",
+    "counterparty",
+    "counterparty_iban",
+    "card_last_digits",
+    "label",
+    "operation_type",
+    "data",
+)
+STANDARD_COLUMNS = ("name", "creation", "modified", "modified_by", "owner", "docstatus", "idx")
+
+
+def is_staging_enabled() -> bool:
+    """Whether fetched transactions go through the staging table."""
+    return bool(frappe.db.get_single_value("Qonto Settings", "staged_ingestion"))
+
+
+def to_staging_row(qonto_bank_account_id: str, tx_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the typed staging columns of a normalized transaction.
+
+    Args:
+        qonto_bank_account_id: Qonto bank account ID
+        tx_data: Normalized transaction data
+
+    Returns:
+        Column values keyed by field name
+    """
+    raw = tx_data.get("raw_data") or {}
+    amount_cents = raw.get("amount_cents")
+    if amount_cents is None:
+        amount_cents = round(abs(float(tx_data.get("amount") or 0)) * 100)
+
+    return {
+        "qonto_id": tx_data["qonto_id"],
+        "qonto_bank_account_id": raw.get("bank_account_id") or qonto_bank_account_id,
+        "updated_at": parse_qonto_datetime(raw.get("updated_at")),
+        "posting_date": parse_qonto_datetime(tx_data.get("posting_date")),
+        "status": tx_data.get("status"),
+        "side": tx_data.get("side"),
+        "amount_cents": abs(int(amount_cents)),
+        "currency": tx_data.get("currency"),
+        "counterparty": (raw.get("counterparty_name") or "")[:140] or None,
+        "counterparty_iban": get_counterparty_iban(raw),
+        "card_last_digits": raw.get("card_last_digits") or None,
+        "label": (raw.get("label") or "")[:140] or None,
+        "operation_type": tx_data.get("operation_type"),
+        "data": json.dumps(tx_data),
+    }
+
+
+def get_counterparty_iban(raw: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the counterparty account number of a transfer or income.
+
+    Args:
+        raw: Raw Qonto transaction
+
+    Returns:
+        IBAN without spaces in upper case, or None
+    """
+    for key in ("transfer", "income", "direct_debit"):
+        details = raw.get(key)
+        if isinstance(details, dict) and details.get("counterparty_account_number"):
+            return normalize_iban(details["counterparty_account_number"])
+    return None
+
+
+def normalize_iban(iban: Optional[str]) -> Optional[str]:
+    """IBAN without spaces in upper case, as stored in the staging table."""
+    return "".join((iban or "").split()).upper() or None
+
+
+def stage_transactions(
+    qonto_bank_account_id: str,
+    transactions: List[Dict[str, Any]],
+    sync_status: str = "Pending"
+) -> int:
+    """
+    Upsert normalized transactions into the staging table in one statement.
+
+    A version older than the staged one is ignored, so a catch-up window
+    fetched alongside a recent sync never replaces newer data. A row goes
+    back to Pending only when Qonto reports a newer updated_at, so
+    overlapping fetches do not materialize the same version twice. Rows
+    already ingested are written as Synced: they only refresh the
+    searchable columns and leave the status of a row waiting for the
+    materializer as it is.
+
+    Args:
+        qonto_bank_account_id: Qonto bank account ID
+        transactions: Normalized transactions
+        sync_status: Pending to materialize, Synced if already ingested
+
+    Returns:
+        Number of rows staged
+    """
+    # A statement may not touch the same key twice: keep the last version
+    rows = {
+        tx["qonto_id"]: to_staging_row(qonto_bank_account_id, tx) for tx in transactions
+    }
+    if not rows:
+        return 0
+
+    metrics = get_current_metrics()
+    now = now_datetime()
+    user = frappe.session.user if getattr(frappe.local, "session", None) else "Administrator"
+
+    columns = STANDARD_COLUMNS + STAGING_COLUMNS + ("sync_status",)
+    values = []
+    for qonto_id, row in rows.items():
+        values.extend((qonto_id, now, now, user, user, 0, 0))
+        values.extend(row[column] for column in STAGING_COLUMNS)
+        values.append(sync_status)
+
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows))
+    updated = STAGING_COLUMNS[1:] + ("modified",)
+
+    if frappe.db.db_type == "postgres":
+        table = f'"tab{STAGING_DOCTYPE}"'
+        column_list = ", ".join(f'"{c}"' for c in columns)
+        # {} is the comparison: >= to take the columns, > to queue again
+        newer = (
+            f'{table}."updated_at" is null or excluded."updated_at" is null'
+            f' or excluded."updated_at" {{}} {table}."updated_at"'
+        )
+        assignments = [
+            f'"{c}" = case when {newer.format(">=")} then excluded."{c}" else {table}."{c}" end'
+            for c in updated
+        ]
+        if sync_status == "Pending":
+            assignments.insert(0, (
+                f'"sync_status" = case when {newer.format(">")}'
+                f' then \'Pending\' else {table}."sync_status" end'
+            ))
+        on_conflict = 'on conflict ("name") do update set ' + ", ".join(assignments)
+    else:
+        table = f"`tab{STAGING_DOCTYPE}`"
+        column_list = ", ".join(f"`{c}`" for c in columns)
+        newer = (
+            "`updated_at` is null or values(`updated_at`) is null"
+            " or values(`updated_at`) {} `updated_at`"
+        )
+        # Assignments apply left to right: once updated_at is overwritten the
+        # >= comparison stays true for the rest, and sync_status comes first
+        assignments = [
+            f"`{c}` = if({newer.format('>=')}, values(`{c}`), `{c}`)" for c in updated
+        ]
+        if sync_status == "Pending":
+            assignments.insert(
+                0, f"`sync_status` = if({newer.format('>')}, 'Pending', `sync_status`)"
+            )
+        on_conflict = "on duplicate key update " + ", ".join(assignments)
+
+    with metrics.phase("stage"):
+        frappe.db.sql(
+            f"insert into {table} ({column_list}) values {placeholders} {on_conflict}",
+            values
+        )
+
+    if sync_status == "Pending":
+        metrics.incr("staged", len(rows))
+    return len(rows)
+
+
+def stage_stream(
+    qonto_bank_account_id: str,
+    transactions: Iterable[Dict[str, Any]],
+    chunk_size: int = STAGING_CHUNK_SIZE
+) -> int:
+    """
+    Stage a stream of transactions in chunks, committing each chunk.
+
+    Args:
+        qonto_bank_account_id: Qonto bank account ID
+        transactions: Normalized transactions, e.g. from iter_transactions
+        chunk_size: Rows per insert statement
+
+    Returns:
+        Number of rows staged
+    """
+    from .sync import timed_commit
+
+    count = 0
+    iterator = iter(transactions)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        count += stage_transactions(qonto_bank_account_id, chunk)
+        timed_commit()
+
+    return count
+
+
+def enqueue_materializer(after_commit: bool = False):
+    """
+    Enqueue the materializer unless it is already queued or running.
+
+    Args:
+        after_commit: Enqueue only once the current transaction commits
+    """
+    frappe.enqueue(
+        "qonto_connector.qonto.staging.materialize_pending",
+        queue=MATERIALIZE_QUEUE,
+        timeout=MATERIALIZE_TIMEOUT,
+        job_id=MATERIALIZE_JOB_ID,
+        deduplicate=True,
+        enqueue_after_commit=after_commit
+    )
+
+
+def schedule_materializer():
+    """Scheduled safety net: enqueue the materializer if rows are pending."""
+    if frappe.db.exists(STAGING_DOCTYPE, {"sync_status": "Pending"}):
+        enqueue_materializer()
+
+
+def materialize_pending(batch_size: int = MATERIALIZE_BATCH_SIZE) -> int:
+    """
+    Turn pending staged rows into Bank Transactions until none is left.
+
+    Args:
+        batch_size: Staged rows read per query
+
+    Returns:
+        Number of Bank Transactions created or updated
+    """
+    from .pending import RETRACTED_STATUSES, retract_transaction
+    from .sync import ingest_transaction
+
+    settings = frappe.get_single("Qonto Settings")
+    mappings = {m.qonto_bank_account_id: m for m in settings.account_mappings if m.active}
+    batcher = AdaptiveCommitBatcher()
+    statuses = get_ingested_statuses()
+    synced = 0
+    processed = 0
+
+    while True:
+        rows = frappe.get_all(
+            STAGING_DOCTYPE,
+            filters={"sync_status": "Pending"},
+            fields=["name", "qonto_bank_account_id", "status", "modified", "data"],
+            order_by="updated_at asc, name asc",
+            limit=batch_size
+        )
+        if not rows:
+            break
+
+        results = []
+        for row in rows:
+            mapping = mappings.get(row.qonto_bank_account_id)
+
+            if not mapping:
+                results.append((row, "Skipped", "No active mapping"))
+            elif row.status in RETRACTED_STATUSES:
+                retract_transaction(row.name, row.status)
+                results.append((row, "Synced", None))
+            elif row.status not in statuses:
+                results.append((row, "Skipped", f"Transaction status {row.status}"))
+            elif ingest_transaction(mapping, json.loads(row.data), batcher, mirror=False):
+                results.append((row, "Synced", None))
+                synced += 1
+            else:
+                results.append((row, "Failed", "Upsert failed, see Qonto Sync Log"))
+
+            if batcher.add():
+                batcher.commit()
+
+        for row, status, error in results:
+            # Rows staged again meanwhile keep their newer Pending version
+            frappe.db.sql(
+                f"""update `tab{STAGING_DOCTYPE}` set sync_status = %s, error = %s
+                where name = %s and modified = %s""",
+                (status, error, row.name, row.modified)
+            )
+        batcher.commit()
+        processed += len(rows)
+
+    if processed:
+        log_sync(
+            "INFO",
+            f"Staged transactions materialized. {synced} transactions synced.",
+            {"processed": processed},
+            items_processed=synced
+        )
+
+    if synced:
+        enqueue_post_sync()
+
+    return synced
@@ -3,19 +3,36 @@
 
 """Transaction sync engine."""
 
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
 import frappe
-from frappe.utils import now_datetime, get_datetime, add_days
+from frappe.utils import now_datetime, get_datetime, add_days, cint
 
+from .batching import AdaptiveCommitBatcher
 from .client import QontoClient
+from .dead_letter import record_dead_letter, resolve_dead_letter
 from .mapping import upsert_bank_transaction
-from .utils import log_sync
-from .constants import CACHE_KEY_SYNC_RUNNING, SYNC_LOCK_TIMEOUT
-
-
-def schedule_all_syncs():
+from .metrics import start_run, finish_run, get_current_metrics
+from .post_sync import enqueue_post_sync
+from .profiling import SyncProfiler
+from .rules import get_hits_checkpoint, rollback_hits
+from .scheduling import reschedule
+from .staging import enqueue_materializer, is_staging_enabled, stage_stream, stage_transactions
+from .tracing import span, start_span, with_correlation
+from .utils import get_ingested_statuses, log_sync
+from .constants import CACHE_KEY_SYNC_RUNNING, SYNC_LOCK_TIMEOUT, TRANSACTION_SAVEPOINT
+
+
+def schedule_all_syncs(profile: bool = False, account_ids: Optional[List[str]] = None):
     """
-    Scheduled task to sync all active account mappings.
-    Called by scheduler every 15 minutes.
+    Sync active account mappings under the sync lock.
+    Enqueued by the scheduler with the accounts that are due.
+
+    Args:
+        profile: Run the sync under the profiler
+        account_ids: Qonto account IDs to sync, all active mappings by default
     """
     try:
         settings = frappe.get_single("Qonto Settings")
@@ -37,7 +54,7 @@ def schedule_all_syncs():
         )
 
         try:
-            sync_all_accounts(settings)
+            sync_all_accounts(settings, profile=profile, account_ids=account_ids)
         finally:
             frappe.cache().delete_value(CACHE_KEY_SYNC_RUNNING)
 
@@ -47,16 +64,25 @@ def schedule_all_syncs():
         raise
 
 
-def sync_all_accounts(settings):
+def sync_all_accounts(
+    settings,
+    profile: bool = False,
+    account_ids: Optional[List[str]] = None
+):
     """
     Sync all active account mappings.
 
     Args:
         settings: QontoSettings document
+        profile: Run under the profiler even if profiling is off in settings
+        account_ids: Qonto account IDs to sync, all active mappings by default
     """
     client = QontoClient(settings)
 
-    active_mappings = [m for m in settings.account_mappings if m.active]
+    active_mappings = [
+        m for m in settings.account_mappings
+        if m.active and (account_ids is None or m.qonto_bank_account_id in account_ids)
+    ]
 
     if not active_mappings:
         log_sync("INFO", "No active account mappings found.")
@@ -65,39 +91,63 @@ def sync_all_accounts(settings):
     total_synced = 0
     errors = []
     start_time = frappe.utils.now()
+    metrics = start_run()
+    profiler = _start_profiler(settings, profile, "all accounts")
+
+    with span(
+        "run",
+        export=bool(settings.get("enable_tracing")),
+        mappings=len(active_mappings)
+    ) as run_span:
+        for mapping in active_mappings:
+            try:
+                with metrics.account(mapping.qonto_bank_account_id), span(
+                    "account", account_id=mapping.qonto_bank_account_id
+                ) as account_span:
+                    count = sync_account(
+                        client,
+                        mapping,
+                        settings.default_sync_lookback_days
+                    )
+                    account_span.set(items_processed=count)
+                total_synced += count
+
+                # Update mapping
+                mapping.last_synced_at = now_datetime()
+                reschedule(mapping, settings, count)
+                # Note: We don't save here to avoid nested saves
+
+            except Exception as e:
+                reschedule(mapping, settings, None)
+                error_msg = f"Error syncing {mapping.qonto_bank_account_id}: {str(e)}"
+                errors.append(error_msg)
+                log_sync(
+                    "ERROR",
+                    error_msg,
+                    {
+                        "account_id": mapping.qonto_bank_account_id,
+                        "error": str(e),
+                        "correlation_id": run_span.correlation_id
+                    }
+                )
+                frappe.log_error(with_correlation(error_msg), "Qonto Account Sync")
+
+        # Update settings
+        settings.last_sync_at = now_datetime()
+        if errors:
+            settings.last_error = "\n".join(errors[-5:])  # Keep last 5 errors
+        else:
+            settings.last_error = None
 
-    for mapping in active_mappings:
         try:
-            count = sync_account(
-                client,
-                mapping,
-                settings.default_sync_lookback_days
-            )
-            total_synced += count
-
-            # Update mapping
-            mapping.last_synced_at = now_datetime()
-            # Note: We don't save here to avoid nested saves
-
-        except Exception as e:
-            error_msg = f"Error syncing {mapping.qonto_bank_account_id}: {str(e)}"
-            errors.append(error_msg)
-            log_sync(
-                "ERROR",
-                error_msg,
-                {"account_id": mapping.qonto_bank_account_id, "error": str(e)}
-            )
-            frappe.log_error(error_msg, "Qonto Account Sync")
-
-    # Update settings
-    settings.last_sync_at = now_datetime()
-    if errors:
-        settings.last_error = "\n".join(errors[-5:])  # Keep last 5 errors
-    else:
-        settings.last_error = None
+            settings.save(ignore_permissions=True)
+            timed_commit()
+        finally:
+            client.close()
+            if profiler:
+                profiler.stop()
 
-    settings.save(ignore_permissions=True)
-    frappe.db.commit()
+        run_span.set(items_processed=total_synced, errors=len(errors))
 
     # Calculate duration
     end_time = frappe.utils.now()
@@ -105,23 +155,32 @@ def sync_all_accounts(settings):
         (get_datetime(end_time) - get_datetime(start_time)).total_seconds() * 1000
     )
 
-    log_sync(
+    sync_log = log_sync(
         "INFO",
         f"Sync completed. {total_synced} transactions synced.",
         {
             "total": total_synced,
             "errors": len(errors),
-            "mappings": len(active_mappings)
+            "mappings": len(active_mappings),
+            "trace_id": run_span.trace_id
         },
         duration_ms=duration_ms,
-        items_processed=total_synced
+        items_processed=total_synced,
+        metrics=finish_run(metrics)
     )
 
+    if profiler:
+        profiler.attach_to(sync_log)
+
+    if total_synced:
+        enqueue_post_sync()
+
 
 def sync_account(
     client: QontoClient,
     mapping,
-    default_lookback_days: int
+    default_lookback_days: int,
+    staged: Optional[bool] = None
 ) -> int:
     """
     Sync transactions for a single account mapping.
@@ -130,52 +189,280 @@ def sync_account(
         client: QontoClient instance
         mapping: QontoAccountMapping document
         default_lookback_days: Default number of days to look back
+        staged: Stage instead of upserting Bank Transactions, per settings by default
 
     Returns:
         Number of transactions synced
     """
     # Determine sync start date
     if mapping.last_synced_at:
-        sync_from = get_datetime(mapping.last_synced_at).isoformat()
+        sync_from = get_datetime(mapping.last_synced_at)
     else:
-        sync_from = add_days(now_datetime(), -default_lookback_days).isoformat()
+        sync_from = add_days(now_datetime(), -default_lookback_days)
+
+    # Far behind: today's activity first, the older gap in the background
+    sync_from, catch_up = recent_first_window(
+        sync_from,
+        now_datetime(),
+        cint(frappe.db.get_single_value("Qonto Settings", "recent_first_hours"))
+    )
+    if catch_up:
+        # A catch-up left unfinished by an earlier failed run covers its part
+        catch_up = uncovered_gap(mapping.qonto_bank_account_id, *catch_up)
+
+    if staged is None:
+        staged = is_staging_enabled()
+
+    count = sync_range(client, mapping, sync_from, staged=staged)
+
+    # Only once the recent window is in, so a failed run leaves no backfill behind
+    if catch_up and not enqueue_catch_up(mapping, *catch_up):
+        # The watermark moves on after this run: sync the gap now rather than skip it
+        count += sync_range(client, mapping, catch_up[0], catch_up[1], staged=staged)
+
+    return count
+
+
+def sync_range(
+    client: QontoClient,
+    mapping,
+    updated_at_from: datetime,
+    updated_at_to: Optional[datetime] = None,
+    staged: bool = False
+) -> int:
+    """
+    Fetch and ingest, or stage, the transactions updated in a range.
+
+    Args:
+        client: QontoClient instance
+        mapping: QontoAccountMapping document
+        updated_at_from: Start of the range
+        updated_at_to: End of the range, open by default
+        staged: Stage instead of upserting Bank Transactions
+
+    Returns:
+        Number of transactions synced
+    """
+    transactions = client.iter_transactions(
+        mapping.qonto_bank_account_id,
+        updated_at_from=updated_at_from.isoformat(),
+        updated_at_to=updated_at_to.isoformat() if updated_at_to else None,
+        status=get_ingested_statuses()
+    )
+
+    if staged:
+        # Fetch stage only: Bank Transactions are built by the materializer
+        count = stage_stream(mapping.qonto_bank_account_id, transactions)
+        if count:
+            enqueue_materializer()
+        return count
 
     count = 0
+    batch = None
+    batcher = AdaptiveCommitBatcher()
 
     # Fetch and process transactions
-    for tx_data in client.iter_transactions(
-        mapping.qonto_bank_account_id,
-        updated_at_from=sync_from,
-        status=["settled"]  # Only sync settled transactions
-    ):
-        try:
-            upsert_bank_transaction(mapping, tx_data)
+    for tx_data in transactions:
+        if batch is None:
+            batch = start_span(
+                "batch", account_id=mapping.qonto_bank_account_id, batch_size=batcher.size
+            )
+
+        if ingest_transaction(mapping, tx_data, batcher):
             count += 1
 
-            # Commit every 50 transactions
-            if count % 50 == 0:
-                frappe.db.commit()
+            if batcher.add():
+                batch.finish(rows=batcher.commit())
+                batch = None
+
+    rows = batcher.commit()
+    if batch is not None:
+        batch.finish(rows=rows)
+    return count
+
+
+def recent_first_window(
+    sync_from: datetime,
+    now: datetime,
+    recent_hours: int
+) -> Tuple[datetime, Optional[Tuple[datetime, datetime]]]:
+    """
+    Split the range to sync into a recent window and an older gap.
+
+    Args:
+        sync_from: Start of the range to sync
+        now: End of the range
+        recent_hours: Size of the recent window, 0 to never split
+
+    Returns:
+        (start of the range synced now, (from, to) of the gap left to the
+        catch-up, or None)
+    """
+    recent_from = now - timedelta(hours=recent_hours)
+    if recent_hours <= 0 or sync_from >= recent_from:
+        return sync_from, None
+    return recent_from, (sync_from, recent_from)
+
+
+def uncovered_gap(
+    qonto_bank_account_id: str,
+    from_date: datetime,
+    to_date: datetime
+) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Trim the part of a gap an unfinished catch-up already covers.
+
+    A failed catch-up found on the way gets its failed windows enqueued
+    again instead of a new backfill over the same range.
+
+    Args:
+        qonto_bank_account_id: Qonto bank account ID
+        from_date: Start of the gap
+        to_date: End of the gap
+
+    Returns:
+        (from, to) still to cover, or None
+    """
+    from .backfill import enqueue_backfill, get_open_catch_up
+
+    existing = get_open_catch_up(qonto_bank_account_id, from_date)
+    if not existing:
+        return from_date, to_date
+
+    if existing.status == "Failed":
+        enqueue_backfill(existing.name)
+
+    covered_to = get_datetime(existing.to_date)
+    return (covered_to, to_date) if covered_to < to_date else None
+
+
+def enqueue_catch_up(mapping, from_date: datetime, to_date: datetime) -> Optional[str]:
+    """
+    Fill the gap skipped by a recent-first sync with a catch-up backfill.
 
-        except Exception as e:
-            error_msg = f"Error processing transaction {tx_data.get('qonto_id')}: {str(e)}"
-            log_sync(
-                "ERROR",
-                error_msg,
-                {"transaction": tx_data, "error": str(e)}
+    The backfill keeps its own per-window checkpoint, so the account
+    watermark can move on and a failed window is retried on its own. Its
+    windows run on the backfill queue, after the recent window is synced.
+
+    Args:
+        mapping: QontoAccountMapping document
+        from_date: Start of the gap
+        to_date: End of the gap
+
+    Returns:
+        Name of the Qonto Backfill, or None if it could not be created
+    """
+    from .backfill import create_backfill
+
+    try:
+        return create_backfill(
+            mapping.qonto_bank_account_id, from_date, to_date, catch_up=True
+        )
+    except Exception as e:
+        frappe.log_error(
+            with_correlation(
+                f"Failed to queue catch-up of {mapping.qonto_bank_account_id} "
+                f"from {from_date} to {to_date}: {str(e)}"
+            ),
+            "Qonto Sync"
+        )
+        return None
+
+
+def ingest_transaction(mapping, tx_data, batcher=None, mirror: bool = True) -> bool:
+    """
+    Upsert one normalized transaction inside a savepoint.
+
+    The transaction is also written to the staging table as Synced, so
+    the search sees what every ingestion path wrote.
+
+    A failing row is rolled back to the savepoint and logged, so none of its
+    partial writes reach the commit of the batch, and kept as a dead letter
+    for replay. A deadlock rolls back the whole transaction and is raised to
+    fail the account.
+
+    Args:
+        mapping: QontoAccountMapping document
+        tx_data: Normalized transaction data
+        batcher: AdaptiveCommitBatcher told about lock wait timeouts
+        mirror: Write the staging row; off when it comes from that table
+
+    Returns:
+        True if the transaction was upserted
+    """
+    metrics = get_current_metrics()
+
+    frappe.db.savepoint(TRANSACTION_SAVEPOINT)
+    hits = get_hits_checkpoint()
+    try:
+        with metrics.phase("upsert"):
+            upsert_bank_transaction(mapping, tx_data)
+        if mirror:
+            stage_transactions(mapping.qonto_bank_account_id, [tx_data], sync_status="Synced")
+        resolve_dead_letter(tx_data.get("qonto_id"))
+        frappe.db.release_savepoint(TRANSACTION_SAVEPOINT)
+        metrics.incr("transactions")
+        return True
+
+    except Exception as e:
+        if frappe.db.is_deadlocked(e):
+            # The server already rolled back the transaction, savepoint included
+            frappe.db.rollback()
+            raise
+
+        frappe.db.rollback(save_point=TRANSACTION_SAVEPOINT)
+        rollback_hits(hits)
+        if batcher and frappe.db.is_timedout(e):
+            batcher.record_lock_timeout()
+
+        metrics.incr("transaction_errors")
+        error_msg = with_correlation(
+            f"Error processing transaction {tx_data.get('qonto_id')}: {str(e)}"
+        )
+        log_sync(
+            "ERROR",
+            error_msg,
+            {"transaction": tx_data, "error": str(e)}
+        )
+        frappe.log_error(error_msg, "Qonto Transaction Sync")
+
+        try:
+            # The watermark moves on: the dead letter is what retries the row
+            record_dead_letter(mapping.qonto_bank_account_id, tx_data, e)
+        except Exception as dead_letter_error:
+            frappe.log_error(
+                f"Failed to record dead letter {tx_data.get('qonto_id')}: {str(dead_letter_error)}",
+                "Qonto Dead Letter"
             )
-            frappe.log_error(error_msg, "Qonto Transaction Sync")
-            # Continue with next transaction
+        # Continue with next transaction
+        return False
+
+
+def timed_commit() -> float:
+    """
+    Commit the current transaction, timed as the commit phase.
 
+    Returns:
+        Commit latency in milliseconds
+    """
+    metrics = get_current_metrics()
+    metrics.incr("commits")
+
+    start = time.perf_counter()
     frappe.db.commit()
-    return count
+    elapsed_ms = (time.perf_counter() - start) * 1000
 
+    metrics.observe("commit", elapsed_ms)
+    return elapsed_ms
 
-def sync_single_account_now(qonto_bank_account_id: str):
+
+def sync_single_account_now(qonto_bank_account_id: str, profile: bool = False):
     """
     Sync a single account immediately (for manual trigger).
 
     Args:
         qonto_bank_account_id: Qonto bank account ID to sync
+        profile: Run under the profiler even if profiling is off in settings
     """
     settings = frappe.get_single("Qonto Settings")
 
@@ -183,24 +470,82 @@ def sync_single_account_now(qonto_bank_account_id: str):
         frappe.throw("Qonto is not connected. Please test connection first.")
 
     # Find the mapping
-    mapping = None
-    for m in settings.account_mappings:
-        if m.qonto_bank_account_id == qonto_bank_account_id and m.active:
-            mapping = m
-            break
-
-    if not mapping:
-        frappe.throw(f"No active mapping found for account {qonto_bank_account_id}")
+    mapping = get_account_mapping(settings, qonto_bank_account_id)
 
     # Sync the account
     client = QontoClient(settings)
-    count = sync_account(client, mapping, settings.default_sync_lookback_days)
+    metrics = start_run()
+    profiler = _start_profiler(settings, profile, qonto_bank_account_id)
+    try:
+        with metrics.account(qonto_bank_account_id), span(
+            "run",
+            export=bool(settings.get("enable_tracing")),
+            account_id=qonto_bank_account_id
+        ) as run_span:
+            count = sync_account(client, mapping, settings.default_sync_lookback_days)
+            run_span.set(items_processed=count)
+
+        # Update mapping and settings
+        mapping.last_synced_at = now_datetime()
+        reschedule(mapping, settings, count)
+        settings.last_sync_at = now_datetime()
+        settings.save(ignore_permissions=True)
+        timed_commit()
+    finally:
+        client.close()
+        summary = finish_run(metrics)
+        if profiler:
+            profiler.stop()
+
+    sync_log = log_sync(
+        "INFO",
+        f"Account {qonto_bank_account_id} synced. {count} transactions synced.",
+        {"account_id": qonto_bank_account_id, "total": count, "trace_id": run_span.trace_id},
+        duration_ms=summary["duration_ms"],
+        items_processed=count,
+        metrics=summary
+    )
 
-    # Update mapping and settings
-    mapping.last_synced_at = now_datetime()
-    settings.last_sync_at = now_datetime()
-    settings.save(ignore_permissions=True)
-    frappe.db.commit()
+    if profiler:
+        profiler.attach_to(sync_log)
+
+    if count:
+        enqueue_post_sync()
 
     return count
 
+
+def _start_profiler(settings, profile: bool, label: str):
+    """
+    Start a profiler if requested for this run or enabled in settings.
+
+    Returns:
+        Running SyncProfiler, or None when profiling is off
+    """
+    if not (profile or settings.get("enable_profiling")):
+        return None
+
+    profiler = SyncProfiler(label)
+    profiler.start()
+    return profiler
+
+
+def get_account_mapping(settings, qonto_bank_account_id: str):
+    """
+    Get the active mapping of a Qonto account.
+
+    Args:
+        settings: QontoSettings document
+        qonto_bank_account_id: Qonto bank account ID
+
+    Returns:
+        QontoAccountMapping row
+
+    Raises:
+        frappe.ValidationError: If the account has no active mapping
+    """
+    for m in settings.account_mappings:
+        if m.qonto_bank_account_id == qonto_bank_account_id and m.active:
+            return m
+
+    frappe.throw(f"No active mapping found for account {qonto_bank_account_id}")
@@ -0,0 +1,207 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Lightweight trace spans with correlation IDs for sync runs."""
+
+import json
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List
+
+import frappe
+
+from .constants import TRACE_FILE_NAME, TRACE_FLUSH_SIZE, TRACE_MAX_FILE_BYTES
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("qonto_current_span", default=None)
+
+
+class TraceExporter:
+    """Buffered writer of finished spans to a local JSON-lines file."""
+
+    def __init__(self, path: str):
+        """
+        Initialize exporter.
+
+        Args:
+            path: Path of the JSON-lines trace file
+        """
+        self.path = path
+        self.buffer: List[Dict[str, Any]] = []
+
+    def export(self, span: "Span"):
+        """Queue a finished span, flushing once the buffer is full."""
+        self.buffer.append(span.to_dict())
+        if len(self.buffer) >= TRACE_FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Append buffered spans to the trace file."""
+        if not self.buffer:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+            # Keep a single rotated file so traces cannot fill the disk
+            if os.path.exists(self.path) and os.path.getsize(self.path) > TRACE_MAX_FILE_BYTES:
+                os.replace(self.path, f"{self.path}.1")
+
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in self.buffer:
+                    f.write(json.dumps(record, default=str) + "\n")
+        except Exception as e:
+            frappe.log_error(f"Failed to write Qonto traces: {str(e)}", "Qonto Tracing")
+        finally:
+            self.buffer = []
+
+
+class Span:
+    """A timed unit of work (run, account, page, http request or DB batch)."""
+
+    def __init__(
+        self,
+        kind: str,
+        parent: Optional["Span"] = None,
+        exporter: Optional[TraceExporter] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.exporter = parent.exporter if parent else exporter
+        self.attributes = dict(attributes or {})
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+
+    @property
+    def correlation_id(self) -> str:
+        """Identifier linking logs to this span: <trace_id>/<span_id>."""
+        return f"{self.trace_id}/{self.span_id}"
+
+    def set(self, **attributes):
+        """Add attributes to the span."""
+        self.attributes.update(attributes)
+
+    def finish(self, error: Optional[BaseException] = None, **attributes):
+        """
+        End the span and hand it to the exporter.
+
+        Args:
+            error: Exception that ended the span, if any
+            **attributes: Final attributes to add
+        """
+        if self.duration_ms is not None:
+            return
+
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self.attributes.update(attributes)
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+        if self.exporter:
+            self.exporter.export(self)
+            if self.parent_id is None:
+                self.exporter.flush()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "start": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms or 0, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+def get_trace_path() -> str:
+    """Path of the site's trace file."""
+    return frappe.get_site_path("logs", TRACE_FILE_NAME)
+
+
+def start_span(
+    kind: str,
+    export: bool = False,
+    exporter: Optional[TraceExporter] = None,
+    **attributes
+) -> Span:
+    """
+    Start a span under the current span without making it current.
+
+    Args:
+        kind: Span kind (run, account, page, http, batch)
+        export: For root spans, write the trace to the trace file
+        exporter: For root spans, exporter to use instead of the trace file
+        **attributes: Span attributes
+
+    Returns:
+        Started Span; call finish() to end it
+    """
+    parent = _current_span.get()
+    if parent is None and export and exporter is None:
+        exporter = TraceExporter(get_trace_path())
+
+    return Span(kind, parent=parent, exporter=exporter, attributes=attributes)
+
+
+@contextmanager
+def span(
+    kind: str,
+    export: bool = False,
+    exporter: Optional[TraceExporter] = None,
+    **attributes
+):
+    """
+    Run the enclosed block in a new current span.
+
+    Args:
+        kind: Span kind (run, account, page, http, batch)
+        export: For root spans, write the trace to the trace file
+        exporter: For root spans, exporter to use instead of the trace file
+        **attributes: Span attributes
+
+    Yields:
+        The started Span
+    """
+    current = start_span(kind, export=export, exporter=exporter, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(error=e)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def get_current_span() -> Optional[Span]:
+    """Get the span currently in progress, if any."""
+    return _current_span.get()
+
+
+def with_correlation(message: str) -> str:
+    """
+    Suffix a log message with the correlation ID of the current span.
+
+    Args:
+        message: Log message
+
+    Returns:
+        Message with the correlation ID appended when a span is active
+    """
+    current = _current_span.get()
+    if current is None:
+        return message
+    return f"{message} [correlation_id={current.correlation_id}]"
@@ -0,0 +1,161 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Detection of transfers between mapped Qonto accounts."""
+
+import json
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import frappe
+from frappe.utils import add_days, date_diff, flt, getdate, today
+
+from .constants import (
+    CUSTOM_FIELD_QONTO_DATA,
+    CUSTOM_FIELD_QONTO_ID,
+    CUSTOM_FIELD_QONTO_STATUS,
+    CUSTOM_FIELD_TRANSFER_PAIR,
+    TRANSACTION_STATUS_PENDING,
+    TRANSFER_DATE_WINDOW_DAYS,
+    TRANSFER_LOOKBACK_DAYS,
+)
+from .staging import get_counterparty_iban, normalize_iban
+from .utils import log_sync
+
+
+def transfer_leg(row, own_ibans: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Get the transfer leg facts of a Bank Transaction row.
+
+    Args:
+        row: Bank Transaction values with its stored payload
+        own_ibans: Normalized IBAN of each mapped Bank Account
+
+    Returns:
+        Leg facts, or None if the counterparty is not a mapped account
+    """
+    own_iban = own_ibans.get(row.bank_account)
+    counterparty_iban = get_counterparty_iban(
+        json.loads(row.get(CUSTOM_FIELD_QONTO_DATA) or "{}")
+    )
+    if not own_iban or counterparty_iban not in own_ibans.values() or counterparty_iban == own_iban:
+        return None
+
+    outgoing = flt(row.withdrawal) > 0
+    return {
+        "name": row.name,
+        "outgoing": outgoing,
+        # Both legs of a transfer share the same (from, to) IBAN pair
+        "key": (
+            round(flt(row.withdrawal or row.deposit) * 100),
+            row.currency,
+            own_iban if outgoing else counterparty_iban,
+            counterparty_iban if outgoing else own_iban,
+        ),
+        "date": getdate(row.date),
+    }
+
+
+def pair_transfers(
+    legs: List[Dict[str, Any]],
+    window_days: int = TRANSFER_DATE_WINDOW_DAYS
+) -> List[Tuple[str, str]]:
+    """
+    Pair outgoing and incoming legs with a hash join.
+
+    Outgoing legs are hashed by (amount, currency, from IBAN, to IBAN);
+    each incoming leg probes its bucket and takes the closest unused leg
+    within the date window.
+
+    Args:
+        legs: Leg facts
+        window_days: Maximum days between the two legs
+
+    Returns:
+        List of (outgoing, incoming) Bank Transaction names
+    """
+    buckets = defaultdict(list)
+    for leg in legs:
+        if leg["outgoing"]:
+            buckets[leg["key"]].append(leg)
+
+    pairs = []
+    for leg in sorted((leg for leg in legs if not leg["outgoing"]), key=lambda leg: leg["date"]):
+        bucket = buckets.get(leg["key"])
+        if not bucket:
+            continue
+
+        best = min(bucket, key=lambda other: (abs(date_diff(leg["date"], other["date"])), other["name"]))
+        if abs(date_diff(leg["date"], best["date"])) <= window_days:
+            bucket.remove(best)
+            pairs.append((best["name"], leg["name"]))
+
+    return pairs
+
+
+def get_unpaired_transactions(from_date):
+    """
+    Get the recent Qonto Bank Transactions not paired yet.
+
+    Args:
+        from_date: Earliest transaction date
+
+    Returns:
+        List of Bank Transaction rows
+    """
+    return frappe.db.sql(
+        f"""select name, bank_account, currency, date, deposit, withdrawal,
+            `{CUSTOM_FIELD_QONTO_DATA}`
+        from `tabBank Transaction`
+        where docstatus < 2 and `{CUSTOM_FIELD_QONTO_ID}` is not null
+            and date >= %(from_date)s
+            and coalesce(`{CUSTOM_FIELD_TRANSFER_PAIR}`, '') = ''
+            and coalesce(`{CUSTOM_FIELD_QONTO_STATUS}`, '') != %(pending)s""",
+        {"from_date": from_date, "pending": TRANSACTION_STATUS_PENDING},
+        as_dict=True
+    )
+
+
+def detect_internal_transfers(lookback_days: int = TRANSFER_LOOKBACK_DAYS) -> int:
+    """
+    Pair the two legs of transfers between mapped Qonto accounts.
+
+    Each leg links to the other through the Internal Transfer Leg field,
+    and paired legs are left out of voucher matching. Legs whose other
+    side is not synced yet are tried again on the next runs.
+
+    Args:
+        lookback_days: Days of unpaired transactions considered
+
+    Returns:
+        Number of pairs found
+    """
+    settings = frappe.get_single("Qonto Settings")
+    own_ibans = {
+        m.erpnext_bank_account: normalize_iban(m.iban)
+        for m in settings.account_mappings
+        if m.erpnext_bank_account and normalize_iban(m.iban)
+    }
+    if len(own_ibans) < 2:
+        return 0
+
+    rows = get_unpaired_transactions(add_days(today(), -lookback_days))
+    legs = [leg for leg in (transfer_leg(row, own_ibans) for row in rows) if leg]
+    pairs = pair_transfers(legs)
+
+    for outgoing, incoming in pairs:
+        for name, other in ((outgoing, incoming), (incoming, outgoing)):
+            frappe.db.set_value(
+                "Bank Transaction", name, CUSTOM_FIELD_TRANSFER_PAIR, other, update_modified=False
+            )
+
+    if pairs:
+        frappe.db.commit()
+        log_sync(
+            "INFO",
+            f"Internal transfers detected. {len(pairs)} pairs.",
+            {"pairs": pairs[:20]},
+            items_processed=len(pairs)
+        )
+
+    return len(pairs)
@@ -0,0 +1,227 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Pluggable HTTP transports: passthrough, record and replay."""
+
+import gzip
+import json
+import os
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+import frappe
+
+from .constants import (
+    CASSETTE_VERSION,
+    DEFAULT_CASSETTE_NAME,
+    REPLAY_IGNORED_PARAMS,
+    SCRUBBED_HEADERS,
+    TRANSPORT_PASSTHROUGH,
+    TRANSPORT_RECORD,
+    TRANSPORT_REPLAY,
+)
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """Raised when a replayed request has no recorded response left"""
+    pass
+
+
+class PassthroughTransport:
+    """Send requests to the API through the client's session."""
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: Parameters for requests.Session.request
+
+        Returns:
+            Response
+        """
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        pass
+
+
+class RecordingTransport(PassthroughTransport):
+    """Send requests to the API and append each exchange to a cassette."""
+
+    def __init__(self, session: requests.Session, path: str):
+        """
+        Initialize recorder.
+
+        Args:
+            session: Session used to reach the API
+            path: Cassette file (gzip compressed JSON lines)
+        """
+        super().__init__(session)
+        self.path = path
+        self._file = None
+
+    def send(self, method: str, url: str, **kwargs) -> requests.Response:
+        response = super().send(method, url, **kwargs)
+        self._write({
+            "method": method.upper(),
+            "endpoint": urlsplit(url).path,
+            "params": _canonical_params(kwargs.get("params")),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                key: value for key, value in response.headers.items()
+                if key.lower() not in SCRUBBED_HEADERS
+            },
+            "body": response.text,
+            "elapsed_ms": round(response.elapsed.total_seconds() * 1000, 3)
+            if response.elapsed else None,
+        })
+        return response
+
+    def _write(self, record: Dict[str, Any]):
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            is_new = not os.path.exists(self.path)
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+            if is_new:
+                self._file.write(json.dumps({
+                    "cassette_version": CASSETTE_VERSION,
+                    "recorded_at": datetime.now(timezone.utc).isoformat(),
+                }) + "\n")
+
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ReplayTransport:
+    """Answer requests from a cassette without touching the network."""
+
+    def __init__(self, path: str, realtime: bool = False):
+        """
+        Initialize player.
+
+        Args:
+            path: Cassette file written by RecordingTransport
+            realtime: Sleep for the recorded latency of each response
+        """
+        self.path = path
+        self.realtime = realtime
+        self._responses: Dict[Tuple, deque] = defaultdict(deque)
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    record = json.loads(line)
+                    if "cassette_version" in record:
+                        continue
+                    self._responses[_replay_key(
+                        record["method"], record["endpoint"], record["params"]
+                    )].append(record)
+            except (EOFError, json.JSONDecodeError):
+                # Recorder was killed before closing: keep every complete exchange
+                pass
+
+    def send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Return the next recorded response for a request.
+
+        Requests match on method, path and parameters other than the time
+        window ones; identical requests are answered in recording order.
+
+        Raises:
+            CassetteMissError: When no recorded response is left
+        """
+        key = _replay_key(
+            method.upper(), urlsplit(url).path, _canonical_params(kwargs.get("params"))
+        )
+        queue = self._responses.get(key)
+        if not queue:
+            raise CassetteMissError(f"No recorded response for {method.upper()} {url}")
+
+        record = queue.popleft()
+        if self.realtime and record.get("elapsed_ms"):
+            time.sleep(record["elapsed_ms"] / 1000)
+
+        response = requests.Response()
+        response.status_code = record["status"]
+        response.reason = record.get("reason")
+        response.headers = CaseInsensitiveDict(record.get("headers") or {})
+        response.url = url
+        response.encoding = "utf-8"
+        response._content = record["body"].encode("utf-8")
+        return response
+
+    def remaining(self) -> int:
+        """Number of recorded responses not replayed yet."""
+        return sum(len(queue) for queue in self._responses.values())
+
+    def close(self):
+        pass
+
+
+def get_transport(
+    session: requests.Session,
+    mode: Optional[str] = None,
+    path: Optional[str] = None
+):
+    """
+    Build the transport configured for this site.
+
+    Reads ``qonto_transport_mode`` (passthrough, record or replay) and
+    ``qonto_cassette_path`` from site_config.json unless given.
+
+    Args:
+        session: Session used to reach the API
+        mode: Transport mode
+        path: Cassette file
+
+    Returns:
+        Transport instance
+    """
+    mode = mode or frappe.conf.get("qonto_transport_mode") or TRANSPORT_PASSTHROUGH
+    path = path or frappe.conf.get("qonto_cassette_path") or frappe.get_site_path(
+        "private", "files", DEFAULT_CASSETTE_NAME
+    )
+
+    if mode == TRANSPORT_RECORD:
+        return RecordingTransport(session, path)
+    if mode == TRANSPORT_REPLAY:
+        return ReplayTransport(path, realtime=bool(frappe.conf.get("qonto_replay_realtime")))
+    if mode == TRANSPORT_PASSTHROUGH:
+        return PassthroughTransport(session)
+
+    frappe.throw(f"Unknown Qonto transport mode: {mode}")
+
+
+def _canonical_params(params: Optional[Dict[str, Any]]) -> list:
+    """Params as a sorted list of [key, value] pairs, list values kept in order."""
+    if not params:
+        return []
+    return sorted(
+        [key, [str(v) for v in value] if isinstance(value, (list, tuple)) else str(value)]
+        for key, value in params.items()
+    )
+
+
+def _replay_key(method: str, endpoint: str, params: list) -> Tuple:
+    return (
+        method,
+        endpoint,
+        json.dumps([p for p in params if p[0] not in REPLAY_IGNORED_PARAMS]),
+    )
@@ -4,15 +4,29 @@
 """Utility functions for Qonto Connector"""
 
 import json
+import re
+import unicodedata
+from datetime import datetime, timezone
 import frappe
 from frappe import _
 from frappe.utils import now_datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from .constants import (
     CUSTOM_FIELD_QONTO_ID,
     CUSTOM_FIELD_QONTO_DATA,
+    CUSTOM_FIELD_QONTO_STATUS,
+    CUSTOM_FIELD_CATEGORY,
+    CUSTOM_FIELD_COST_CENTER,
+    CUSTOM_FIELD_NOTE,
+    CUSTOM_FIELD_TRANSFER_PAIR,
+    CUSTOM_FIELD_MATCH_DOCTYPE,
+    CUSTOM_FIELD_MATCH_NAME,
+    CUSTOM_FIELD_MATCH_SCORE,
+    CUSTOM_FIELD_MATCH_STATUS,
     ROLE_QONTO_MANAGER,
+    TRANSACTION_STATUS_PENDING,
+    TRANSACTION_STATUS_SETTLED,
 )
 
 
@@ -21,8 +35,9 @@ def log_sync(
     message: str,
     context: Optional[Dict[str, Any]] = None,
     duration_ms: Optional[int] = None,
-    items_processed: Optional[int] = None
-):
+    items_processed: Optional[int] = None,
+    metrics: Optional[Dict[str, Any]] = None
+) -> Optional[str]:
     """
     Log sync operation.
 
@@ -32,6 +47,10 @@ def log_sync(
         context: Additional context data
         duration_ms: Duration in milliseconds
         items_processed: Number of items processed
+        metrics: Phase timing summary of the run
+
+    Returns:
+        Name of the created Qonto Sync Log, or None if logging failed
     """
     try:
         doc = frappe.get_doc({
@@ -41,12 +60,38 @@ def log_sync(
             "message": message,
             "context_json": json.dumps(context) if context else None,
             "duration_ms": duration_ms,
-            "items_processed": items_processed
+            "items_processed": items_processed,
+            "metrics_json": json.dumps(metrics, indent=2) if metrics else None
         })
         doc.insert(ignore_permissions=True)
         frappe.db.commit()
+        return doc.name
     except Exception as e:
         frappe.log_error(f"Failed to create sync log: {str(e)}", "Qonto Sync Log")
+        return None
+
+
+def parse_qonto_datetime(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a Qonto ISO 8601 timestamp into a naive UTC datetime.
+
+    Args:
+        value: Timestamp such as 2025-10-04T10:00:00.000Z
+
+    Returns:
+        Datetime for the database, or None if missing or invalid
+    """
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
 
 
 def ensure_custom_fields():
@@ -54,42 +99,141 @@ def ensure_custom_fields():
     Ensure custom fields exist on Bank Transaction doctype.
     Called after migration.
     """
-    # Check if custom fields already exist
-    if frappe.db.exists("Custom Field", {"dt": "Bank Transaction", "fieldname": CUSTOM_FIELD_QONTO_ID}):
-        return
+    fields = [
+        {
+            "fieldname": CUSTOM_FIELD_QONTO_ID,
+            "label": "Qonto Transaction ID",
+            "fieldtype": "Data",
+            "insert_after": "description",
+            "read_only": 1,
+            "unique": 1,
+            "hidden": 0,
+            "allow_on_submit": 0,
+            "description": "Unique transaction ID from Qonto"
+        },
+        {
+            "fieldname": CUSTOM_FIELD_QONTO_DATA,
+            "label": "Qonto Data",
+            "fieldtype": "Long Text",
+            "insert_after": CUSTOM_FIELD_QONTO_ID,
+            "read_only": 1,
+            "hidden": 1,
+            "allow_on_submit": 0,
+            "description": "Raw transaction data from Qonto API"
+        },
+        {
+            "fieldname": CUSTOM_FIELD_QONTO_STATUS,
+            "label": "Qonto Status",
+            "fieldtype": "Data",
+            "insert_after": CUSTOM_FIELD_QONTO_ID,
+            "read_only": 1,
+            "search_index": 1,
+            "in_standard_filter": 1,
+            "allow_on_submit": 0,
+            "description": "Qonto status; pending rows are provisional until they settle"
+        },
+        {
+            "fieldname": CUSTOM_FIELD_MATCH_STATUS,
+            "label": "Qonto Match",
+            "fieldtype": "Select",
+            "options": "\nNo Match\nProposed\nApplied",
+            "insert_after": CUSTOM_FIELD_QONTO_STATUS,
+            "read_only": 1,
+            "search_index": 1,
+            "in_standard_filter": 1,
+            "allow_on_submit": 1,
+            "description": "Result of the Qonto auto-reconciliation matcher"
+        },
+        {
+            "fieldname": CUSTOM_FIELD_MATCH_DOCTYPE,
+            "label": "Matched Voucher Type",
+            "fieldtype": "Link",
+            "options": "DocType",
+            "insert_after": CUSTOM_FIELD_MATCH_STATUS,
+            "read_only": 1,
+            "allow_on_submit": 1,
+        },
+        {
+            "fieldname": CUSTOM_FIELD_MATCH_NAME,
+            "label": "Matched Voucher",
+            "fieldtype": "Dynamic Link",
+            "options": CUSTOM_FIELD_MATCH_DOCTYPE,
+            "insert_after": CUSTOM_FIELD_MATCH_DOCTYPE,
+            "read_only": 1,
+            "allow_on_submit": 1,
+        },
+        {
+            "fieldname": CUSTOM_FIELD_MATCH_SCORE,
+            "label": "Match Score",
+            "fieldtype": "Int",
+            "insert_after": CUSTOM_FIELD_MATCH_NAME,
+            "read_only": 1,
+            "allow_on_submit": 1,
+        },
+        {
+            "fieldname": CUSTOM_FIELD_CATEGORY,
+            "label": "Qonto Category",
+            "fieldtype": "Data",
+            "insert_after": CUSTOM_FIELD_MATCH_SCORE,
+            "search_index": 1,
+            "in_standard_filter": 1,
+            "allow_on_submit": 1,
+            "description": "Set by the first matching Qonto Categorization Rule"
+        },
+        {
+            "fieldname": CUSTOM_FIELD_COST_CENTER,
+            "label": "Cost Center",
+            "fieldtype": "Link",
+            "options": "Cost Center",
+            "insert_after": CUSTOM_FIELD_CATEGORY,
+            "allow_on_submit": 1,
+        },
+        {
+            "fieldname": CUSTOM_FIELD_NOTE,
+            "label": "Note",
+            "fieldtype": "Small Text",
+            "insert_after": CUSTOM_FIELD_COST_CENTER,
+            "allow_on_submit": 1,
+        },
+        {
+            "fieldname": CUSTOM_FIELD_TRANSFER_PAIR,
+            "label": "Internal Transfer Leg",
+            "fieldtype": "Link",
+            "options": "Bank Transaction",
+            "insert_after": CUSTOM_FIELD_NOTE,
+            "read_only": 1,
+            "search_index": 1,
+            "allow_on_submit": 1,
+            "description": "Other side of a transfer between two mapped Qonto accounts"
+        },
+    ]
+
+    for field in fields:
+        # Create each missing field, so new fields reach existing installs
+        if frappe.db.exists("Custom Field", {"dt": "Bank Transaction", "fieldname": field["fieldname"]}):
+            continue
 
-    # Create Qonto ID field
-    frappe.get_doc({
-        "doctype": "Custom Field",
-        "dt": "Bank Transaction",
-        "fieldname": CUSTOM_FIELD_QONTO_ID,
-        "label": "Qonto Transaction ID",
-        "fieldtype": "Data",
-        "insert_after": "description",
-        "read_only": 1,
-        "unique": 1,
-        "hidden": 0,
-        "allow_on_submit": 0,
-        "description": "Unique transaction ID from Qonto"
-    }).insert(ignore_permissions=True)
-
-    # Create Qonto Data field
-    frappe.get_doc({
-        "doctype": "Custom Field",
-        "dt": "Bank Transaction",
-        "fieldname": CUSTOM_FIELD_QONTO_DATA,
-        "label": "Qonto Data",
-        "fieldtype": "Long Text",
-        "insert_after": CUSTOM_FIELD_QONTO_ID,
-        "read_only": 1,
-        "hidden": 1,
-        "allow_on_submit": 0,
-        "description": "Raw transaction data from Qonto API"
-    }).insert(ignore_permissions=True)
+        frappe.get_doc({
+            "doctype": "Custom Field",
+            "dt": "Bank Transaction",
+            **field
+        }).insert(ignore_permissions=True)
 
     frappe.db.commit()
 
 
+def get_ingested_statuses() -> List[str]:
+    """
+    Get the Qonto statuses turned into Bank Transactions.
+
+    Returns:
+        Settled, plus pending when provisional transactions are enabled
+    """
+    if frappe.db.get_single_value("Qonto Settings", "sync_pending_transactions"):
+        return [TRANSACTION_STATUS_SETTLED, TRANSACTION_STATUS_PENDING]
+    return [TRANSACTION_STATUS_SETTLED]
+
+
 def ensure_qonto_manager_role():
     """
     Ensure Qonto Manager role exists.
@@ -182,3 +326,22 @@ def validate_bank_account_mapping(mapping: Dict[str, Any]):
             "Bank Account {0} does not belong to Company {1}"
         ).format(mapping.get("erpnext_bank_account"), mapping.get("company")))
 
+
+
+def normalize_name(value: Optional[str]) -> str:
+    """
+    Normalize a counterparty or party name for comparisons.
+
+    Accents and punctuation are dropped and case and spacing folded, so
+    "Société Générale S.A." and "SOCIETE GENERALE SA" compare equal.
+
+    Args:
+        value: Name to normalize
+
+    Returns:
+        Lower case words separated by single spaces
+    """
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c)).lower()
+    value = re.sub(r"[.']", "", value)
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", value).split())
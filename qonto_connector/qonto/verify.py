@@ -0,0 +1,513 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Verification of ingested Bank Transactions against Qonto."""
+
+import json
+from datetime import date
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import hashlib
+from collections import defaultdict
+
+import frappe
+from frappe.utils import add_days, cint, flt, getdate, nowdate
+
+from .client import QontoClient
+from .constants import (
+    CUSTOM_FIELD_QONTO_DATA,
+    CUSTOM_FIELD_QONTO_ID,
+    CUSTOM_FIELD_QONTO_STATUS,
+    DEFAULT_LOOKBACK_DAYS,
+    TRANSACTION_STATUS_ORPHANED,
+    TRANSACTION_STATUS_SETTLED,
+    VERIFY_EMITTED_MARGIN_DAYS,
+    VERIFY_QUEUE,
+    VERIFY_REPORT_SAMPLE,
+    VERIFY_TIMEOUT,
+)
+from .batching import AdaptiveCommitBatcher
+from .exceptions import QontoAPIError
+from .ledger import set_qonto_status
+from .pending import RETRACTED_STATUSES, retract_bank_transaction
+from .sync import ingest_transaction
+from .utils import get_ingested_statuses, log_sync
+
+# Bank Transactions kept for the record but left out of the checksums
+UNCHECKED_STATUSES = (TRANSACTION_STATUS_ORPHANED, *RETRACTED_STATUSES)
+
+# (qonto_id, status, posting date)
+QontoRow = Tuple[str, Optional[str], Optional[date]]
+# (qonto_id, Bank Transaction name, docstatus, qonto_status)
+LocalRow = Tuple[str, str, int, Optional[str]]
+# (count, deposits in cents, withdrawals in cents, hash of the sorted IDs)
+DayChecksum = Tuple[int, int, int, str]
+
+
+def merge_diff(
+    qonto_rows: Iterable[QontoRow],
+    local_rows: Iterable[LocalRow]
+) -> Iterator[Tuple[str, Optional[QontoRow], Optional[LocalRow]]]:
+    """
+    Merge-join two ID-sorted streams and yield the rows that differ.
+
+    Each side is read once, so the join is linear in the number of rows.
+
+    Args:
+        qonto_rows: Qonto transactions sorted by qonto_id
+        local_rows: Bank Transactions sorted by qonto_id
+
+    Yields:
+        Tuples of (kind, Qonto row, local row), kind being "retracted"
+        (declined or canceled in Qonto), "orphaned" (unknown to Qonto),
+        "missing" (not in ERPNext) or "status" (status differs)
+    """
+    qonto_iter, local_iter = iter(qonto_rows), iter(local_rows)
+    remote, local = next(qonto_iter, None), next(local_iter, None)
+
+    while remote is not None or local is not None:
+        if local is None or (remote is not None and remote[0] < local[0]):
+            yield "missing", remote, None
+            remote = next(qonto_iter, None)
+        elif remote is None or local[0] < remote[0]:
+            yield "orphaned", None, local
+            local = next(local_iter, None)
+        else:
+            if remote[1] in RETRACTED_STATUSES:
+                yield "retracted", remote, local
+            elif remote[1] != (local[3] or TRANSACTION_STATUS_SETTLED):
+                # Rows synced before statuses were stored are all settled
+                yield "status", remote, local
+            remote, local = next(qonto_iter, None), next(local_iter, None)
+
+
+def posting_day(tx: Dict[str, Any]) -> Optional[date]:
+    """Get the posting date of a normalized transaction, if settled."""
+    return getdate(tx["posting_date"]) if tx.get("posting_date") else None
+
+
+def fetch_qonto_window(
+    client: QontoClient,
+    qonto_bank_account_id: str,
+    from_date: date,
+    to_date: date
+) -> Tuple[List[QontoRow], Dict[date, DayChecksum]]:
+    """
+    Stream the Qonto transactions of a window once.
+
+    The window is searched by emission date with a margin before it, as
+    Bank Transactions are dated by settlement, which comes later. Only
+    compact rows and per-day totals are kept, not the transactions.
+
+    Args:
+        client: QontoClient instance
+        qonto_bank_account_id: Qonto bank account ID
+        from_date: First posting date
+        to_date: Last posting date
+
+    Returns:
+        Tuple of (compact rows sorted by qonto_id, checksums of the
+        transactions with an ingested status per posting date within
+        the window)
+    """
+    ingested = get_ingested_statuses()
+    rows = []
+
+    def in_window():
+        for tx in client.iter_transactions(
+            qonto_bank_account_id,
+            emitted_at_from=f"{add_days(from_date, -VERIFY_EMITTED_MARGIN_DAYS)}T00:00:00.000Z",
+            emitted_at_to=f"{to_date}T23:59:59.999Z"
+        ):
+            day = posting_day(tx)
+            rows.append((tx["qonto_id"], tx.get("status"), day))
+            if day and from_date <= day <= to_date and tx.get("status") in ingested:
+                yield tx
+
+    checksums = qonto_day_checksums(in_window())
+    rows.sort()
+    return rows, checksums
+
+
+def fetch_qonto_days(
+    client: QontoClient,
+    qonto_bank_account_id: str,
+    days: List[date]
+) -> Iterator[Dict[str, Any]]:
+    """
+    Fetch again the Qonto transactions posted on some days.
+
+    Days are grouped into emission date ranges, each with the margin
+    before it; ranges whose margins overlap are merged, so no
+    transaction is fetched twice.
+
+    Args:
+        client: QontoClient instance
+        qonto_bank_account_id: Qonto bank account ID
+        days: Sorted posting dates
+
+    Yields:
+        Normalized transactions with an ingested status posted on one
+        of the days
+    """
+    ingested = get_ingested_statuses()
+    wanted = set(days)
+    spans = []
+    for day in days:
+        if spans and add_days(day, -VERIFY_EMITTED_MARGIN_DAYS) <= add_days(spans[-1][1], 1):
+            spans[-1][1] = day
+        else:
+            spans.append([day, day])
+
+    for first, last in spans:
+        for tx in client.iter_transactions(
+            qonto_bank_account_id,
+            emitted_at_from=f"{add_days(first, -VERIFY_EMITTED_MARGIN_DAYS)}T00:00:00.000Z",
+            emitted_at_to=f"{last}T23:59:59.999Z"
+        ):
+            if posting_day(tx) in wanted and tx.get("status") in ingested:
+                yield tx
+
+
+def day_checksum(ids: Iterable[str], deposit_cents: int, withdrawal_cents: int) -> DayChecksum:
+    """
+    Build the checksum of one day.
+
+    Args:
+        ids: Qonto IDs of the day, in any order
+        deposit_cents: Sum of deposits in cents
+        withdrawal_cents: Sum of withdrawals in cents
+
+    Returns:
+        Tuple of (count, deposits, withdrawals, MD5 of the sorted IDs)
+    """
+    ids = sorted(ids)
+    digest = hashlib.md5(",".join(ids).encode("utf-8")).hexdigest()
+    return len(ids), int(deposit_cents), int(withdrawal_cents), digest
+
+
+def qonto_day_checksums(transactions: Iterable[Dict[str, Any]]) -> Dict[date, DayChecksum]:
+    """
+    Compute the per-day checksums of streamed Qonto transactions.
+
+    Only the IDs and the sums in cents of each day are held, so the
+    stream is consumed without keeping the transactions.
+
+    Args:
+        transactions: Normalized transactions with a posting date
+
+    Returns:
+        Checksum per posting date
+    """
+    ids = defaultdict(list)
+    deposits = defaultdict(int)
+    withdrawals = defaultdict(int)
+    for tx in transactions:
+        day = posting_day(tx)
+        cents = round(abs(flt(tx["amount"])) * 100)
+        ids[day].append(tx["qonto_id"])
+        if flt(tx["amount"]) < 0:
+            withdrawals[day] += cents
+        else:
+            deposits[day] += cents
+    return {day: day_checksum(ids[day], deposits[day], withdrawals[day]) for day in ids}
+
+
+def local_day_checksums(
+    erpnext_bank_account: str,
+    from_date: date,
+    to_date: date
+) -> Dict[date, DayChecksum]:
+    """
+    Compute the per-day checksums of Bank Transactions in one grouped query.
+
+    IDs are concatenated in binary order, which is the order Python sorts
+    them in, so both sides hash the same string. Orphaned, declined and
+    canceled rows are left out, as Qonto's side has no such rows.
+
+    Args:
+        erpnext_bank_account: ERPNext Bank Account name
+        from_date: First posting date
+        to_date: Last posting date
+
+    Returns:
+        Checksum per posting date
+    """
+    qonto_id = f"`{CUSTOM_FIELD_QONTO_ID}`"
+    if frappe.db.db_type == "postgres":
+        digest = f"md5(string_agg({qonto_id}, ',' order by {qonto_id} collate \"C\"))"
+    else:
+        digest = f"md5(group_concat({qonto_id} order by binary {qonto_id} separator ','))"
+
+    rows = frappe.db.sql(
+        f"""select date, count(*), round(sum(deposit) * 100), round(sum(withdrawal) * 100),
+            {digest}
+        from `tabBank Transaction`
+        where bank_account = %s and date between %s and %s
+            and docstatus < 2 and {qonto_id} is not null
+            and coalesce(`{CUSTOM_FIELD_QONTO_STATUS}`, '') not in %s
+        group by date""",
+        (erpnext_bank_account, from_date, to_date, UNCHECKED_STATUSES)
+    )
+    return {
+        getdate(day): (cint(count), cint(deposits), cint(withdrawals), digest)
+        for day, count, deposits, withdrawals, digest in rows
+    }
+
+
+def differing_days(
+    qonto: Dict[date, DayChecksum],
+    local: Dict[date, DayChecksum]
+) -> List[date]:
+    """
+    Get the days whose checksums differ, or that exist on one side only.
+
+    Args:
+        qonto: Qonto checksums per day
+        local: Bank Transaction checksums per day
+
+    Returns:
+        Sorted list of dates
+    """
+    return sorted(day for day in set(qonto) | set(local) if qonto.get(day) != local.get(day))
+
+
+def fetch_local_rows(erpnext_bank_account: str, from_date: date, to_date: date) -> List[LocalRow]:
+    """
+    Get the Qonto Bank Transactions of a window in one ID-ordered query.
+
+    Args:
+        erpnext_bank_account: ERPNext Bank Account name
+        from_date: First posting date
+        to_date: Last posting date
+
+    Returns:
+        List of (qonto_id, name, docstatus, qonto_status), sorted by qonto_id
+    """
+    rows = frappe.db.sql(
+        f"""select `{CUSTOM_FIELD_QONTO_ID}`, name, docstatus, `{CUSTOM_FIELD_QONTO_STATUS}`
+        from `tabBank Transaction`
+        where bank_account = %s and date between %s and %s
+            and docstatus < 2 and `{CUSTOM_FIELD_QONTO_ID}` is not null
+        order by `{CUSTOM_FIELD_QONTO_ID}`""",
+        (erpnext_bank_account, from_date, to_date)
+    )
+    # Timsort is linear on sorted input; this only guards against a
+    # database collation ordering IDs differently from Python
+    rows = [tuple(row) for row in rows]
+    rows.sort()
+    return rows
+
+
+def confirm_orphan(client: QontoClient, local: LocalRow) -> Optional[QontoRow]:
+    """
+    Look up a Bank Transaction missing from the Qonto window by its ID.
+
+    The window is searched by emission date, so a transaction emitted
+    before the margin but settled within the window is not in it; only
+    a transaction Qonto does not know at all is orphaned.
+
+    Args:
+        client: QontoClient instance
+        local: Bank Transaction row missing from the window
+
+    Returns:
+        Qonto row of the transaction, or None if Qonto does not know it
+
+    Raises:
+        QontoAPIError: For errors other than not found
+    """
+    raw = json.loads(
+        frappe.db.get_value("Bank Transaction", local[1], CUSTOM_FIELD_QONTO_DATA) or "{}"
+    )
+    try:
+        # The API is keyed by the UUID, qonto_id is the public transaction_id
+        tx = client.get_transaction(raw.get("id") or local[0])
+    except QontoAPIError as e:
+        response = getattr(e.__cause__, "response", None)
+        if response is not None and response.status_code == 404:
+            return None
+        raise
+
+    day = getdate(tx["posting_date"]) if tx.get("posting_date") else None
+    return local[0], tx.get("status"), day
+
+
+def verify_account(
+    client: QontoClient,
+    mapping,
+    from_date: date,
+    to_date: date
+) -> Dict[str, Any]:
+    """
+    Compare an account with Qonto over a window and fix what can be fixed.
+
+    Drafts of declined or canceled transactions are retracted, Bank
+    Transactions Qonto no longer knows, once looked up by ID, are flagged
+    orphaned, and transactions missing in ERPNext or with another status
+    are reported.
+    Per-day checksums are then compared, and only the days that differ
+    are re-ingested, fetched again from Qonto by emission date.
+
+    Args:
+        client: QontoClient instance
+        mapping: QontoAccountMapping row
+        from_date: First posting date
+        to_date: Last posting date
+
+    Returns:
+        Diff report with a count and sample IDs per kind, and the days
+        re-ingested
+    """
+    qonto_rows, qonto_checksums = fetch_qonto_window(
+        client, mapping.qonto_bank_account_id, from_date, to_date
+    )
+    local_rows = fetch_local_rows(mapping.erpnext_bank_account, from_date, to_date)
+    ingested = get_ingested_statuses()
+
+    report = {
+        "account_id": mapping.qonto_bank_account_id,
+        "from_date": str(from_date),
+        "to_date": str(to_date),
+        "qonto": len(qonto_rows),
+        "erpnext": len(local_rows),
+        "diff": {
+            kind: {"count": 0, "ids": []}
+            for kind in ("retracted", "orphaned", "missing", "status")
+        },
+    }
+
+    for kind, remote, local in merge_diff(qonto_rows, local_rows):
+        if kind == "missing" and (
+            remote[1] not in ingested or not remote[2] or not from_date <= remote[2] <= to_date
+        ):
+            # Outside the window or never ingested: not a difference
+            continue
+
+        if kind == "orphaned" and local[3] != TRANSACTION_STATUS_ORPHANED:
+            try:
+                remote = confirm_orphan(client, local)
+            except Exception as e:
+                frappe.log_error(
+                    f"Failed to look up {local[0]} in Qonto: {str(e)}",
+                    "Qonto Verification"
+                )
+                continue
+            if remote:
+                # Known to Qonto, only emitted before the window
+                kind, remote, local = next(merge_diff([remote], [local]), (None, None, None))
+                if not kind:
+                    continue
+
+        try:
+            if kind == "retracted":
+                retract_bank_transaction(local[1], remote[1])
+            elif kind == "orphaned" and local[3] != TRANSACTION_STATUS_ORPHANED:
+                set_qonto_status(local[1], TRANSACTION_STATUS_ORPHANED)
+        except Exception as e:
+            frappe.log_error(
+                f"Failed to apply {kind} difference to {local[1]}: {str(e)}",
+                "Qonto Verification"
+            )
+
+        entry = report["diff"][kind]
+        entry["count"] += 1
+        if len(entry["ids"]) < VERIFY_REPORT_SAMPLE:
+            entry["ids"].append((remote or local)[0])
+
+    frappe.db.commit()
+
+    # Checksums are read after the fixes above, so retracted rows do not count
+    days = differing_days(
+        qonto_checksums,
+        local_day_checksums(mapping.erpnext_bank_account, from_date, to_date)
+    )
+    batcher = AdaptiveCommitBatcher()
+    reingested = 0
+    for tx in fetch_qonto_days(client, mapping.qonto_bank_account_id, days):
+        if ingest_transaction(mapping, tx, batcher):
+            reingested += 1
+        if batcher.add():
+            batcher.commit()
+    batcher.commit()
+
+    report["days"] = {
+        "differing": len(days),
+        "dates": [str(day) for day in days[:VERIFY_REPORT_SAMPLE]],
+        "reingested": reingested,
+    }
+    return report
+
+
+def verify_all_accounts(
+    account_ids: Optional[List[str]] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Verify active account mappings and log the diff of each.
+
+    Args:
+        account_ids: Qonto account IDs to verify, all active mappings by default
+        from_date: First posting date, the sync lookback window by default
+        to_date: Last posting date, today by default
+
+    Returns:
+        List of diff reports
+    """
+    settings = frappe.get_single("Qonto Settings")
+    if not settings.connected:
+        return []
+
+    to_date = getdate(to_date or nowdate())
+    lookback_days = settings.default_sync_lookback_days or DEFAULT_LOOKBACK_DAYS
+    from_date = getdate(from_date or add_days(to_date, -lookback_days))
+
+    client = QontoClient(settings)
+    reports = []
+
+    try:
+        for mapping in settings.account_mappings:
+            if not mapping.active:
+                continue
+            if account_ids and mapping.qonto_bank_account_id not in account_ids:
+                continue
+
+            try:
+                report = verify_account(client, mapping, from_date, to_date)
+            except Exception as e:
+                frappe.log_error(
+                    f"Verification of {mapping.qonto_bank_account_id} failed: {str(e)}",
+                    "Qonto Verification"
+                )
+                continue
+
+            reports.append(report)
+            differences = sum(entry["count"] for entry in report["diff"].values())
+            log_sync(
+                "WARN" if differences or report["days"]["differing"] else "INFO",
+                f"Verified {mapping.qonto_bank_account_id}: {differences} differences, "
+                f"{report['days']['differing']} days re-ingested",
+                report,
+                items_processed=report["erpnext"]
+            )
+    finally:
+        client.close()
+
+    return reports
+
+
+def enqueue_verification(
+    account_ids: Optional[List[str]] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None
+):
+    """Enqueue verify_all_accounts on the long queue."""
+    frappe.enqueue(
+        "qonto_connector.qonto.verify.verify_all_accounts",
+        queue=VERIFY_QUEUE,
+        timeout=VERIFY_TIMEOUT,
+        account_ids=account_ids,
+        from_date=from_date,
+        to_date=to_date
+    )
@@ -0,0 +1,333 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+"""Webhook event queue: signature check, persistence and batch ingestion."""
+
+import hashlib
+import hmac
+import json
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import frappe
+from frappe.utils import add_days, now_datetime
+from frappe.utils.password import get_decrypted_password
+
+from .batching import AdaptiveCommitBatcher
+from .client import QontoClient, normalize_transaction
+from .constants import (
+    WEBHOOK_BATCH_SIZE,
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_QUEUE,
+    WEBHOOK_RETENTION_DAYS,
+    WEBHOOK_TOLERANCE_SECONDS,
+)
+from .exceptions import QontoWebhookSignatureError
+from .pending import RETRACTED_STATUSES, retract_transaction
+from .post_sync import enqueue_post_sync
+from .staging import enqueue_materializer, is_staging_enabled, stage_transactions
+from .sync import ingest_transaction
+from .utils import get_ingested_statuses, log_sync
+
+PROCESS_JOB_ID = "qonto_webhook_queue"
+
+
+def parse_signature_header(header: Optional[str]) -> Tuple[Optional[int], List[str]]:
+    """
+    Parse a ``t=<timestamp>,v1=<hex>`` signature header.
+
+    Several ``v1`` entries may be sent while the secret is being rotated.
+
+    Args:
+        header: Raw header value
+
+    Returns:
+        Tuple of (timestamp, list of signatures)
+    """
+    timestamp = None
+    signatures = []
+
+    for part in (header or "").split(","):
+        key, _, value = part.strip().partition("=")
+        if key == "t" and value.isdigit():
+            timestamp = int(value)
+        elif key == "v1" and value:
+            signatures.append(value)
+
+    return timestamp, signatures
+
+
+def verify_signature(
+    body: bytes,
+    header: Optional[str],
+    secret: str,
+    tolerance: int = WEBHOOK_TOLERANCE_SECONDS,
+    now: Optional[float] = None
+):
+    """
+    Check a webhook call is signed with the secret and recent enough.
+
+    The signature is the hex HMAC-SHA256 of ``<timestamp>.<raw body>``.
+
+    Args:
+        body: Raw request body
+        header: Signature header
+        secret: Webhook secret
+        tolerance: Maximum age of the call in seconds, against replays
+        now: Current Unix time (for tests)
+
+    Raises:
+        QontoWebhookSignatureError: If no secret is set, or the signature is
+            missing, wrong or expired
+    """
+    if not secret:
+        # Anyone can sign with an empty key
+        raise QontoWebhookSignatureError("No webhook secret configured")
+
+    timestamp, signatures = parse_signature_header(header)
+    if timestamp is None or not signatures:
+        raise QontoWebhookSignatureError("Missing webhook signature")
+
+    now = time.time() if now is None else now
+    if abs(now - timestamp) > tolerance:
+        raise QontoWebhookSignatureError("Webhook signature timestamp outside tolerance")
+
+    expected = hmac.new(
+        secret.encode("utf-8"),
+        f"{timestamp}.".encode("utf-8") + body,
+        hashlib.sha256
+    ).hexdigest()
+
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise QontoWebhookSignatureError("Invalid webhook signature")
+
+
+def parse_event(body: bytes) -> Dict[str, Any]:
+    """
+    Extract the fields kept on the queue from a webhook payload.
+
+    Args:
+        body: Raw request body (JSON)
+
+    Returns:
+        Dictionary with event_id, event_type, transaction_id and qonto_bank_account_id
+    """
+    payload = json.loads(body or b"{}")
+    transaction = _event_transaction(payload)
+
+    return {
+        # Retried deliveries carry the same ID; fall back to the body digest
+        "event_id": str(
+            payload.get("event_id") or payload.get("id") or hashlib.sha256(body).hexdigest()
+        ),
+        "event_type": payload.get("event_type") or payload.get("type"),
+        "transaction_id": transaction.get("transaction_id") or transaction.get("id"),
+        "qonto_bank_account_id": transaction.get("bank_account_id")
+        or payload.get("bank_account_id"),
+    }
+
+
+def receive_event(body: bytes, signature: Optional[str]) -> Dict[str, Any]:
+    """
+    Verify a webhook call and persist it to the queue.
+
+    Only the insert runs in the request; ingestion happens in a background
+    job enqueued once the request commits.
+
+    Args:
+        body: Raw request body
+        signature: Signature header
+
+    Returns:
+        Dictionary with the queued event name and whether it was a redelivery
+    """
+    if not frappe.db.get_single_value("Qonto Settings", "enable_webhooks"):
+        raise frappe.PermissionError("Qonto webhooks are disabled")
+
+    secret = get_decrypted_password(
+        "Qonto Settings", "Qonto Settings", "webhook_secret", raise_exception=False
+    )
+    if not secret:
+        raise frappe.AuthenticationError("Qonto webhook secret is not set")
+
+    try:
+        verify_signature(body, signature, secret)
+    except QontoWebhookSignatureError as e:
+        raise frappe.AuthenticationError(str(e))
+
+    event = parse_event(body)
+
+    existing = frappe.db.get_value("Qonto Webhook Event", {"event_id": event["event_id"]})
+    if existing:
+        return {"event": existing, "duplicate": True}
+
+    doc = frappe.get_doc({
+        "doctype": "Qonto Webhook Event",
+        **event,
+        "status": "Queued",
+        "received_at": now_datetime(),
+        "payload": body.decode("utf-8"),
+    })
+    try:
+        doc.insert(ignore_permissions=True)
+    except (frappe.DuplicateEntryError, frappe.UniqueValidationError):
+        # Concurrent redelivery of the same event
+        return {"event": None, "duplicate": True}
+
+    enqueue_processing(after_commit=True)
+    return {"event": doc.name, "duplicate": False}
+
+
+def enqueue_processing(after_commit: bool = False):
+    """
+    Enqueue the queue processing job unless it is already queued or running.
+
+    Args:
+        after_commit: Enqueue only once the current transaction commits
+    """
+    frappe.enqueue(
+        "qonto_connector.qonto.webhooks.process_webhook_queue",
+        queue=WEBHOOK_QUEUE,
+        job_id=PROCESS_JOB_ID,
+        deduplicate=True,
+        enqueue_after_commit=after_commit
+    )
+
+
+def schedule_webhook_processing():
+    """
+    Scheduled safety net: pick up events left queued, and purge old ones.
+
+    Events received while the processing job was finishing are not
+    enqueued again by the request, so they wait for this task.
+    """
+    if frappe.db.exists("Qonto Webhook Event", {"status": "Queued"}):
+        enqueue_processing()
+
+    frappe.db.delete(
+        "Qonto Webhook Event",
+        {
+            "status": ("in", ["Processed", "Ignored"]),
+            "received_at": ("<", add_days(now_datetime(), -WEBHOOK_RETENTION_DAYS)),
+        }
+    )
+    frappe.db.commit()
+
+
+def process_webhook_queue(batch_size: int = WEBHOOK_BATCH_SIZE) -> int:
+    """
+    Ingest queued events in batches until the queue is empty.
+
+    With staged ingestion, events are written to the staging table and
+    materialized by the materializer like polled transactions. An event
+    that fails before the upsert is queued again; one whose upsert fails
+    is left to its dead letter.
+
+    Args:
+        batch_size: Events fetched per query
+
+    Returns:
+        Number of transactions ingested or staged
+    """
+    settings = frappe.get_single("Qonto Settings")
+    mappings = {m.qonto_bank_account_id: m for m in settings.account_mappings if m.active}
+    batcher = AdaptiveCommitBatcher()
+    client = None
+    ingested = 0
+    # Handled events leave Queued; only the ones put back are skipped
+    requeued = set()
+    handled = 0
+    staged = is_staging_enabled()
+    statuses = get_ingested_statuses()
+
+    try:
+        while True:
+            events = frappe.get_all(
+                "Qonto Webhook Event",
+                filters={"status": "Queued", "name": ("not in", list(requeued) or [""])},
+                fields=["name", "transaction_id", "qonto_bank_account_id", "payload", "attempts"],
+                order_by="received_at asc",
+                limit=batch_size
+            )
+            if not events:
+                break
+
+            for event in events:
+                handled += 1
+                status, error = "Processed", None
+                retry = True
+
+                try:
+                    transaction = _event_transaction(json.loads(event.payload or "{}"))
+                    if transaction.get("transaction_id") and "amount" in transaction:
+                        tx_data = normalize_transaction(transaction)
+                    else:
+                        # Thin event: only IDs are pushed, fetch the transaction
+                        client = client or QontoClient(settings)
+                        tx_data = client.get_transaction(event.transaction_id)
+
+                    account_id = (
+                        event.qonto_bank_account_id
+                        or tx_data["raw_data"].get("bank_account_id")
+                    )
+                    mapping = mappings.get(account_id)
+
+                    if not mapping:
+                        status, error = "Ignored", f"No active mapping for account {account_id}"
+                    elif tx_data.get("status") in RETRACTED_STATUSES:
+                        # Declined or canceled: drop the provisional entry
+                        retract_transaction(tx_data["qonto_id"], tx_data["status"])
+                    elif tx_data.get("status") not in statuses:
+                        status, error = "Ignored", f"Transaction status {tx_data.get('status')}"
+                    elif staged:
+                        stage_transactions(mapping.qonto_bank_account_id, [tx_data])
+                        ingested += 1
+                    elif ingest_transaction(mapping, tx_data, batcher):
+                        ingested += 1
+                    else:
+                        # The dead letter replays it, so the event is not retried too
+                        status, error = "Failed", "Upsert failed, kept as a Qonto Dead Letter"
+                        retry = False
+
+                except Exception as e:
+                    status, error = "Failed", str(e)[:1000]
+
+                values = {"status": status, "error": error, "processed_at": now_datetime()}
+                if status == "Failed":
+                    values["attempts"] = (event.attempts or 0) + 1
+                    if retry and values["attempts"] < WEBHOOK_MAX_ATTEMPTS:
+                        # Left queued for the next run of the job
+                        values["status"] = "Queued"
+                        requeued.add(event.name)
+                frappe.db.set_value("Qonto Webhook Event", event.name, values, update_modified=False)
+
+                if batcher.add():
+                    batcher.commit()
+
+    finally:
+        batcher.commit()
+        if client:
+            client.close()
+
+    if staged and ingested:
+        enqueue_materializer()
+    elif ingested:
+        enqueue_post_sync()
+
+    if handled:
+        log_sync(
+            "INFO",
+            f"Webhook queue processed. {ingested} transactions synced.",
+            {"events": handled},
+            items_processed=ingested
+        )
+
+    return ingested
+
+
+def _event_transaction(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Transaction object of an event payload, whichever envelope it uses."""
+    data = payload.get("data") or payload.get("object") or payload.get("transaction") or {}
+    if isinstance(data, dict) and isinstance(data.get("transaction"), dict):
+        data = data["transaction"]
+    return data if isinstance(data, dict) else {}
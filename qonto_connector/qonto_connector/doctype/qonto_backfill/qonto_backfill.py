@@ -0,0 +1,19 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import get_datetime
+
+
+class QontoBackfill(Document):
+    """Qonto Backfill DocType"""
+
+    def validate(self):
+        """Validate backfill range"""
+        if get_datetime(self.from_date) >= get_datetime(self.to_date):
+            frappe.throw(_("From Date must be before To Date"))
+
+        if self.window_hours and self.window_hours < 1:
+            frappe.throw(_("Window size must be at least 1 hour"))
@@ -0,0 +1,32 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+import re
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+from qonto_connector.qonto.rules import RULE_ACTIONS, bump_rules_version, validate_rule
+
+
+class QontoCategorizationRule(Document):
+    """Qonto Categorization Rule DocType"""
+
+    def validate(self):
+        """Validate the pattern before it joins the compiled rules"""
+        if not any(self.get(action) for action in RULE_ACTIONS):
+            frappe.throw(_("Set a category, cost center or note"))
+
+        try:
+            validate_rule(self.as_dict())
+        except re.error as e:
+            frappe.throw(_("Invalid pattern: {0}").format(str(e)))
+
+    def on_update(self):
+        """Recompile the rules on every worker"""
+        bump_rules_version()
+
+    def on_trash(self):
+        """Recompile the rules on every worker"""
+        bump_rules_version()
@@ -0,0 +1,10 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class QontoDeadLetter(Document):
+    """Qonto Dead Letter DocType"""
+    pass
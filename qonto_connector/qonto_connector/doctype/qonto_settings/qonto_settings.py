@@ -15,6 +15,21 @@ class QontoSettings(Document):
         if self.poll_interval_minutes and self.poll_interval_minutes < 5:
             frappe.throw(_("Sync interval must be at least 5 minutes"))
 
+        # Validate adaptive interval bounds
+        if self.min_poll_interval_minutes and self.min_poll_interval_minutes < 1:
+            frappe.throw(_("Minimum sync interval must be at least 1 minute"))
+
+        if (
+            self.min_poll_interval_minutes
+            and self.max_poll_interval_minutes
+            and self.min_poll_interval_minutes > self.max_poll_interval_minutes
+        ):
+            frappe.throw(_("Minimum sync interval cannot exceed the maximum sync interval"))
+
+        # Unsigned webhook calls must never be accepted
+        if self.enable_webhooks and not self.webhook_secret:
+            frappe.throw(_("Set a webhook secret before enabling webhooks"))
+
         # Validate lookback days
         if self.default_sync_lookback_days and self.default_sync_lookback_days < 1:
             frappe.throw(_("Default lookback days must be at least 1 day"))
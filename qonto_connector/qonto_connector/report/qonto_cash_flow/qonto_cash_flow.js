@@ -0,0 +1,39 @@
+// Copyright (c) 2025, Itanéo and contributors
+// For license information, please see license.txt
+
+frappe.query_reports['Qonto Cash Flow'] = {
+    filters: [
+        {
+            fieldname: 'bank_account',
+            label: __('Bank Account'),
+            fieldtype: 'Link',
+            options: 'Bank Account'
+        },
+        {
+            fieldname: 'from_date',
+            label: __('From Date'),
+            fieldtype: 'Date',
+            default: frappe.datetime.add_months(frappe.datetime.get_today(), -1),
+            reqd: 1
+        },
+        {
+            fieldname: 'to_date',
+            label: __('To Date'),
+            fieldtype: 'Date',
+            default: frappe.datetime.get_today(),
+            reqd: 1
+        },
+        {
+            fieldname: 'operation_type',
+            label: __('Operation Type'),
+            fieldtype: 'Data'
+        },
+        {
+            fieldname: 'group_by',
+            label: __('Group By'),
+            fieldtype: 'Select',
+            options: 'Day\nMonth',
+            default: 'Day'
+        }
+    ]
+};
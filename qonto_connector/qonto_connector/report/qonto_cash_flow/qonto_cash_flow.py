@@ -0,0 +1,46 @@
+# Copyright (c) 2025, Itanéo and contributors
+# For license information, please see license.txt
+
+from frappe import _
+
+from qonto_connector.qonto.ledger import get_cash_flow
+
+
+def execute(filters=None):
+    """
+    Qonto Cash Flow report, read from the daily aggregate table only.
+
+    Args:
+        filters: Report filters
+
+    Returns:
+        Tuple of (columns, data)
+    """
+    filters = filters or {}
+    data = get_cash_flow(
+        bank_account=filters.get("bank_account"),
+        from_date=filters.get("from_date"),
+        to_date=filters.get("to_date"),
+        operation_type=filters.get("operation_type"),
+        group_by=(filters.get("group_by") or "Day").lower()
+    )
+    return get_columns(), data
+
+
+def get_columns():
+    return [
+        {"fieldname": "period", "label": _("Period"), "fieldtype": "Date", "width": 110},
+        {
+            "fieldname": "bank_account",
+            "label": _("Bank Account"),
+            "fieldtype": "Link",
+            "options": "Bank Account",
+            "width": 180,
+        },
+        {"fieldname": "operation_type", "label": _("Operation Type"), "fieldtype": "Data", "width": 130},
+        {"fieldname": "inflow", "label": _("Inflow"), "fieldtype": "Currency", "width": 130},
+        {"fieldname": "outflow", "label": _("Outflow"), "fieldtype": "Currency", "width": 130},
+        {"fieldname": "net", "label": _("Net"), "fieldtype": "Currency", "width": 130},
+        {"fieldname": "inflow_count", "label": _("Inflows"), "fieldtype": "Int", "width": 90},
+        {"fieldname": "outflow_count", "label": _("Outflows"), "fieldtype": "Int", "width": 90},
+    ]
@@ -0,0 +1,194 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for attachment downloads"""
+
+import hashlib
+import os
+from unittest.mock import patch
+
+import frappe
+import pytest
+
+from qonto_connector.qonto.attachments import (
+    RateBudget,
+    _fail,
+    attach_file,
+    download_file,
+    safe_file_name,
+)
+from qonto_connector.qonto.exceptions import QontoAPIError
+
+CONTENT = b"%PDF-1.7 receipt " * 100
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise QontoAPIError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+class FakeSession:
+    """Serves CONTENT, honouring Range unless told not to"""
+
+    def __init__(self, honour_range=True):
+        self.honour_range = honour_range
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        self.requests.append(headers or {})
+        range_header = (headers or {}).get("Range")
+        if range_header and self.honour_range:
+            offset = int(range_header[len("bytes="):-1])
+            if offset >= len(CONTENT):
+                return FakeResponse(416, b"")
+            return FakeResponse(206, CONTENT[offset:])
+        return FakeResponse(200, CONTENT)
+
+
+class TestDownloadFile:
+    """Test streamed downloads"""
+
+    def test_full_download(self, tmp_path):
+        """Test a file is written in chunks and hashed"""
+        part = tmp_path / "a.part"
+        sha256, size = download_file(FakeSession(), "https://s3/a", str(part), len(CONTENT), chunk_size=64)
+
+        assert part.read_bytes() == CONTENT
+        assert (sha256, size) == (hashlib.sha256(CONTENT).hexdigest(), len(CONTENT))
+
+    def test_resume(self, tmp_path):
+        """Test a partial file is completed with a Range request"""
+        part = tmp_path / "a.part"
+        part.write_bytes(CONTENT[:500])
+        session = FakeSession()
+
+        sha256, size = download_file(session, "https://s3/a", str(part), len(CONTENT), chunk_size=64)
+
+        assert session.requests == [{"Range": "bytes=500-"}]
+        assert part.read_bytes() == CONTENT
+        assert sha256 == hashlib.sha256(CONTENT).hexdigest()
+
+    def test_range_ignored(self, tmp_path):
+        """Test the file restarts when the server sends it whole"""
+        part = tmp_path / "a.part"
+        part.write_bytes(b"stale bytes")
+
+        download_file(FakeSession(honour_range=False), "https://s3/a", str(part), len(CONTENT))
+
+        assert part.read_bytes() == CONTENT
+
+    def test_already_complete(self, tmp_path):
+        """Test a complete part file is not fetched again"""
+        part = tmp_path / "a.part"
+        part.write_bytes(CONTENT)
+
+        sha256, _ = download_file(FakeSession(), "https://s3/a", str(part), len(CONTENT))
+
+        assert sha256 == hashlib.sha256(CONTENT).hexdigest()
+
+    def test_incomplete(self, tmp_path):
+        """Test a short download is an error and is kept for resume"""
+        part = tmp_path / "a.part"
+        with pytest.raises(QontoAPIError):
+            download_file(FakeSession(), "https://s3/a", str(part), len(CONTENT) + 10)
+        assert part.exists()
+
+
+class TestRateBudget:
+    """Test the attachment rate budget"""
+
+    def test_waits_when_spent(self):
+        """Test calls beyond the burst wait for tokens"""
+        now = [0.0]
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        budget = RateBudget(2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(4):
+            budget.acquire()
+
+        assert waits == [0.5, 0.5]
+
+
+class TestSafeFileName:
+    """Test stored file names"""
+
+    def test_sanitized(self):
+        """Test path parts and odd characters are removed"""
+        assert safe_file_name("../../etc/Facture n°12.pdf", "att-1") == "Facture_n_12.pdf"
+        assert safe_file_name(None, "att-1") == "att-1"
+
+
+class TestAttachFile:
+    """Test cases for attach_file"""
+
+    def site_path(self, tmp_path):
+        return lambda *parts: os.path.join(tmp_path, *parts)
+
+    def test_missing_duplicate_is_stored_again(self, tmp_path):
+        """Test content whose stored copy is gone from disk is stored, not linked"""
+        (tmp_path / "private" / "files").mkdir(parents=True)
+        part = tmp_path / "att-1.part"
+        part.write_bytes(b"receipt")
+        row = frappe._dict(name="att-1", bank_transaction="BT-1")
+
+        with patch("frappe.get_site_path", side_effect=self.site_path(tmp_path)), \
+                patch("frappe.db.get_value", return_value="/private/files/gone.pdf"), \
+                patch("frappe.db.exists", return_value=True), \
+                patch("frappe.db.set_value") as mock_set:
+            assert attach_file(row, {"file_name": "r.pdf"}, str(part), "ab" * 32, 7) is False
+
+        assert (tmp_path / "private" / "files" / f"{'ab' * 6}-r.pdf").read_bytes() == b"receipt"
+        assert mock_set.call_args.args[2]["file_url"] == f"/private/files/{'ab' * 6}-r.pdf"
+
+    def test_stored_duplicate_is_linked(self, tmp_path):
+        """Test content stored on disk is linked and the download dropped"""
+        (tmp_path / "private" / "files").mkdir(parents=True)
+        (tmp_path / "private" / "files" / "kept.pdf").write_bytes(b"receipt")
+        part = tmp_path / "att-1.part"
+        part.write_bytes(b"receipt")
+        row = frappe._dict(name="att-1", bank_transaction="BT-1")
+
+        with patch("frappe.get_site_path", side_effect=self.site_path(tmp_path)), \
+                patch("frappe.db.get_value", return_value="/private/files/kept.pdf"), \
+                patch("frappe.db.exists", return_value=True), \
+                patch("frappe.db.set_value"):
+            assert attach_file(row, {"file_name": "r.pdf"}, str(part), "ab" * 32, 7) is True
+
+        assert not part.exists()
+
+
+class TestFail:
+    """Test cases for failed attachments"""
+
+    def test_last_attempt_removes_partial_download(self, tmp_path):
+        """Test the .part file is kept for a retry and removed once attempts run out"""
+        part = tmp_path / "att-1.part"
+        part.write_bytes(b"rec")
+
+        with patch("qonto_connector.qonto.attachments.get_part_dir", return_value=str(tmp_path)), \
+                patch("qonto_connector.qonto.attachments.ATTACHMENT_MAX_ATTEMPTS", 3), \
+                patch("frappe.db.set_value"):
+            _fail(frappe._dict(name="att-1", attempts=1), Exception("timeout"))
+            assert part.exists()
+            _fail(frappe._dict(name="att-1", attempts=2), Exception("timeout"))
+
+        assert not part.exists()
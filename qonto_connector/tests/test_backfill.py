@@ -0,0 +1,102 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for windowed backfill"""
+
+from datetime import datetime
+
+import frappe
+from unittest.mock import Mock, patch
+
+from qonto_connector.qonto.backfill import split_windows, run_backfill_window
+
+
+class TestBackfill:
+    """Test cases for backfill windows and checkpoints"""
+
+    def test_split_windows_covers_range(self):
+        """Test windows are contiguous and the last one is truncated"""
+        windows = split_windows(datetime(2025, 1, 1), datetime(2025, 1, 10), 72)
+
+        assert windows == [
+            (datetime(2025, 1, 1), datetime(2025, 1, 4)),
+            (datetime(2025, 1, 4), datetime(2025, 1, 7)),
+            (datetime(2025, 1, 7), datetime(2025, 1, 10)),
+        ]
+
+    def test_split_windows_empty_range(self):
+        """Test an empty range yields no windows"""
+        assert split_windows(datetime(2025, 1, 1), datetime(2025, 1, 1), 24) == []
+
+    @patch("qonto_connector.qonto.backfill.update_backfill_progress")
+    @patch("qonto_connector.qonto.backfill.timed_commit")
+    @patch("qonto_connector.qonto.backfill.ingest_transaction", return_value=True)
+    @patch("qonto_connector.qonto.backfill.get_account_mapping")
+    @patch("qonto_connector.qonto.backfill.QontoClient")
+    def test_window_resumes_after_last_page(
+        self, mock_client_cls, mock_mapping, mock_ingest, mock_commit, mock_progress
+    ):
+        """Test a window restarts from the page after its checkpoint"""
+        row = frappe._dict({
+            "window_start": datetime(2025, 1, 1),
+            "window_end": datetime(2025, 1, 8),
+            "status": "Failed",
+            "last_page": 3,
+            "items_processed": 300,
+        })
+        parent = frappe._dict({"qonto_bank_account_id": "acc-1", "status": "Running"})
+        mock_mapping.return_value = frappe._dict({"qonto_bank_account_id": "acc-1"})
+
+        client = Mock()
+        client.iter_pages.return_value = iter([(4, [{"qonto_id": "a"}, {"qonto_id": "b"}])])
+        mock_client_cls.return_value = client
+
+        with patch("frappe.db.get_value", side_effect=[row, parent]), \
+                patch("frappe.db.set_value") as mock_set_value, \
+                patch("frappe.db.commit"), \
+                patch("frappe.get_single", return_value=frappe._dict()):
+            run_backfill_window("QONTO-BF-00001", "win-1")
+
+        assert client.iter_pages.call_args.kwargs["start_page"] == 4
+        mock_set_value.assert_any_call(
+            "Qonto Backfill Window", "win-1",
+            {"last_page": 4, "items_processed": 302},
+            update_modified=False
+        )
+        mock_set_value.assert_any_call(
+            "Qonto Backfill Window", "win-1", {"status": "Completed"}, update_modified=False
+        )
+        client.close.assert_called_once()
+
+    @patch("qonto_connector.qonto.backfill.update_backfill_progress")
+    @patch("qonto_connector.qonto.backfill.timed_commit")
+    @patch("qonto_connector.qonto.backfill.ingest_transaction", return_value=True)
+    @patch("qonto_connector.qonto.backfill.get_account_mapping")
+    @patch("qonto_connector.qonto.backfill.QontoClient")
+    def test_window_fetches_pending_when_enabled(
+        self, mock_client_cls, mock_mapping, mock_ingest, mock_commit, mock_progress
+    ):
+        """Test a catch-up window asks for pending transactions when pending sync is on"""
+        row = frappe._dict({
+            "window_start": datetime(2025, 1, 1),
+            "window_end": datetime(2025, 1, 8),
+            "status": "Pending",
+            "last_page": 0,
+            "items_processed": 0,
+        })
+        parent = frappe._dict({"qonto_bank_account_id": "acc-1", "status": "Running"})
+        mock_mapping.return_value = frappe._dict({"qonto_bank_account_id": "acc-1"})
+
+        client = Mock()
+        client.iter_pages.return_value = iter([])
+        mock_client_cls.return_value = client
+
+        settings = {"staged_ingestion": 0, "sync_pending_transactions": 1}
+        with patch("frappe.db.get_value", side_effect=[row, parent]), \
+                patch("frappe.db.get_single_value", side_effect=lambda doctype, field: settings[field]), \
+                patch("frappe.db.set_value"), \
+                patch("frappe.db.commit"), \
+                patch("frappe.get_single", return_value=frappe._dict()):
+            run_backfill_window("QONTO-BF-00001", "win-1")
+
+        assert client.iter_pages.call_args.kwargs["status"] == ["settled", "pending"]
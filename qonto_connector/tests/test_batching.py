@@ -0,0 +1,100 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for adaptive commit batching and per-row savepoints"""
+
+import pytest
+from unittest.mock import patch
+
+from qonto_connector.qonto.batching import AdaptiveCommitBatcher
+from qonto_connector.qonto.constants import TRANSACTION_SAVEPOINT
+from qonto_connector.qonto.sync import ingest_transaction
+
+
+@pytest.fixture
+def batcher():
+    with patch("qonto_connector.qonto.batching.get_row_lock_time", return_value=None):
+        yield AdaptiveCommitBatcher(initial=40, minimum=10, maximum=60, target_ms=100)
+
+
+class TestAdaptiveCommitBatcher:
+    """Test cases for batch sizing"""
+
+    def test_add_signals_full_batch(self, batcher):
+        """Test add returns True once the batch size is reached"""
+        assert not any(batcher.add() for _ in range(39))
+        assert batcher.add()
+
+    def test_grows_while_commits_are_fast(self, batcher):
+        """Test additive increase capped at the maximum"""
+        batcher.adapt(commit_ms=10, lock_wait_ms=0)
+        assert batcher.size == 60
+        batcher.adapt(commit_ms=10, lock_wait_ms=0)
+        assert batcher.size == 60
+
+    def test_holds_between_half_and_full_target(self, batcher):
+        """Test the size is kept when commits are near the target"""
+        batcher.adapt(commit_ms=80, lock_wait_ms=0)
+        assert batcher.size == 40
+
+    def test_halves_on_slow_commit_or_lock_waits(self, batcher):
+        """Test multiplicative decrease bounded by the minimum"""
+        batcher.adapt(commit_ms=500, lock_wait_ms=0)
+        assert batcher.size == 20
+        batcher.adapt(commit_ms=10, lock_wait_ms=500)
+        assert batcher.size == 10
+        batcher.adapt(commit_ms=500, lock_wait_ms=500)
+        assert batcher.size == 10
+
+    def test_halves_after_lock_timeout(self, batcher):
+        """Test a lock wait timeout shrinks the next batch"""
+        batcher.record_lock_timeout()
+        batcher.adapt(commit_ms=10, lock_wait_ms=0)
+        assert batcher.size == 20
+
+    def test_commit_resets_pending(self, batcher):
+        """Test commit returns the committed rows and starts a new batch"""
+        batcher.add()
+        batcher.add()
+        with patch("qonto_connector.qonto.sync.timed_commit", return_value=5.0):
+            assert batcher.commit() == 2
+        assert batcher.pending == 0
+
+
+class TestSavepoints:
+    """Test cases for per-row savepoints in ingest_transaction"""
+
+    @patch("qonto_connector.qonto.sync.log_sync")
+    @patch("frappe.log_error")
+    @patch("frappe.db")
+    @patch("qonto_connector.qonto.sync.upsert_bank_transaction", side_effect=ValueError("bad row"))
+    def test_failed_row_rolls_back_to_savepoint(self, mock_upsert, mock_db, *_):
+        """Test a failing row only rolls back its own writes"""
+        mock_db.is_deadlocked.return_value = False
+        mock_db.is_timedout.return_value = False
+
+        assert ingest_transaction({}, {"qonto_id": "tx-1"}) is False
+
+        mock_db.savepoint.assert_called_once_with(TRANSACTION_SAVEPOINT)
+        mock_db.rollback.assert_called_once_with(save_point=TRANSACTION_SAVEPOINT)
+        mock_db.commit.assert_not_called()
+
+    @patch("frappe.db")
+    @patch("qonto_connector.qonto.sync.upsert_bank_transaction")
+    def test_successful_row_releases_savepoint(self, mock_upsert, mock_db):
+        """Test a successful row releases its savepoint"""
+        assert ingest_transaction({}, {"qonto_id": "tx-1"}) is True
+
+        mock_db.release_savepoint.assert_called_once_with(TRANSACTION_SAVEPOINT)
+        mock_db.rollback.assert_not_called()
+
+    @patch("frappe.db")
+    @patch("qonto_connector.qonto.sync.upsert_bank_transaction", side_effect=RuntimeError("deadlock"))
+    def test_deadlock_is_raised(self, mock_upsert, mock_db):
+        """Test a deadlock rolls back the transaction and fails the account"""
+        mock_db.is_deadlocked.return_value = True
+
+        with pytest.raises(RuntimeError):
+            ingest_transaction({}, {"qonto_id": "tx-1"})
+
+        mock_db.rollback.assert_called_once_with()
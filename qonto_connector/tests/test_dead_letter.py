@@ -0,0 +1,92 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for dead letters of failed transactions"""
+
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+import frappe
+
+from qonto_connector.qonto.constants import DEAD_LETTER_MAX_ATTEMPTS
+from qonto_connector.qonto.dead_letter import (
+    DEAD_LETTER_DOCTYPE,
+    record_dead_letter,
+    resolve_dead_letter,
+    retry_delay,
+)
+from qonto_connector.qonto.sync import ingest_transaction
+
+
+def tx_data(qonto_id="tx-dead-1"):
+    return {
+        "qonto_id": qonto_id,
+        "posting_date": "2025-03-10T10:00:00.000Z",
+        "amount": -42.0,
+        "currency": "EUR",
+        "description": "Card payment",
+        "status": "settled",
+        "raw_data": {"id": "uuid-1", "transaction_id": qonto_id},
+    }
+
+
+class TestRetryDelay:
+    """Test the replay backoff"""
+
+    def test_exponential(self):
+        """Test the delay doubles with each attempt"""
+        assert retry_delay(1) == timedelta(minutes=5)
+        assert retry_delay(2) == timedelta(minutes=10)
+        assert retry_delay(4) == timedelta(minutes=40)
+
+    def test_capped(self):
+        """Test the delay never exceeds a day"""
+        assert retry_delay(30) == timedelta(days=1)
+
+
+class TestDeadLetters:
+    """Test recording and resolving dead letters"""
+
+    def teardown_method(self):
+        frappe.db.delete(DEAD_LETTER_DOCTYPE, {"qonto_id": ("like", "tx-dead-%")})
+        frappe.local.qonto_dead_letters = None
+
+    def test_record_and_count_failures(self):
+        """Test a failure is stored with its payload and counted again"""
+        record_dead_letter("acc-1", tx_data(), ValueError("bad amount"))
+        record_dead_letter("acc-1", tx_data(), ValueError("bad amount"))
+
+        letter = frappe.get_doc(DEAD_LETTER_DOCTYPE, "tx-dead-1")
+        assert letter.status == "Open"
+        assert letter.attempts == 2
+        assert letter.error_class == "ValueError"
+        assert json.loads(letter.payload)["amount"] == -42.0
+
+    def test_abandoned_after_max_attempts(self):
+        """Test letters stop being replayed after too many failures"""
+        for _ in range(DEAD_LETTER_MAX_ATTEMPTS):
+            record_dead_letter("acc-1", tx_data(), ValueError("bad amount"))
+
+        letter = frappe.get_doc(DEAD_LETTER_DOCTYPE, "tx-dead-1")
+        assert letter.status == "Abandoned"
+        assert not letter.next_retry_at
+
+    def test_resolve(self):
+        """Test a successful upsert resolves the letter"""
+        record_dead_letter("acc-1", tx_data(), ValueError("bad amount"))
+
+        assert resolve_dead_letter("tx-dead-1")
+        assert frappe.db.get_value(DEAD_LETTER_DOCTYPE, "tx-dead-1", "status") == "Resolved"
+        assert not resolve_dead_letter("tx-dead-2")
+
+    def test_ingest_failure_records_letter(self):
+        """Test a failing upsert leaves a dead letter behind"""
+        mapping = frappe._dict(qonto_bank_account_id="acc-1")
+        with patch(
+            "qonto_connector.qonto.sync.upsert_bank_transaction",
+            side_effect=frappe.ValidationError("missing account")
+        ):
+            assert not ingest_transaction(mapping, tx_data())
+
+        assert frappe.db.get_value(DEAD_LETTER_DOCTYPE, "tx-dead-1", "error_class") == "ValidationError"
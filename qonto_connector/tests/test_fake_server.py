@@ -0,0 +1,85 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for the fake Qonto API and the throughput benchmarks"""
+
+import pytest
+import frappe
+from qonto_connector.qonto.client import QontoClient
+from qonto_connector.benchmarks.fake_server import FakeQontoData, FakeQontoServer
+from qonto_connector.benchmarks.throughput import percentile, run
+from qonto_connector.benchmarks.ingestion import FeedClient
+
+
+class TestFakeServer:
+    """Test cases for the local Qonto stand-in"""
+
+    def test_organization(self, qonto_settings):
+        """Test fake accounts are listed through the client"""
+        with FakeQontoServer(FakeQontoData(accounts=3)) as server:
+            client = QontoClient(qonto_settings, base_url=server.base_url)
+            accounts = client.list_accounts()
+
+        assert [a["slug"] for a in accounts] == [
+            "fake-account-0", "fake-account-1", "fake-account-2"
+        ]
+
+    def test_pagination(self, qonto_settings):
+        """Test the client walks every page of an account"""
+        data = FakeQontoData(accounts=1, transactions_per_account=250)
+
+        with FakeQontoServer(data) as server:
+            client = QontoClient(qonto_settings, base_url=server.base_url)
+            transactions = list(client.iter_transactions("fake-account-0", page_size=100))
+
+        assert len(transactions) == 250
+        assert len({tx["qonto_id"] for tx in transactions}) == 250
+        assert server.status_counts == {200: 3}
+
+    def test_status_and_date_filters(self, qonto_settings):
+        """Test status and updated_at filters are applied"""
+        data = FakeQontoData(accounts=1, transactions_per_account=200, pending_ratio=0.5)
+        cutoff = data.transactions("fake-account-0")[100]["updated_at"]
+
+        with FakeQontoServer(data) as server:
+            client = QontoClient(qonto_settings, base_url=server.base_url)
+            settled = list(client.iter_transactions(
+                "fake-account-0",
+                updated_at_from=cutoff,
+                status=["settled"]
+            ))
+
+        assert settled
+        assert len(settled) < 100
+        assert all(tx["status"] == "settled" for tx in settled)
+
+    def test_data_is_deterministic(self):
+        """Test the same seed generates the same transactions"""
+        first = FakeQontoData(accounts=1, transactions_per_account=20, seed=7)
+        second = FakeQontoData(accounts=1, transactions_per_account=20, seed=7, start=first.start)
+
+        assert first.transactions("fake-account-0") == second.transactions("fake-account-0")
+
+    def test_percentile(self):
+        """Test nearest-rank percentile"""
+        assert percentile(list(range(1, 101)), 95) == 95
+        assert percentile([], 95) == 0
+
+    def test_run_benchmark(self):
+        """Test the benchmark suite reports throughput and page latency"""
+        reports = run(accounts=2, transactions=150, latency_ms=0, jitter_ms=0)
+
+        assert reports[0]["benchmark"] == "iter_transactions"
+        assert reports[0]["transactions"] == 300
+        assert reports[0]["pages"] == 4
+        assert reports[0]["p95_page_ms"] > 0
+
+    def test_feed_revision(self):
+        """Test a feed revision changes the same transactions"""
+        data = FakeQontoData(accounts=1, transactions_per_account=5)
+
+        original = list(FeedClient(data).iter_transactions("fake-account-0"))
+        revised = list(FeedClient(data, revision=1).iter_transactions("fake-account-0"))
+
+        assert [tx["qonto_id"] for tx in original] == [tx["qonto_id"] for tx in revised]
+        assert all(a["description"] != b["description"] for a, b in zip(original, revised))
@@ -0,0 +1,178 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for the incremental running totals"""
+
+import json
+from datetime import date
+from unittest.mock import patch
+
+import frappe
+
+from qonto_connector.qonto.ledger import (
+    balance_contribution,
+    balance_deltas,
+    balance_status,
+    baseline_ready,
+    cash_flow_contribution,
+    cash_flow_deltas,
+    cash_flow_name,
+    set_qonto_status,
+)
+
+
+def bank_transaction(**values):
+    defaults = {
+        "qonto_id": "tx-1",
+        "bank_account": "Qonto - EUR",
+        "docstatus": 0,
+        "qonto_status": "settled",
+        "deposit": 0,
+        "withdrawal": 0,
+        "date": "2025-01-15",
+        "qonto_data": json.dumps({"operation_type": "card"}),
+    }
+    return frappe._dict(defaults, **values)
+
+
+class TestBalanceContribution:
+    """Test cases for balance_contribution"""
+
+    def test_signed_amount(self):
+        """Test deposits add and withdrawals subtract"""
+        assert balance_contribution(bank_transaction(deposit=120)) == ("Qonto - EUR", 120)
+        assert balance_contribution(bank_transaction(withdrawal=45.5)) == ("Qonto - EUR", -45.5)
+
+    def test_excluded_rows(self):
+        """Test pending, declined, canceled, orphaned, cancelled and non-Qonto rows do not count"""
+        assert balance_contribution(bank_transaction(deposit=1, qonto_status="pending")) is None
+        for status in ("declined", "canceled", "orphaned"):
+            assert balance_contribution(bank_transaction(deposit=1, qonto_status=status)) is None
+        assert balance_contribution(bank_transaction(deposit=1, docstatus=2)) is None
+        assert balance_contribution(bank_transaction(deposit=1, qonto_id=None)) is None
+        assert balance_contribution(None) is None
+
+    def test_rows_without_stored_status_count(self):
+        """Test rows synced before statuses were stored count as settled"""
+        assert balance_contribution(bank_transaction(deposit=1, qonto_status=None))
+
+
+class TestBalanceDeltas:
+    """Test cases for balance_deltas"""
+
+    def test_insert_and_delete(self):
+        """Test a new row adds its amount and a deleted one removes it"""
+        assert balance_deltas(None, ("A", 10.0)) == {"A": 10.0}
+        assert balance_deltas(("A", 10.0), None) == {"A": -10.0}
+
+    def test_amount_change(self):
+        """Test only the difference is applied"""
+        assert balance_deltas(("A", 10.0), ("A", 12.5)) == {"A": 2.5}
+
+    def test_unchanged_amount(self):
+        """Test a save that keeps the amount writes nothing"""
+        assert balance_deltas(("A", 10.0), ("A", 10.0)) == {}
+
+    def test_account_change(self):
+        """Test moving a row between accounts updates both"""
+        assert balance_deltas(("A", 10.0), ("B", 10.0)) == {"A": -10.0, "B": 10.0}
+
+
+class TestCashFlow:
+    """Test cases for the daily cash flow increments"""
+
+    def test_contribution_key_and_values(self):
+        """Test a withdrawal counts as one outflow of its day and type"""
+        key, values = cash_flow_contribution(bank_transaction(withdrawal=30))
+        assert key == ("Qonto - EUR", date(2025, 1, 15), "card")
+        assert values == (0, 30, 0, 1)
+
+    def test_missing_payload_has_empty_type(self):
+        """Test rows without a payload are grouped under an empty type"""
+        key, _ = cash_flow_contribution(bank_transaction(deposit=5, qonto_data=None))
+        assert key[2] == ""
+
+    def test_pending_rows_do_not_count(self):
+        """Test provisional rows stay out of the cash flow"""
+        assert cash_flow_contribution(bank_transaction(deposit=5, qonto_status="pending")) is None
+
+    def test_date_change_moves_the_row(self):
+        """Test a re-dated transaction leaves its old day for the new one"""
+        before = cash_flow_contribution(bank_transaction(deposit=10))
+        after = cash_flow_contribution(bank_transaction(deposit=10, date="2025-01-16"))
+        assert cash_flow_deltas(before, after) == {
+            ("Qonto - EUR", date(2025, 1, 15), "card"): (-10, 0, -1, 0),
+            ("Qonto - EUR", date(2025, 1, 16), "card"): (10, 0, 1, 0),
+        }
+
+    def test_unchanged_row_writes_nothing(self):
+        """Test a save that keeps day, type and amounts has no delta"""
+        contribution = cash_flow_contribution(bank_transaction(deposit=10))
+        assert cash_flow_deltas(contribution, contribution) == {}
+
+    def test_name_is_deterministic(self):
+        """Test rows of the same key share one name"""
+        assert cash_flow_name("A", "2025-01-15", "card") == cash_flow_name("A", date(2025, 1, 15), "card")
+        assert cash_flow_name("A", "2025-01-15", "card") != cash_flow_name("A", "2025-01-15", "transfer")
+
+
+class TestSetQontoStatus:
+    """Test cases for set_qonto_status"""
+
+    def test_orphaned_row_leaves_the_totals(self):
+        """Test a settled row flagged orphaned is taken out of the totals"""
+        row = bank_transaction(deposit=80)
+        with patch("frappe.db.get_value", return_value=row), \
+                patch("frappe.db.set_value") as mock_set, \
+                patch("qonto_connector.qonto.ledger.increment_running_total") as mock_total, \
+                patch("qonto_connector.qonto.ledger.increment_cash_flow") as mock_cash_flow:
+            set_qonto_status("BT-1", "orphaned")
+
+        mock_set.assert_called_once_with("Bank Transaction", "BT-1", "qonto_status", "orphaned")
+        mock_total.assert_called_once_with("Qonto - EUR", -80)
+        assert mock_cash_flow.call_args.args[1] == (-80, 0, -1, 0)
+
+    def test_same_status_writes_nothing(self):
+        """Test an unchanged status neither writes nor moves the totals"""
+        row = bank_transaction(deposit=80, qonto_status="canceled")
+        with patch("frappe.db.get_value", return_value=row), \
+                patch("frappe.db.set_value") as mock_set, \
+                patch("qonto_connector.qonto.ledger.increment_running_total") as mock_total:
+            set_qonto_status("BT-1", "canceled")
+
+        mock_set.assert_not_called()
+        mock_total.assert_not_called()
+
+
+class TestBalanceStatus:
+    """Test cases for balance_status and baseline_ready"""
+
+    def test_first_difference_is_unconfirmed(self):
+        """Test a difference seen once, e.g. a transaction between polls, is not a mismatch"""
+        previous = frappe._dict(status="Matched", difference=0)
+        assert balance_status(12.5, previous, synced_since=True) == "Unconfirmed"
+        assert balance_status(0, previous, synced_since=True) == "Matched"
+
+    def test_difference_persisting_across_a_sync(self):
+        """Test the same difference after a completed sync is a mismatch"""
+        previous = frappe._dict(status="Unconfirmed", difference=12.5)
+        assert balance_status(12.5, previous, synced_since=False) == "Unconfirmed"
+        assert balance_status(12.5, previous, synced_since=True) == "Mismatch"
+        assert balance_status(7, previous, synced_since=True) == "Unconfirmed"
+
+    def test_mismatch_stays_until_it_changes(self):
+        """Test a confirmed mismatch is kept until the difference changes"""
+        previous = frappe._dict(status="Mismatch", difference=12.5)
+        assert balance_status(12.5, previous, synced_since=False) == "Mismatch"
+        assert balance_status(0, previous, synced_since=False) == "Matched"
+
+    def test_baseline_waits_for_sync_and_backfill(self):
+        """Test the opening balance waits for a first sync and no unfinished backfill"""
+        mapping = frappe._dict(qonto_bank_account_id="acc-1", last_synced_at=None)
+        assert not baseline_ready(mapping)
+
+        mapping.last_synced_at = "2025-01-15 10:00:00"
+        with patch("frappe.db.exists", return_value=True):
+            assert not baseline_ready(mapping)
+        with patch("frappe.db.exists", return_value=False):
+            assert baseline_ready(mapping)
@@ -0,0 +1,114 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for the indexed auto-reconciliation matcher"""
+
+from datetime import date
+
+from qonto_connector.qonto.matching import (
+    VoucherIndex,
+    match_transactions,
+    reference_keys,
+    score_candidate,
+)
+from qonto_connector.qonto.utils import normalize_name
+
+
+def tx(name="BT-1", amount_cents=12000, reference="", counterparty="", day=date(2025, 3, 10),
+       **values):
+    facts = {
+        "name": name,
+        "docstatus": 1,
+        "company": "Acme",
+        "account": "Qonto - A",
+        "direction": "in",
+        "amount_cents": amount_cents,
+        "currency": "EUR",
+        "date": day,
+        "references": reference_keys(reference),
+        "counterparty": normalize_name(counterparty),
+    }
+    facts.update(values)
+    return facts
+
+
+def voucher(name="ACC-SINV-2025-00012", amount_cents=12000, party="", day=date(2025, 3, 1),
+            **values):
+    facts = {
+        "doctype": "Sales Invoice",
+        "name": name,
+        "company": "Acme",
+        "direction": "in",
+        "amount_cents": amount_cents,
+        "currency": "EUR",
+        "account": None,
+        "dates": (day,),
+        "references": reference_keys(name),
+        "party_name": normalize_name(party),
+    }
+    facts.update(values)
+    return facts
+
+
+class TestReferences:
+    """Test cases for reference and name normalization"""
+
+    def test_reference_found_in_free_text(self):
+        """Test an invoice number inside a longer reference"""
+        assert "ACCSINV202500012" in reference_keys("Payment of ACC-SINV-2025-00012, thanks")
+
+    def test_short_words_are_ignored(self):
+        """Test words too short to identify a voucher are skipped"""
+        assert reference_keys("to INV") == {"TOINV"}
+
+    def test_normalize_name(self):
+        """Test accents, case and punctuation are folded"""
+        assert normalize_name("Société Générale S.A.") == normalize_name("SOCIETE  GENERALE SA")
+
+
+class TestScoring:
+    """Test cases for score_candidate"""
+
+    def test_reference_amount_party_and_date(self):
+        """Test a perfect match scores 100"""
+        score = score_candidate(
+            tx(reference="ACC-SINV-2025-00012", counterparty="ACME Corp", day=date(2025, 3, 1)),
+            voucher(party="Acme Corp.")
+        )
+        assert score == 100
+
+    def test_amount_only(self):
+        """Test an amount match alone stays below the propose threshold"""
+        assert score_candidate(tx(), voucher(day=date(2024, 1, 1))) == 30
+
+    def test_other_currency_or_account_never_matches(self):
+        """Test hard constraints reject the candidate"""
+        assert score_candidate(tx(currency="USD"), voucher()) == 0
+        assert score_candidate(tx(), voucher(doctype="Payment Entry", account="Other")) == 0
+
+
+class TestMatchTransactions:
+    """Test cases for the one-pass assignment"""
+
+    def test_index_candidates_by_amount_and_reference(self):
+        """Test both indexes feed the candidates, in the right direction"""
+        index = VoucherIndex([
+            voucher("ACC-SINV-2025-00001", amount_cents=500),
+            voucher("ACC-SINV-2025-00002", amount_cents=12000),
+            voucher("ACC-PINV-2025-00003", amount_cents=12000, direction="out"),
+        ])
+        names = {v["name"] for v in index.candidates(tx(reference="ACC-SINV-2025-00001"))}
+        assert names == {"ACC-SINV-2025-00001", "ACC-SINV-2025-00002"}
+
+    def test_each_voucher_matches_once(self):
+        """Test the best scoring transaction wins a shared voucher"""
+        index = VoucherIndex([voucher()])
+        matches = match_transactions(
+            [
+                tx("BT-1", counterparty="Acme"),
+                tx("BT-2", reference="ACC-SINV-2025-00012", counterparty="Acme"),
+            ],
+            index
+        )
+        assert list(matches) == ["BT-2"]
+        assert matches["BT-2"][1]["name"] == "ACC-SINV-2025-00012"
@@ -0,0 +1,82 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for sync phase metrics"""
+
+import pytest
+import frappe
+from qonto_connector.qonto.metrics import (
+    SyncMetrics,
+    start_run,
+    finish_run,
+    get_current_metrics,
+    render_prometheus
+)
+
+
+class TestMetrics:
+    """Test cases for phase timers and counters"""
+
+    def test_phase_recorded_per_account(self):
+        """Test phases are kept in run total and per account"""
+        metrics = SyncMetrics()
+
+        with metrics.account("acc-1"):
+            metrics.observe("http", 10)
+            metrics.observe("http", 30)
+        metrics.observe("commit", 5)
+
+        summary = metrics.summary()
+        assert summary["run"]["phases"]["http"]["count"] == 2
+        assert summary["run"]["phases"]["http"]["max_ms"] == 30
+        assert summary["run"]["phases"]["commit"]["count"] == 1
+        assert summary["accounts"]["acc-1"]["phases"]["http"]["avg_ms"] == 20
+        assert "commit" not in summary["accounts"]["acc-1"]["phases"]
+
+    def test_counters(self):
+        """Test counters are incremented per scope"""
+        metrics = SyncMetrics()
+
+        with metrics.account("acc-1"):
+            metrics.incr("transactions", 3)
+        metrics.incr("commits")
+
+        summary = metrics.summary()
+        assert summary["run"]["counters"] == {"transactions": 3, "commits": 1}
+        assert summary["accounts"]["acc-1"]["counters"] == {"transactions": 3}
+
+    def test_noop_outside_run(self):
+        """Test nothing is recorded when no run is active"""
+        metrics = get_current_metrics()
+        metrics.incr("transactions")
+
+        assert metrics.summary()["run"]["counters"] == {}
+
+    def test_finish_run_publishes_summary(self):
+        """Test finished runs are available to the endpoint"""
+        metrics = start_run()
+        assert get_current_metrics() is metrics
+
+        with metrics.phase("upsert"):
+            pass
+
+        summary = finish_run(metrics)
+
+        assert get_current_metrics() is not metrics
+        assert frappe.cache().get_value("qonto_sync_metrics")["run"] == summary["run"]
+
+    def test_render_prometheus(self):
+        """Test Prometheus text rendering"""
+        metrics = SyncMetrics()
+        with metrics.account("acc-1"):
+            metrics.observe("http", 1500)
+
+        payload = render_prometheus(
+            metrics.summary(),
+            {"runs": 1, "phases": {"http": {"count": 1, "total_ms": 1500}}, "counters": {}}
+        )
+
+        assert "# TYPE qonto_sync_phase_seconds_total counter" in payload
+        assert 'qonto_sync_phase_seconds_total{phase="http"} 1.5' in payload
+        assert 'qonto_sync_last_run_phase_seconds{phase="http",account="acc-1"} 1.5' in payload
+        assert payload.endswith("\n")
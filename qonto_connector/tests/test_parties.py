@@ -0,0 +1,87 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for the counterparty to Party index"""
+
+import frappe
+
+from qonto_connector.qonto.parties import AMBIGUOUS, party_keys, resolve_party
+
+
+def record(doctype, **values):
+    return frappe._dict(doctype=doctype, **values)
+
+
+def raw(name="", iban=None):
+    data = {"counterparty_name": name}
+    if iban:
+        data["transfer"] = {"counterparty_account_number": iban}
+    return data
+
+
+INDEX = {
+    "iban:FR7630001007941234567890185": ("Supplier", "SUP-0001"),
+    "alias:amzn mktp": ("Supplier", "Amazon EU"),
+    "name:acme": ("Customer", "CUST-0042"),
+    "name:dupont": AMBIGUOUS,
+}
+
+
+class TestPartyKeys:
+    """Test the keys each record contributes"""
+
+    def test_customer_names(self):
+        """Test a customer is keyed by its normalized name and ID"""
+        keys = party_keys(record("Customer", name="CUST-0042", customer_name="ACME S.A.", disabled=0))
+        assert keys == [
+            ("name:acme sa", ("Customer", "CUST-0042")),
+            ("name:cust 0042", ("Customer", "CUST-0042")),
+        ]
+
+    def test_disabled_party(self):
+        """Test disabled parties and inactive employees are left out"""
+        assert party_keys(record("Supplier", name="S", supplier_name="S", disabled=1)) == []
+        assert party_keys(record("Employee", name="E", employee_name="E", status="Left")) == []
+
+    def test_party_bank_account(self):
+        """Test a party Bank Account is keyed by IBAN, a company one is not"""
+        account = record(
+            "Bank Account", iban="fr76 3000 1007 9412 3456 7890 185",
+            party_type="Supplier", party="SUP-0001", is_company_account=0
+        )
+        assert party_keys(account) == [
+            ("iban:FR7630001007941234567890185", ("Supplier", "SUP-0001"))
+        ]
+
+        account.is_company_account = 1
+        assert party_keys(account) == []
+
+    def test_alias(self):
+        """Test an alias is keyed by its normalized text"""
+        alias = record("Qonto Party Alias", alias="AMZN Mktp", party_type="Supplier", party="Amazon EU")
+        assert party_keys(alias) == [("alias:amzn mktp", ("Supplier", "Amazon EU"))]
+
+
+class TestResolveParty:
+    """Test counterparty resolution"""
+
+    def test_iban_first(self):
+        """Test the IBAN wins over the counterparty name"""
+        party = resolve_party(raw("ACME", "FR76 3000 1007 9412 3456 7890 185"), INDEX)
+        assert party == ("Supplier", "SUP-0001")
+
+    def test_alias_before_name(self):
+        """Test aliases resolve names that differ from the party name"""
+        assert resolve_party(raw("AMZN MKTP"), INDEX) == ("Supplier", "Amazon EU")
+
+    def test_normalized_name(self):
+        """Test names match regardless of case and accents"""
+        assert resolve_party(raw("Acmé"), INDEX) == ("Customer", "CUST-0042")
+
+    def test_ambiguous(self):
+        """Test a name shared by several parties is not resolved"""
+        assert resolve_party(raw("Dupont"), INDEX) is None
+
+    def test_unknown(self):
+        """Test an unknown counterparty is not resolved"""
+        assert resolve_party(raw("Nobody", "DE89370400440532013000"), INDEX) is None
@@ -0,0 +1,116 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for provisional pending transactions"""
+
+import json
+from unittest.mock import Mock, patch
+
+import frappe
+
+from qonto_connector.qonto.constants import CACHE_KEY_PENDING_REPOLL_CURSOR
+from qonto_connector.qonto.pending import (
+    RETRACTED_STATUSES,
+    repoll_action,
+    repoll_pending,
+    retract_bank_transaction,
+)
+
+
+def pending_row(name, qonto_id):
+    return frappe._dict({
+        "name": name,
+        "bank_account": "Qonto - EUR",
+        "qonto_id": qonto_id,
+        "qonto_data": json.dumps({"id": f"uuid-{qonto_id}"}),
+    })
+
+
+class TestRepollAction:
+    """Test cases for the re-poll decision"""
+
+    def test_settled_is_settled(self):
+        """Test a settled transaction updates its Bank Transaction"""
+        assert repoll_action("settled") == "settle"
+
+    def test_declined_and_canceled_are_retracted(self):
+        """Test final failure statuses retract the provisional entry"""
+        for status in RETRACTED_STATUSES:
+            assert repoll_action(status) == "retract"
+
+    def test_still_pending_is_kept(self):
+        """Test a pending transaction is left untouched"""
+        assert repoll_action("pending") == "keep"
+
+    def test_unknown_status_is_kept(self):
+        """Test an unexpected status never deletes anything"""
+        assert repoll_action(None) == "keep"
+        assert repoll_action("reversed") == "keep"
+
+
+class TestRepollPending:
+    """Test cases for repoll_pending"""
+
+    @patch("qonto_connector.qonto.pending.log_sync")
+    @patch("qonto_connector.qonto.pending.retract_bank_transaction")
+    @patch("qonto_connector.qonto.sync.ingest_transaction", return_value=True)
+    @patch("qonto_connector.qonto.pending.QontoClient")
+    def test_settles_retracts_and_advances_cursor(
+        self, mock_client_cls, mock_ingest, mock_retract, mock_log
+    ):
+        """Test each row is settled, retracted or kept and the cursor moves past them"""
+        mapping = frappe._dict({"erpnext_bank_account": "Qonto - EUR", "active": 1})
+        settings = frappe._dict({"connected": 1, "account_mappings": [mapping]})
+        rows = [pending_row("BT-2", "a"), pending_row("BT-3", "b"), pending_row("BT-4", "c")]
+        statuses = {"uuid-a": "settled", "uuid-b": "declined", "uuid-c": "pending"}
+
+        client = Mock()
+        client.get_transaction.side_effect = lambda uuid: {"qonto_id": uuid, "status": statuses[uuid]}
+        mock_client_cls.return_value = client
+        cache = Mock()
+        cache.get_value.return_value = "BT-1"
+
+        with patch("frappe.get_single", return_value=settings), \
+                patch("frappe.cache", return_value=cache), \
+                patch("frappe.get_all", side_effect=[rows, []]), \
+                patch("frappe.db.commit"):
+            result = repoll_pending()
+
+        assert result == {"settled": 1, "retracted": 1, "pending": 1, "failed": 0}
+        assert mock_ingest.call_args.args == (mapping, {"qonto_id": "uuid-a", "status": "settled"})
+        mock_retract.assert_called_once_with("BT-3", "declined")
+        cache.set_value.assert_called_once_with(CACHE_KEY_PENDING_REPOLL_CURSOR, "BT-4")
+        client.close.assert_called_once()
+
+
+class TestRetractBankTransaction:
+    """Test cases for retract_bank_transaction"""
+
+    @patch("qonto_connector.qonto.pending.log_sync")
+    @patch("qonto_connector.qonto.pending.set_qonto_status")
+    def test_draft_is_deleted(self, mock_set_status, mock_log):
+        """Test an unallocated draft is deleted"""
+        doc = frappe._dict({"docstatus": 0, "payment_entries": []})
+        with patch("frappe.get_doc", return_value=doc), patch("frappe.delete_doc") as mock_delete:
+            retract_bank_transaction("BT-1", "declined")
+
+        mock_delete.assert_called_once_with(
+            "Bank Transaction", "BT-1", ignore_permissions=True, force=True
+        )
+        mock_set_status.assert_not_called()
+
+    @patch("qonto_connector.qonto.pending.log_sync")
+    @patch("qonto_connector.qonto.pending.set_qonto_status")
+    def test_allocated_or_submitted_is_flagged(self, mock_set_status, mock_log):
+        """Test a draft with allocations or a submitted row is kept and flagged"""
+        for doc in (
+            frappe._dict({"docstatus": 0, "payment_entries": [frappe._dict()]}),
+            frappe._dict({"docstatus": 1, "payment_entries": []}),
+        ):
+            with patch("frappe.get_doc", return_value=doc), patch("frappe.delete_doc") as mock_delete:
+                retract_bank_transaction("BT-1", "canceled")
+            mock_delete.assert_not_called()
+
+        assert mock_set_status.call_count == 2
+        mock_set_status.assert_called_with("BT-1", "canceled")
+        assert mock_log.call_args.args[0] == "WARN"
@@ -0,0 +1,50 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for sync profiling"""
+
+import pytest
+import frappe
+from unittest.mock import Mock, patch
+from qonto_connector.qonto.profiling import SyncProfiler
+from qonto_connector.qonto.sync import _start_profiler
+
+
+class TestProfiling:
+    """Test cases for the opt-in sync profiler"""
+
+    def test_profiler_off_by_default(self):
+        """Test no profiler is started when profiling is off"""
+        settings = Mock()
+        settings.get.return_value = 0
+
+        assert _start_profiler(settings, False, "all accounts") is None
+
+    def test_profiler_report(self):
+        """Test report contains functions, allocations and query count"""
+        profiler = SyncProfiler("test-account")
+        profiler.start()
+        data = [str(i) * 10 for i in range(1000)]
+        profiler.stop()
+
+        report = profiler.report()
+
+        assert data
+        assert "Qonto sync profile: test-account" in report
+        assert "SQL queries:" in report
+        assert "functions by cumulative time" in report
+        assert "allocation sites" in report
+
+    def test_report_attached_to_sync_log(self):
+        """Test report is saved as a file attached to the run's log"""
+        profiler = SyncProfiler("all accounts")
+        profiler.start()
+        profiler.stop()
+
+        with patch("qonto_connector.qonto.profiling.frappe.get_doc") as mock_get_doc:
+            profiler.attach_to("QONTO-LOG-00001")
+
+        file_doc = mock_get_doc.call_args[0][0]
+        assert file_doc["attached_to_doctype"] == "Qonto Sync Log"
+        assert file_doc["attached_to_name"] == "QONTO-LOG-00001"
+        assert file_doc["is_private"] == 1
@@ -0,0 +1,50 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for offline re-normalization"""
+
+import json
+from datetime import date
+
+import frappe
+
+from qonto_connector.qonto.renormalize import bank_transaction_changes
+
+
+def stored_row(sample_transaction, **values):
+    row = {
+        "name": "ACC-BTN-0001",
+        "date": date(2025, 10, 4),
+        "description": "Test Transaction — REF001 — Test Merchant",
+        "deposit": 0,
+        "withdrawal": 50.0,
+        "data": json.dumps(sample_transaction),
+    }
+    row.update(values)
+    return frappe._dict(row)
+
+
+class TestRenormalize:
+    """Test cases for change detection"""
+
+    def test_unchanged_row_is_not_written(self, sample_transaction):
+        """Test a row matching its payload yields no change"""
+        assert bank_transaction_changes(stored_row(sample_transaction)) == {}
+
+    def test_only_changed_fields(self, sample_transaction):
+        """Test only the differing fields are returned"""
+        row = stored_row(sample_transaction, description="Test Transaction")
+
+        assert bank_transaction_changes(row) == {
+            "description": "Test Transaction — REF001 — Test Merchant"
+        }
+
+    def test_amount_side(self, sample_transaction):
+        """Test a wrong side is moved from deposit to withdrawal"""
+        row = stored_row(sample_transaction, deposit=50.0, withdrawal=0)
+
+        assert bank_transaction_changes(row) == {"deposit": 0, "withdrawal": 50.0}
+
+    def test_missing_payload(self, sample_transaction):
+        """Test rows without stored payload are left alone"""
+        assert bank_transaction_changes(stored_row(sample_transaction, data=None)) == {}
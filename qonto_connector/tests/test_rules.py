@@ -0,0 +1,136 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for the compiled categorization rules"""
+
+import re
+from collections import Counter
+from unittest.mock import patch
+
+import frappe
+import pytest
+
+from qonto_connector.qonto.rules import (
+    CompiledRules,
+    apply_rules,
+    get_hits_checkpoint,
+    rollback_hits,
+    validate_rule,
+)
+
+
+def rule(name, pattern, match_field="Label", match_type="Contains", **actions):
+    return {
+        "name": name,
+        "match_field": match_field,
+        "match_type": match_type,
+        "pattern": pattern,
+        **actions,
+    }
+
+
+def tx(label="", reference="", counterparty_name="", operation_type="card"):
+    return {
+        "label": label,
+        "reference": reference,
+        "counterparty_name": counterparty_name,
+        "operation_type": operation_type,
+    }
+
+
+class Doc(dict):
+    def set(self, fieldname, value):
+        self[fieldname] = value
+
+
+class TestCompiledRules:
+    """Test the combined rule expression"""
+
+    def test_first_rule_wins(self):
+        """Test rules are tried in the given priority order"""
+        rules = CompiledRules([rule("Fuel", "total"), rule("Any card", "card", "Operation Type")])
+        assert rules.match(tx("TOTAL ENERGIES 1234"))["name"] == "Fuel"
+        assert rules.match(tx("Boulangerie"))["name"] == "Any card"
+
+    def test_field_confinement(self):
+        """Test a rule only matches its own field"""
+        rules = CompiledRules([rule("Rent", "rent", "Reference")])
+        assert rules.match(tx(label="rent", reference="invoice 12")) is None
+        assert rules.match(tx(label="SCI", reference="Rent March"))["name"] == "Rent"
+
+    def test_match_types(self):
+        """Test starts with, equals and regex rules"""
+        rules = CompiledRules([
+            rule("Equals", "transfer", "Operation Type", "Equals"),
+            rule("Starts", "AWS", match_type="Starts With"),
+            rule("Regex", r"inv-\d{4}", "Reference", "Regex"),
+        ])
+        assert rules.match(tx(operation_type="transfer"))["name"] == "Equals"
+        assert rules.match(tx(operation_type="transfer_sepa")) is None
+        assert rules.match(tx("aws emea"))["name"] == "Starts"
+        assert rules.match(tx("pay aws")) is None
+        assert rules.match(tx(reference="Paid INV-2025"))["name"] == "Regex"
+
+    def test_regex_cannot_leave_field(self):
+        """Test a regex spanning two fields does not match"""
+        rules = CompiledRules([rule("Wide", "acme.*march", match_type="Regex")])
+        assert rules.match(tx("ACME", reference="march")) is None
+        assert rules.match(tx("ACME fees march"))["name"] == "Wide"
+
+    def test_anchors_apply_to_the_field(self):
+        """Test ^ and $ anchor to the start and end of the matched field"""
+        rules = CompiledRules([
+            rule("Start", r"^amazon", match_type="Regex"),
+            rule("End", r"sepa$", "Reference", "Regex"),
+        ])
+        assert rules.match(tx("AMAZON EU"))["name"] == "Start"
+        assert rules.match(tx("pay amazon")) is None
+        assert rules.match(tx(reference="inv sepa"))["name"] == "End"
+        assert rules.match(tx(reference="sepa inv")) is None
+        assert rules.match(tx("a\namazon")) is None
+
+    def test_no_rules(self):
+        """Test an empty rule set matches nothing"""
+        assert CompiledRules([]).match(tx("anything")) is None
+
+    def test_invalid_pattern(self):
+        """Test invalid and named group patterns are rejected"""
+        with pytest.raises(re.error):
+            validate_rule(rule("Broken", "(unclosed", match_type="Regex"))
+        with pytest.raises(re.error):
+            validate_rule(rule("Named", "(?P<x>a)", match_type="Regex"))
+
+    def test_numbered_references_rejected(self):
+        """Test backreferences and conditionals by group number are rejected"""
+        for pattern in (r"(a)\1", r"(a)?(?(1)b|c)"):
+            with pytest.raises(re.error):
+                validate_rule(rule("Numbered", pattern, match_type="Regex"))
+        validate_rule(rule("Escaped", r"\\1 (a|b)", match_type="Regex"))
+
+
+class TestRuleHits:
+    """Test the counting of rule hits"""
+
+    def test_hit_counted_when_a_field_is_set(self):
+        """Test a match that sets nothing is not counted"""
+        rules = CompiledRules([rule("Fuel", "total", category="Fuel")])
+        doc = Doc()
+        with patch("qonto_connector.qonto.rules.get_compiled_rules", return_value=rules), \
+                patch("qonto_connector.qonto.rules.count_hit") as mock_count:
+            assert apply_rules(doc, tx("TOTAL")) == "Fuel"
+            apply_rules(Doc(qonto_category="Manual"), tx("TOTAL"))
+
+        assert doc["qonto_category"] == "Fuel"
+        mock_count.assert_called_once_with("Fuel")
+
+    def test_rollback_drops_hits_since_checkpoint(self):
+        """Test hits of rows rolled back to a savepoint are dropped in place"""
+        hits = frappe.local.qonto_rule_hits = Counter({"Fuel": 2})
+        try:
+            checkpoint = get_hits_checkpoint()
+            hits.update(["Fuel", "Rent"])
+            rollback_hits(checkpoint)
+            assert frappe.local.qonto_rule_hits is hits
+            assert hits == Counter({"Fuel": 2})
+        finally:
+            frappe.local.qonto_rule_hits = None
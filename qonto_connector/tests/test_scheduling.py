@@ -0,0 +1,88 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for the adaptive per-account polling schedule"""
+
+from datetime import datetime
+
+import frappe
+
+from qonto_connector.qonto.scheduling import (
+    get_due_mappings,
+    next_poll_interval,
+    reschedule,
+)
+
+NOW = datetime(2025, 10, 4, 12, 0)
+
+
+def make_settings(**kwargs):
+    values = {
+        "poll_interval_minutes": 15,
+        "min_poll_interval_minutes": 5,
+        "max_poll_interval_minutes": 240,
+        "enable_webhooks": 0,
+        "account_mappings": [],
+    }
+    values.update(kwargs)
+    return frappe._dict(values)
+
+
+class TestPollInterval:
+    """Test cases for interval adaptation"""
+
+    def test_busy_account_converges_to_minimum(self):
+        """Test the interval halves while polls bring transactions"""
+        interval = None
+        for _ in range(5):
+            interval = next_poll_interval(interval, 12, 15, 5, 240)
+        assert interval == 5
+
+    def test_dormant_account_converges_to_maximum(self):
+        """Test the interval grows while polls bring nothing"""
+        assert next_poll_interval(None, 0, 15, 5, 240) == 30
+        interval = None
+        for _ in range(50):
+            interval = next_poll_interval(interval, 0, 15, 5, 240)
+        assert interval == 240
+
+    def test_reschedule_sets_next_due(self):
+        """Test the next due time follows the new interval"""
+        mapping = frappe._dict({"poll_interval_minutes": 60})
+        reschedule(mapping, make_settings(), 3, now=NOW)
+
+        assert mapping.poll_interval_minutes == 30
+        assert mapping.next_sync_due == datetime(2025, 10, 4, 12, 30)
+
+    def test_failed_poll_keeps_interval(self):
+        """Test a failed poll is retried at the same pace"""
+        mapping = frappe._dict({"poll_interval_minutes": 60})
+        reschedule(mapping, make_settings(), None, now=NOW)
+
+        assert mapping.poll_interval_minutes == 60
+
+    def test_webhooks_use_safety_net_interval(self):
+        """Test polling falls back to the safety net while webhooks are on"""
+        mapping = frappe._dict({"poll_interval_minutes": 5})
+        settings = make_settings(enable_webhooks=1, webhook_safety_poll_minutes=360)
+        reschedule(mapping, settings, 10, now=NOW)
+
+        assert mapping.poll_interval_minutes == 360
+
+
+class TestDueMappings:
+    """Test cases for due account selection"""
+
+    def test_only_due_active_mappings(self):
+        """Test new, overdue and active mappings are due, others are not"""
+        mappings = [
+            frappe._dict(qonto_bank_account_id="new", active=1, next_sync_due=None),
+            frappe._dict(qonto_bank_account_id="overdue", active=1,
+                         next_sync_due=datetime(2025, 10, 4, 11, 0)),
+            frappe._dict(qonto_bank_account_id="later", active=1,
+                         next_sync_due=datetime(2025, 10, 4, 13, 0)),
+            frappe._dict(qonto_bank_account_id="inactive", active=0, next_sync_due=None),
+        ]
+        due = get_due_mappings(make_settings(account_mappings=mappings), now=NOW)
+
+        assert [m.qonto_bank_account_id for m in due] == ["new", "overdue"]
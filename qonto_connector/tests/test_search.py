@@ -0,0 +1,68 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for the transaction search query"""
+
+from datetime import date, datetime
+
+import frappe
+import pytest
+
+from qonto_connector.qonto.search import build_search_query, decode_cursor, encode_cursor
+from qonto_connector.qonto.staging import get_counterparty_iban
+
+
+class TestSearchQuery:
+    """Test cases for search query building"""
+
+    def test_cursor_round_trip(self):
+        """Test a cursor decodes to the row it was built from"""
+        cursor = encode_cursor(datetime(2025, 10, 4, 10, 0), "tx-001")
+        assert decode_cursor(cursor) == ("2025-10-04 10:00:00", "tx-001")
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is rejected"""
+        with pytest.raises(frappe.ValidationError):
+            decode_cursor("not-a-cursor")
+
+    def test_filters_are_exact_or_prefix(self):
+        """Test filters become sargable conditions with bound values"""
+        sql, values = build_search_query(
+            {
+                "counterparty_iban": "fr76 3000 4000",
+                "label": "AWS_",
+                "side": "debit",
+                "amount_min": "10.5",
+                "amount_max": 20,
+                "from_date": "2025-10-01",
+                "to_date": "2025-10-31",
+            },
+            limit=50
+        )
+
+        assert "t.counterparty_iban = %s" in sql
+        assert "t.label like %s" in sql
+        assert values == [
+            "debit", "FR7630004000", "AWS\\_%", 1050, 2000,
+            date(2025, 10, 1), date(2025, 11, 1), 51,
+        ]
+
+    def test_cursor_adds_keyset_condition(self):
+        """Test the next page starts strictly after the cursor row"""
+        cursor = encode_cursor("2025-10-04 10:00:00", "tx-001")
+        sql, values = build_search_query({}, limit=10, cursor=cursor)
+
+        assert "(t.posting_date < %s or (t.posting_date = %s and t.name < %s))" in sql
+        assert "offset" not in sql
+        assert values[-4:] == ["2025-10-04 10:00:00", "2025-10-04 10:00:00", "tx-001", 11]
+
+
+class TestCounterpartyIban:
+    """Test cases for IBAN extraction"""
+
+    def test_transfer_iban(self):
+        raw = {"transfer": {"counterparty_account_number": "fr76 3000 4000 0312 3456 7890 143"}}
+        assert get_counterparty_iban(raw) == "FR7630004000031234567890143"
+
+    def test_card_has_no_iban(self):
+        assert get_counterparty_iban({"operation_type": "card", "transfer": None}) is None
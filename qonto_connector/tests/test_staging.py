@@ -0,0 +1,101 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for the staging table extraction"""
+
+import json
+from datetime import datetime
+
+import frappe
+
+from qonto_connector.qonto.client import normalize_transaction
+from qonto_connector.qonto.staging import STAGING_DOCTYPE, stage_transactions, to_staging_row
+from qonto_connector.qonto.utils import parse_qonto_datetime
+
+
+class TestStaging:
+    """Test cases for staged rows"""
+
+    def test_typed_columns(self, sample_transaction):
+        """Test the typed columns are extracted from a normalized transaction"""
+        raw = dict(
+            sample_transaction,
+            amount_cents=5000,
+            updated_at="2025-10-04T10:30:00.000Z",
+            bank_account_id="acc-1",
+        )
+        row = to_staging_row("acc-fallback", normalize_transaction(raw))
+
+        assert row["qonto_id"] == "test-tx-001"
+        assert row["qonto_bank_account_id"] == "acc-1"
+        assert row["updated_at"] == datetime(2025, 10, 4, 10, 30)
+        assert row["posting_date"] == datetime(2025, 10, 4, 10, 0)
+        assert row["status"] == "settled"
+        assert row["side"] == "debit"
+        assert row["amount_cents"] == 5000
+        assert row["counterparty"] == "Test Merchant"
+        assert row["operation_type"] == "card"
+        assert json.loads(row["data"])["qonto_id"] == "test-tx-001"
+
+    def test_amount_cents_from_amount(self, sample_transaction):
+        """Test cents are derived from the amount when Qonto omits them"""
+        row = to_staging_row("acc-1", normalize_transaction(sample_transaction))
+
+        assert row["amount_cents"] == 5000
+        assert row["qonto_bank_account_id"] == "acc-1"
+
+    def test_older_version_keeps_newer_data(self, sample_transaction):
+        """Test an older fetch staged after a newer one changes nothing"""
+        newer = version(sample_transaction, "2025-10-05T10:00:00.000Z", "Newer label")
+        older = version(sample_transaction, "2025-10-04T10:00:00.000Z", "Older label")
+        try:
+            stage_transactions("acc-1", [newer])
+            frappe.db.set_value(STAGING_DOCTYPE, "test-tx-001", "sync_status", "Synced")
+            stage_transactions("acc-1", [older])
+
+            row = frappe.db.get_value(
+                STAGING_DOCTYPE, "test-tx-001", ["label", "updated_at", "sync_status", "data"],
+                as_dict=True
+            )
+            assert row.label == "Newer label"
+            assert row.updated_at == datetime(2025, 10, 5, 10, 0)
+            assert row.sync_status == "Synced"
+            assert json.loads(row.data)["raw_data"]["label"] == "Newer label"
+        finally:
+            frappe.db.rollback()
+
+    def test_synced_rows_keep_the_sync_status(self, sample_transaction):
+        """Test ingested rows refresh the search columns without queueing them again"""
+        first = version(sample_transaction, "2025-10-04T10:00:00.000Z", "First label")
+        second = version(sample_transaction, "2025-10-05T10:00:00.000Z", "Second label")
+        try:
+            stage_transactions("acc-1", [first], sync_status="Synced")
+            assert frappe.db.get_value(STAGING_DOCTYPE, "test-tx-001", "sync_status") == "Synced"
+
+            frappe.db.set_value(STAGING_DOCTYPE, "test-tx-001", "sync_status", "Pending")
+            stage_transactions("acc-1", [second], sync_status="Synced")
+            row = frappe.db.get_value(
+                STAGING_DOCTYPE, "test-tx-001", ["label", "sync_status"], as_dict=True
+            )
+            assert row.label == "Second label"
+            assert row.sync_status == "Pending"
+
+            stage_transactions("acc-1", [first], sync_status="Synced")
+            assert frappe.db.get_value(STAGING_DOCTYPE, "test-tx-001", "label") == "Second label"
+        finally:
+            frappe.db.rollback()
+
+
+def version(sample_transaction, updated_at, label):
+    return normalize_transaction(dict(sample_transaction, updated_at=updated_at, label=label))
+
+
+class TestParseQontoDatetime:
+    """Test cases for Qonto timestamps"""
+
+    def test_offset_converted_to_utc(self):
+        assert parse_qonto_datetime("2025-10-04T12:00:00+02:00") == datetime(2025, 10, 4, 10, 0)
+
+    def test_invalid_or_missing(self):
+        assert parse_qonto_datetime(None) is None
+        assert parse_qonto_datetime("yesterday") is None
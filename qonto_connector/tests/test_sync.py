@@ -3,11 +3,15 @@
 
 """Tests for sync engine"""
 
+from datetime import datetime
+
 import pytest
 import frappe
 from unittest.mock import Mock, patch, MagicMock
 from qonto_connector.qonto.sync import (
+    recent_first_window,
     schedule_all_syncs,
+    uncovered_gap,
     sync_all_accounts,
     sync_account
 )
@@ -87,3 +91,53 @@ class TestSync:
         # Should have synced one transaction
         assert count == 1
 
+
+class TestRecentFirstWindow:
+    """Test the split of a sync range into recent window and catch-up gap"""
+
+    now = datetime(2025, 10, 4, 12, 0)
+
+    def test_far_behind(self):
+        """Test the recent hours are synced now and the rest left to the catch-up"""
+        sync_from, catch_up = recent_first_window(datetime(2025, 7, 6), self.now, 24)
+
+        assert sync_from == datetime(2025, 10, 3, 12, 0)
+        assert catch_up == (datetime(2025, 7, 6), datetime(2025, 10, 3, 12, 0))
+
+    def test_up_to_date(self):
+        """Test a range within the recent window is synced whole"""
+        start = datetime(2025, 10, 4, 11, 45)
+        assert recent_first_window(start, self.now, 24) == (start, None)
+
+    def test_disabled(self):
+        """Test 0 hours never splits the range"""
+        start = datetime(2025, 7, 6)
+        assert recent_first_window(start, self.now, 0) == (start, None)
+
+
+class TestUncoveredGap:
+    """Test reuse of an unfinished catch-up"""
+
+    def test_no_catch_up(self):
+        """Test the whole gap is left to cover without an open catch-up"""
+        with patch("qonto_connector.qonto.backfill.get_open_catch_up", return_value=None):
+            gap = uncovered_gap("acc-1", datetime(2025, 7, 6), datetime(2025, 10, 3))
+        assert gap == (datetime(2025, 7, 6), datetime(2025, 10, 3))
+
+    def test_partly_covered(self):
+        """Test only the part after the open catch-up is left"""
+        existing = frappe._dict(name="BF-1", status="Running", to_date=datetime(2025, 10, 1))
+        with patch("qonto_connector.qonto.backfill.get_open_catch_up", return_value=existing), \
+                patch("qonto_connector.qonto.backfill.enqueue_backfill") as mock_enqueue:
+            gap = uncovered_gap("acc-1", datetime(2025, 7, 6), datetime(2025, 10, 3))
+        assert gap == (datetime(2025, 10, 1), datetime(2025, 10, 3))
+        mock_enqueue.assert_not_called()
+
+    def test_failed_catch_up_resumed(self):
+        """Test a failed catch-up covering the gap is resumed, not duplicated"""
+        existing = frappe._dict(name="BF-1", status="Failed", to_date=datetime(2025, 10, 3))
+        with patch("qonto_connector.qonto.backfill.get_open_catch_up", return_value=existing), \
+                patch("qonto_connector.qonto.backfill.enqueue_backfill") as mock_enqueue:
+            gap = uncovered_gap("acc-1", datetime(2025, 7, 6), datetime(2025, 10, 3))
+        assert gap is None
+        mock_enqueue.assert_called_once_with("BF-1")
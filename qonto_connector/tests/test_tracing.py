@@ -0,0 +1,67 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for trace spans"""
+
+import json
+import pytest
+import frappe
+from unittest.mock import patch
+from qonto_connector.qonto.tracing import (
+    span,
+    start_span,
+    get_current_span,
+    with_correlation
+)
+
+
+class TestTracing:
+    """Test cases for trace spans and correlation IDs"""
+
+    def test_child_spans_share_trace(self):
+        """Test nested spans share the trace ID and link to their parent"""
+        with span("run") as run_span:
+            with span("account", account_id="acc-1") as account_span:
+                batch = start_span("batch")
+                batch.finish(rows=10)
+
+        assert account_span.trace_id == run_span.trace_id
+        assert account_span.parent_id == run_span.span_id
+        assert batch.parent_id == account_span.span_id
+        assert batch.attributes == {"rows": 10}
+        assert get_current_span() is None
+
+    def test_error_recorded(self):
+        """Test exceptions mark the span as failed"""
+        with pytest.raises(ValueError):
+            with span("page", page=2) as page_span:
+                raise ValueError("boom")
+
+        assert page_span.to_dict()["status"] == "error"
+        assert "boom" in page_span.error
+
+    def test_with_correlation(self):
+        """Test log messages get the current correlation ID"""
+        assert with_correlation("failed") == "failed"
+
+        with span("run") as run_span:
+            assert with_correlation("failed") == (
+                f"failed [correlation_id={run_span.trace_id}/{run_span.span_id}]"
+            )
+
+    def test_export_to_jsonl(self, tmp_path):
+        """Test exported traces are written as JSON lines on root finish"""
+        trace_file = tmp_path / "qonto_traces.jsonl"
+
+        with patch(
+            "qonto_connector.qonto.tracing.get_trace_path",
+            return_value=str(trace_file)
+        ):
+            with span("run", export=True):
+                with span("http", endpoint="transactions") as http_span:
+                    http_span.set(http_status=200, retries=0)
+
+        records = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        assert [r["kind"] for r in records] == ["http", "run"]
+        assert records[0]["attributes"]["http_status"] == 200
+        assert records[0]["parent_id"] == records[1]["span_id"]
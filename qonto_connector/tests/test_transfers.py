@@ -0,0 +1,86 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for internal transfer detection"""
+
+import json
+from datetime import date
+
+import frappe
+
+from qonto_connector.qonto.transfers import pair_transfers, transfer_leg
+
+MAIN = "FR7630001007941234567890185"
+SAVINGS = "FR7612739000705123456789012"
+OWN_IBANS = {"Qonto Main": MAIN, "Qonto Savings": SAVINGS}
+
+
+def row(name, bank_account, amount, counterparty_iban, day=date(2025, 3, 10)):
+    side = "transfer" if amount < 0 else "income"
+    return frappe._dict({
+        "name": name,
+        "bank_account": bank_account,
+        "currency": "EUR",
+        "date": day,
+        "deposit": max(amount, 0),
+        "withdrawal": max(-amount, 0),
+        "qonto_data": json.dumps({side: {"counterparty_account_number": counterparty_iban}}),
+    })
+
+
+def legs(*rows):
+    return [leg for leg in (transfer_leg(r, OWN_IBANS) for r in rows) if leg]
+
+
+class TestTransferLeg:
+    """Test leg extraction"""
+
+    def test_external_counterparty(self):
+        """Test transfers to other IBANs are not legs"""
+        assert transfer_leg(row("BT-1", "Qonto Main", -100, "DE89370400440532013000"), OWN_IBANS) is None
+
+    def test_same_key_on_both_sides(self):
+        """Test both legs of a transfer get the same join key"""
+        out, incoming = legs(
+            row("BT-1", "Qonto Main", -100, "fr76 1273 9000 7051 2345 6789 012"),
+            row("BT-2", "Qonto Savings", 100, MAIN),
+        )
+        assert out["outgoing"] and not incoming["outgoing"]
+        assert out["key"] == incoming["key"] == (10000, "EUR", MAIN, SAVINGS)
+
+
+class TestPairTransfers:
+    """Test the hash join of legs"""
+
+    def test_pair(self):
+        """Test matching legs within the date window are paired"""
+        pairs = pair_transfers(legs(
+            row("BT-1", "Qonto Main", -250, SAVINGS),
+            row("BT-2", "Qonto Savings", 250, MAIN, date(2025, 3, 11)),
+        ))
+        assert pairs == [("BT-1", "BT-2")]
+
+    def test_amount_and_direction_must_agree(self):
+        """Test different amounts or reversed directions are not paired"""
+        assert pair_transfers(legs(
+            row("BT-1", "Qonto Main", -250, SAVINGS),
+            row("BT-2", "Qonto Savings", 251, MAIN),
+            row("BT-3", "Qonto Main", 250, SAVINGS),
+        )) == []
+
+    def test_date_window(self):
+        """Test legs too far apart are not paired"""
+        assert pair_transfers(legs(
+            row("BT-1", "Qonto Main", -250, SAVINGS, date(2025, 3, 1)),
+            row("BT-2", "Qonto Savings", 250, MAIN, date(2025, 3, 20)),
+        )) == []
+
+    def test_closest_leg_each_once(self):
+        """Test repeated transfers pair with the closest leg, each leg once"""
+        pairs = pair_transfers(legs(
+            row("BT-1", "Qonto Main", -100, SAVINGS, date(2025, 3, 1)),
+            row("BT-2", "Qonto Main", -100, SAVINGS, date(2025, 3, 3)),
+            row("BT-3", "Qonto Savings", 100, MAIN, date(2025, 3, 3)),
+            row("BT-4", "Qonto Savings", 100, MAIN, date(2025, 3, 3)),
+        ))
+        assert sorted(pairs) == [("BT-1", "BT-4"), ("BT-2", "BT-3")]
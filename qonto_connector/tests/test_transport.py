@@ -0,0 +1,95 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for record/replay transports"""
+
+import gzip
+import pytest
+import frappe
+from qonto_connector.qonto.client import QontoClient
+from qonto_connector.qonto.exceptions import QontoAPIError
+from qonto_connector.qonto.transport import (
+    PassthroughTransport,
+    RecordingTransport,
+    ReplayTransport,
+    _replay_key,
+    get_transport
+)
+from qonto_connector.benchmarks.fake_server import FakeQontoData, FakeQontoServer
+
+
+class TestTransport:
+    """Test cases for passthrough, record and replay modes"""
+
+    def test_default_is_passthrough(self, qonto_settings):
+        """Test the client talks to the API directly by default"""
+        client = QontoClient(qonto_settings)
+        assert isinstance(client.transport, PassthroughTransport)
+
+    def test_record_then_replay(self, qonto_settings, tmp_path):
+        """Test a recorded run replays identically without the server"""
+        cassette = str(tmp_path / "run.jsonl.gz")
+        data = FakeQontoData(accounts=1, transactions_per_account=150)
+
+        with FakeQontoServer(data) as server:
+            session = QontoClient(qonto_settings).session
+            client = QontoClient(
+                qonto_settings,
+                base_url=server.base_url,
+                transport=RecordingTransport(session, cassette)
+            )
+            recorded = list(client.iter_transactions(
+                "fake-account-0", updated_at_from="2020-01-01T00:00:00"
+            ))
+            client.close()
+
+        replay = ReplayTransport(cassette)
+        client = QontoClient(qonto_settings, base_url=server.base_url, transport=replay)
+        replayed = list(client.iter_transactions(
+            "fake-account-0", updated_at_from="2021-06-01T00:00:00"
+        ))
+
+        assert replayed == recorded
+        assert replay.remaining() == 0
+
+    def test_window_params_ignored_on_replay(self):
+        """Test the time window of the run, emission dates included, does not change the key"""
+        for param in ("updated_at_from", "settled_at_to", "emitted_at_from", "emitted_at_to"):
+            assert _replay_key("GET", "transactions", [[param, "2020-01-01"], ["page", "1"]]) == \
+                _replay_key("GET", "transactions", [[param, "2021-06-01"], ["page", "1"]])
+
+    def test_credentials_scrubbed(self, qonto_settings, tmp_path):
+        """Test the cassette holds no credentials"""
+        cassette = str(tmp_path / "org.jsonl.gz")
+
+        with FakeQontoServer() as server:
+            session = QontoClient(qonto_settings).session
+            client = QontoClient(
+                qonto_settings,
+                base_url=server.base_url,
+                transport=RecordingTransport(session, cassette)
+            )
+            client.get_organization()
+            client.close()
+
+        with gzip.open(cassette, "rt") as f:
+            content = f.read()
+
+        assert "test-secret-key" not in content
+        assert "Authorization" not in content
+
+    def test_replay_miss(self, qonto_settings, tmp_path):
+        """Test unrecorded requests fail as API errors"""
+        cassette = str(tmp_path / "empty.jsonl.gz")
+        with gzip.open(cassette, "wt") as f:
+            f.write('{"cassette_version": 1}\n')
+
+        client = QontoClient(qonto_settings, transport=ReplayTransport(cassette))
+
+        with pytest.raises(QontoAPIError):
+            client.get_organization()
+
+    def test_unknown_mode(self, qonto_settings):
+        """Test invalid transport modes are rejected"""
+        with pytest.raises(frappe.ValidationError):
+            get_transport(QontoClient(qonto_settings).session, mode="teleport")
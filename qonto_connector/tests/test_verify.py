@@ -0,0 +1,166 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for the merge-join verification against Qonto"""
+
+from datetime import date
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from qonto_connector.qonto.exceptions import QontoAPIError
+from qonto_connector.qonto.verify import (
+    confirm_orphan,
+    day_checksum,
+    differing_days,
+    fetch_qonto_days,
+    local_day_checksums,
+    merge_diff,
+    qonto_day_checksums,
+)
+
+DAY = date(2025, 1, 15)
+
+
+def remote(qonto_id, status="settled"):
+    return (qonto_id, status, DAY)
+
+
+def local(qonto_id, qonto_status="settled"):
+    return (qonto_id, f"BT-{qonto_id}", 0, qonto_status)
+
+
+class TestMergeDiff:
+    """Test cases for merge_diff"""
+
+    def test_identical_sides(self):
+        """Test matching IDs and statuses yield nothing"""
+        ids = ["a", "b", "c"]
+        assert list(merge_diff([remote(i) for i in ids], [local(i) for i in ids])) == []
+
+    def test_one_sided_rows(self):
+        """Test rows present on one side only"""
+        diff = list(merge_diff([remote("a"), remote("c")], [local("b"), local("c")]))
+        assert [(kind, (r or l)[0]) for kind, r, l in diff] == [
+            ("missing", "a"),
+            ("orphaned", "b"),
+        ]
+
+    def test_trailing_rows(self):
+        """Test rows left after one side is exhausted"""
+        diff = list(merge_diff([remote("a")], [local("a"), local("b"), local("c")]))
+        assert [kind for kind, _, _ in diff] == ["orphaned", "orphaned"]
+
+        diff = list(merge_diff([remote("x"), remote("y")], []))
+        assert [kind for kind, _, _ in diff] == ["missing", "missing"]
+
+    def test_declined_and_canceled_are_retracted(self):
+        """Test final failure statuses are reported as retracted"""
+        diff = list(merge_diff(
+            [remote("a", "declined"), remote("b", "canceled")],
+            [local("a", "pending"), local("b")]
+        ))
+        assert [kind for kind, _, _ in diff] == ["retracted", "retracted"]
+
+    def test_status_mismatch(self):
+        """Test a settled transaction still stored as pending"""
+        diff = list(merge_diff([remote("a", "settled")], [local("a", "pending")]))
+        assert diff == [("status", remote("a", "settled"), local("a", "pending"))]
+
+    def test_rows_without_stored_status_are_settled(self):
+        """Test rows synced before statuses were stored match settled"""
+        assert list(merge_diff([remote("a")], [local("a", None)])) == []
+
+
+class TestDayChecksums:
+    """Test cases for per-day checksums"""
+
+    def test_checksum_ignores_id_order(self):
+        """Test both sides hash the sorted IDs"""
+        assert day_checksum(["b", "a"], 100, 0) == day_checksum(["a", "b"], 100, 0)
+        assert day_checksum(["a", "b"], 100, 0) != day_checksum(["a", "c"], 100, 0)
+
+    def test_qonto_sums_in_cents(self):
+        """Test deposits and withdrawals are summed separately in cents"""
+        posted = "2025-01-15T10:00:00Z"
+        checksums = qonto_day_checksums(iter([
+            {"qonto_id": "a", "amount": 10.1, "posting_date": posted},
+            {"qonto_id": "b", "amount": 0.2, "posting_date": posted},
+            {"qonto_id": "c", "amount": -3.35, "posting_date": posted},
+        ]))
+        assert checksums == {DAY: day_checksum(["a", "b", "c"], 1030, 335)}
+
+    def test_differing_days(self):
+        """Test only changed or one-sided days are returned"""
+        other = date(2025, 1, 16)
+        extra = date(2025, 1, 17)
+        same = day_checksum(["a"], 100, 0)
+        qonto = {DAY: same, other: day_checksum(["b"], 100, 0), extra: same}
+        local = {DAY: same, other: day_checksum(["b"], 200, 0)}
+        assert differing_days(qonto, local) == [other, extra]
+
+    def test_local_checksums_skip_unchecked_statuses(self):
+        """Test orphaned, declined and canceled rows stay out of the local checksums"""
+        with patch("frappe.db.sql", return_value=[(DAY, 1, 500, 0, "abc")]) as mock_sql:
+            checksums = local_day_checksums("Qonto - EUR", DAY, DAY)
+
+        assert checksums == {DAY: (1, 500, 0, "abc")}
+        assert set(mock_sql.call_args.args[1][-1]) == {"orphaned", "declined", "canceled"}
+
+
+class TestFetchQontoDays:
+    """Test cases for fetch_qonto_days"""
+
+    @patch("qonto_connector.qonto.verify.get_ingested_statuses", return_value=["settled"])
+    def test_days_are_fetched_by_emission_range(self, mock_statuses):
+        """Test close days share one range and only their settled transactions come back"""
+        client = Mock()
+        client.iter_transactions.return_value = [
+            {"qonto_id": "a", "status": "settled", "posting_date": "2025-01-15T10:00:00Z"},
+            {"qonto_id": "b", "status": "settled", "posting_date": "2025-01-16T10:00:00Z"},
+            {"qonto_id": "c", "status": "pending", "posting_date": None},
+        ]
+        days = [DAY, date(2025, 1, 17)]
+
+        fetched = list(fetch_qonto_days(client, "acc-1", days))
+
+        assert [tx["qonto_id"] for tx in fetched] == ["a"]
+        client.iter_transactions.assert_called_once()
+        assert client.iter_transactions.call_args.kwargs["emitted_at_to"] == "2025-01-17T23:59:59.999Z"
+
+
+def api_error(status_code):
+    cause = requests.HTTPError(response=Mock(status_code=status_code))
+    error = QontoAPIError("API request failed")
+    error.__cause__ = cause
+    return error
+
+
+class TestConfirmOrphan:
+    """Test cases for confirm_orphan"""
+
+    def test_unknown_transaction_is_orphaned(self):
+        """Test a transaction Qonto answers 404 for is confirmed orphaned"""
+        client = Mock()
+        client.get_transaction.side_effect = api_error(404)
+        with patch("frappe.db.get_value", return_value='{"id": "uuid-a"}'):
+            assert confirm_orphan(client, local("a")) is None
+        client.get_transaction.assert_called_once_with("uuid-a")
+
+    def test_known_transaction_is_returned(self):
+        """Test a transaction emitted before the window comes back as a Qonto row"""
+        client = Mock()
+        client.get_transaction.return_value = {
+            "qonto_id": "a", "status": "settled", "posting_date": "2025-01-15T10:00:00Z"
+        }
+        with patch("frappe.db.get_value", return_value=None):
+            assert confirm_orphan(client, local("a")) == ("a", "settled", DAY)
+        client.get_transaction.assert_called_once_with("a")
+
+    def test_other_errors_are_raised(self):
+        """Test a failed lookup does not flag the row"""
+        client = Mock()
+        client.get_transaction.side_effect = api_error(500)
+        with patch("frappe.db.get_value", return_value=None), pytest.raises(QontoAPIError):
+            confirm_orphan(client, local("a"))
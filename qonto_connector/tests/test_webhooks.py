@@ -0,0 +1,132 @@
+# Copyright (c) 2025, Itanéo and Contributors
+# See license.txt
+
+"""Tests for webhook signature verification and event parsing"""
+
+import hashlib
+import hmac
+import json
+from unittest.mock import Mock, patch
+
+import frappe
+import pytest
+
+from qonto_connector.qonto.exceptions import QontoWebhookSignatureError
+from qonto_connector.qonto.webhooks import (
+    parse_event,
+    parse_signature_header,
+    process_webhook_queue,
+    verify_signature,
+)
+
+SECRET = "whsec-test"
+NOW = 1760000000
+
+
+def sign(body: bytes, timestamp: int = NOW, secret: str = SECRET) -> str:
+    digest = hmac.new(
+        secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256
+    ).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+class TestWebhookSignature:
+    """Test cases for webhook signatures"""
+
+    def test_parse_header_with_rotated_secrets(self):
+        """Test every v1 signature is kept"""
+        assert parse_signature_header("t=12, v1=aa, v1=bb") == (12, ["aa", "bb"])
+
+    def test_valid_signature(self):
+        """Test a correctly signed body passes"""
+        body = b'{"event_id": "evt-1"}'
+        verify_signature(body, sign(body), SECRET, now=NOW + 10)
+
+    def test_rotated_secret_signature(self):
+        """Test any matching v1 entry is accepted"""
+        body = b"{}"
+        header = sign(body, secret="old-secret") + "," + sign(body).split(",")[1]
+        verify_signature(body, header, SECRET, now=NOW)
+
+    def test_tampered_body(self):
+        """Test a modified body is rejected"""
+        body = b'{"amount": 10}'
+        with pytest.raises(QontoWebhookSignatureError):
+            verify_signature(b'{"amount": 1000}', sign(body), SECRET, now=NOW)
+
+    def test_expired_timestamp(self):
+        """Test an old call is rejected against replays"""
+        body = b"{}"
+        with pytest.raises(QontoWebhookSignatureError):
+            verify_signature(body, sign(body), SECRET, now=NOW + 3600)
+
+    def test_empty_secret_rejected(self):
+        """Test a call signed with an empty key is rejected when no secret is set"""
+        body = b"{}"
+        with pytest.raises(QontoWebhookSignatureError):
+            verify_signature(body, sign(body, secret=""), "", now=NOW)
+
+    def test_missing_header(self):
+        """Test an unsigned call is rejected"""
+        with pytest.raises(QontoWebhookSignatureError):
+            verify_signature(b"{}", None, SECRET, now=NOW)
+
+
+class TestWebhookEvent:
+    """Test cases for event parsing"""
+
+    def test_full_transaction_event(self, sample_transaction):
+        """Test IDs are read from an event carrying the transaction"""
+        body = json.dumps({
+            "event_id": "evt-1",
+            "event_type": "transaction.created",
+            "data": {"transaction": dict(sample_transaction, bank_account_id="acc-1")},
+        }).encode()
+
+        assert parse_event(body) == {
+            "event_id": "evt-1",
+            "event_type": "transaction.created",
+            "transaction_id": "test-tx-001",
+            "qonto_bank_account_id": "acc-1",
+        }
+
+    def test_event_without_id_uses_body_digest(self):
+        """Test redeliveries of an event without ID dedupe on the body"""
+        body = b'{"type": "transaction.updated", "object": {"id": "uuid-1"}}'
+        event = parse_event(body)
+
+        assert event["event_id"] == hashlib.sha256(body).hexdigest()
+        assert event["transaction_id"] == "uuid-1"
+        assert event["qonto_bank_account_id"] is None
+
+
+class TestWebhookQueue:
+    """Test cases for process_webhook_queue"""
+
+    @patch("qonto_connector.qonto.webhooks.log_sync")
+    @patch("qonto_connector.qonto.webhooks.enqueue_post_sync")
+    @patch("qonto_connector.qonto.webhooks.AdaptiveCommitBatcher")
+    @patch("qonto_connector.qonto.webhooks.is_staging_enabled", return_value=False)
+    @patch("qonto_connector.qonto.webhooks.ingest_transaction", return_value=False)
+    def test_failed_upsert_left_to_dead_letter(
+        self, mock_ingest, mock_staged, mock_batcher, mock_post_sync, mock_log, sample_transaction
+    ):
+        """Test an event whose upsert failed is not queued again, nor excluded by name"""
+        mapping = frappe._dict({"qonto_bank_account_id": "acc-1", "active": 1})
+        settings = frappe._dict({"account_mappings": [mapping]})
+        payload = json.dumps({"transaction": dict(sample_transaction, bank_account_id="acc-1")})
+        event = frappe._dict({
+            "name": "EVT-1", "transaction_id": "test-tx-001",
+            "qonto_bank_account_id": "acc-1", "payload": payload, "attempts": 0,
+        })
+        mock_batcher.return_value = Mock(add=Mock(return_value=False))
+
+        with patch("frappe.get_single", return_value=settings), \
+                patch("frappe.get_all", side_effect=[[event], []]) as mock_get_all, \
+                patch("frappe.db.set_value") as mock_set_value:
+            assert process_webhook_queue() == 0
+
+        values = mock_set_value.call_args.args[2]
+        assert values["status"] == "Failed"
+        assert values["attempts"] == 1
+        assert mock_get_all.call_args.kwargs["filters"]["name"] == ("not in", [""])